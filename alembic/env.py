@@ -8,6 +8,7 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from fluctlight.database.base import Base
 from fluctlight.database.models.character import Character  # noqa: F401
+from fluctlight.database.models.thread_state import ThreadState  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,34 @@
+"""add thread_states table
+
+Revision ID: b2c4e6f8a013
+Revises: f5d85768d810
+Create Date: 2025-02-16 10:12:31.402118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b2c4e6f8a013"
+down_revision: Union[str, None] = "f5d85768d810"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "thread_states",
+        sa.Column("namespace", sa.String(length=255), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("value", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("namespace", "key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("thread_states")
@@ -1,18 +1,19 @@
-from collections import defaultdict
-
 from langchain.callbacks.base import AsyncCallbackHandler
 from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_community.chat_models import ChatOpenAI
 
 from fluctlight.agent_catalog.catalog_manager import get_catalog_manager
 from fluctlight.agents.character.base import CharacterAgent
+from fluctlight.agents.history_compactor import HistoryCompactor
 from fluctlight.agents.message_intent_agent import MessageIntentAgent
 from fluctlight.data_model.interface import IMessage
 from fluctlight.data_model.interface.character import Character
 from fluctlight.embedding.chroma import get_chroma
 from fluctlight.intent.message_intent import MessageIntent
 from fluctlight.logger import get_logger
+from fluctlight.settings import CHAR_HISTORY_MAX_MESSAGES, CHAT_HISTORY_SUMMARY_ENABLED
 from fluctlight.utt.emoji import strip_leading_emoji
+from fluctlight.utt.state_store import ConversationStateStore
 from fluctlight.agents.expert.task_workflow_agent import TaskWorkflowAgent
 
 logger = get_logger(__name__)
@@ -21,7 +22,7 @@ _CHAR_INTENT_KEY = "CHAR"
 
 
 class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
-    history_buffer: dict[str, list[BaseMessage]]
+    history_buffer: ConversationStateStore[list[BaseMessage]]
 
     def __init__(
         self,
@@ -29,6 +30,8 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
         temperature: float = 0.5,
         openai_api_base: str | None = None,
         openai_api_key: str | None = None,
+        history_max_messages: int = CHAR_HISTORY_MAX_MESSAGES,
+        summarize_history: bool = CHAT_HISTORY_SUMMARY_ENABLED,
     ):
         super().__init__(intent=MessageIntent(key=_CHAR_INTENT_KEY))
         self.chat_model = ChatOpenAI(
@@ -46,7 +49,11 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
         }
         self.db = get_chroma()
         self.catalog_manager = get_catalog_manager()
-        self.history_buffer = defaultdict(list)
+        self.history_max_messages = history_max_messages
+        self.history_compactor = HistoryCompactor() if summarize_history else None
+        self.history_buffer = ConversationStateStore(
+            "character_history", on_evict=self._on_evict_history, persist=True
+        )
 
     @property
     def name(self) -> str:
@@ -75,13 +82,19 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
                 task_agent=None,  # TODO: construct a task agent from task_config
             )
         else:
+            thread_id = message.thread_message_id
             response_text = self.chat(
-                history=self.get_history(
-                    thread_id=message.thread_message_id, character=character
-                ),
+                history=self.get_history(thread_id=thread_id, character=character),
                 user_input=strip_leading_emoji(message.text),
                 character=character,
+                summary=(
+                    self.history_compactor.get_summary(thread_id)
+                    if self.history_compactor
+                    else None
+                ),
             )
+            self.compact_history(thread_id)
+            self.history_buffer.touch(thread_id)
             output.append(response_text)
         return output
 
@@ -93,13 +106,34 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
 
     def get_history(self, thread_id: str, character: Character) -> list[BaseMessage]:
         if thread_id not in self.history_buffer:
-            self.history_buffer[thread_id].append(
+            self.history_buffer[thread_id] = [
                 SystemMessage(
                     character.llm_system_prompt,
                 )
-            )
+            ]
         return self.history_buffer[thread_id]
 
+    def _on_evict_history(self, thread_id: str, _: list[BaseMessage]) -> None:
+        if self.history_compactor:
+            self.history_compactor.forget(thread_id)
+
+    def compact_history(self, thread_id: str) -> None:
+        """
+        Once the history passes history_max_messages, keep the system prompt and the
+        recent half, the older turns are folded into the summary in background.
+        """
+        history = self.history_buffer[thread_id]
+        if len(history) <= self.history_max_messages:
+            return
+        # Even count so the kept turns start with a human message
+        keep = (self.history_max_messages // 2) & ~1
+        dropped = history[1 : len(history) - keep]
+        history[1:] = history[len(history) - keep :]
+        if self.history_compactor:
+            self.history_compactor.submit(
+                thread_id, [f"[{m.type}]: {m.content}" for m in dropped]
+            )
+
     def chat(
         self,
         history: list[BaseMessage],
@@ -107,6 +141,7 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
         character: Character,
         callbacks: list[AsyncCallbackHandler] | None = None,
         metadata: dict | None = None,
+        summary: str | None = None,
     ) -> str:
         # 1. Generate context
         context = self._generate_context(user_input, character)
@@ -119,9 +154,16 @@ class OpenAICharacterAgent(CharacterAgent, MessageIntentAgent):
                 )
             )
         )
-        # 3. Generate response
+        # 3. Generate response, the summary of the older turns follows the system prompt
+        messages = history
+        if summary:
+            messages = (
+                history[:1]
+                + [SystemMessage(f"Summary of the earlier conversation:\n{summary}")]
+                + history[1:]
+            )
         response = self.chat_model.generate(
-            [history], callbacks=callbacks, metadata=metadata
+            [messages], callbacks=callbacks, metadata=metadata
         )
         logger.info(f"Response: {response}")
         text = response.generations[0][0].text
@@ -2,6 +2,8 @@ from typing import Any, Type
 
 from pydantic import BaseModel
 
+from fluctlight.settings import WORKFLOW_FUSED_VALIDATION
+
 
 class TaskEntity(BaseModel):
     def __repr__(self):
@@ -42,9 +44,14 @@ class IntakeHistoryMessage(TaskEntity):
 
 
 class TaskNodeValidation(BaseModel):
-    success_criteria: str
+    success_criteria: str = ""
+    # Jinja expression over the running state, e.g. "order.quantity | int > 0",
+    # evaluated locally instead of asking the LLM the success_criteria
+    success_rule: str | None = None
     failed_message: str | None = None
     passed_message: str | None = None
+    # Check the success criteria in the node's own LLM call
+    fused: bool = WORKFLOW_FUSED_VALIDATION
 
 
 class TaskConfig(BaseModel):
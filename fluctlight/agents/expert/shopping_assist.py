@@ -124,6 +124,7 @@ def guide_to_buy_product_config() -> WorkflowNodeConfig:
         validation_config=TaskNodeValidation(
             success_criteria="""Match user intention, if is buy shoe, return True, otherwise return False.
 UserIntent: {{guide_to_buy_product.user_intent}}""",
+            success_rule='guide_to_buy_product.user_intent == "buy_shoe"',
             failed_message="{{guide_to_buy_product.assistant_response_msg}}",
             passed_message="""Thanks for being interested in buying shoe. Please take a look at the inventory below.
                 {{inventory.all_product_desc}}
@@ -156,6 +157,7 @@ def product_interests_config() -> WorkflowNodeConfig:
             Inventory:
             {{inventory.all_product_desc}}
             """,
+            success_rule="product_interests.match and product_interests.product.id in inventory.products",
             failed_message="""Please select from the following inventory:
             {{inventory.all_product_desc}}
             """,
@@ -1,7 +1,6 @@
 from typing import Any
 
 import structlog
-from jinja2 import Template
 
 from fluctlight.agents.expert.data_model import TaskConfig
 from fluctlight.open.chat import (
@@ -10,6 +9,7 @@ from fluctlight.open.chat import (
 )
 from fluctlight.settings import GPT_DEFAULT_MODEL, GPT_STRUCTURE_OUTPUT_MODEL
 from fluctlight.task import Task
+from fluctlight.utt.template import get_template_registry
 
 logger = structlog.getLogger(__name__)
 
@@ -29,8 +29,7 @@ class TaskNode(Task):
         for key, _type in self.config.input_schema.items():
             inputs[key] = self._require_input(kwargs=kwds, key=key, value_type=_type)
 
-        template = Template(self.config.instruction)
-        prompt = template.render(**inputs)
+        prompt = get_template_registry().render(self.config.instruction, **inputs)
 
         # output schema is a structure entity
         if self.config.is_structure_output:
@@ -1,11 +1,13 @@
-from typing import Callable, Hashable, cast
-
-from jinja2 import Template
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Hashable, Type, cast
 
+from jinja2 import TemplateError
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
 from fluctlight.agents.expert.data_model import TaskEntity
 from fluctlight.agents.expert.task_workflow_config import (
     WorkflowConfig,
@@ -13,12 +15,25 @@ from fluctlight.agents.expert.task_workflow_config import (
     WorkflowNodeOutput,
     WorkflowInvocationState,
 )
+from fluctlight.logger import get_logger
 from fluctlight.open.chat import structure_chat_completion
+from fluctlight.utt.template import get_template_registry
+
+logger = get_logger(__name__)
 
 
 _DEFAULT_PASSED_MSG = "You request has been processed successfully."
 _DEFAULT_FAILED_MSG = "You request is invalid, please try again."
 
+_FUSED_VALIDATION_PROMPT = """{{instruction}}
+
+Put the result in `output`. Then check the output against the success criteria
+below, set `is_match_success_criteria` to true if it meets the criteria, otherwise
+false.
+
+Success criteria:
+{{success_criteria}}"""
+
 
 def create_task_node(
     name: str,
@@ -40,11 +55,14 @@ def create_task_node(
         A node function.
     """
 
+    if _is_fused_validation(config):
+        return _create_fused_task_node(name, config)
+    template = get_template_registry().get(config.instruction)
+
     def node_fn(state: WorkflowInvocationState) -> WorkflowInvocationState:
         running_state = state.running_state
 
         # LLM instruction
-        template = Template(config.instruction)
         text = template.render(running_state)
 
         messages = [
@@ -59,21 +77,116 @@ def create_task_node(
         structured_content = response.choices[0].message.parsed
 
         new_state = state.model_copy()
+        _set_node_output(new_state, name, config, structured_content)
+        return new_state
+
+    return node_fn
+
+
+def _is_fused_validation(config: WorkflowNodeConfig) -> bool:
+    # A success rule is checked locally, there is nothing to fuse
+    validation_config = config.validation_config
+    return bool(
+        validation_config
+        and validation_config.fused
+        and not validation_config.success_rule
+    )
+
+
+def _set_node_output(
+    state: WorkflowInvocationState,
+    name: str,
+    config: WorkflowNodeConfig,
+    structured_content: Any,
+) -> None:
+    # Check output state
+    if structured_content and isinstance(structured_content, config.output_schema):
+        if isinstance(structured_content, TaskEntity) or isinstance(
+            structured_content, str
+        ):
+            state.running_state[name] = structured_content
+            state.output[name] = WorkflowNodeOutput(
+                node=name,
+                status="SUCCESS",
+                message=None,
+            )
+        else:
+            raise ValueError(f"Output type not match, {structured_content}")
+
+
+class _OutputReference:
+    """
+    Renders the references of the success criteria to the node's own output, which
+    doesn't exist yet when the criteria are asked in the same call.
+    e.g. {{product_order.spec}} -> 'the spec field of your output'
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+
+    def __getattr__(self, attr: str) -> "_OutputReference":
+        return _OutputReference(f"{self.path}.{attr}" if self.path else attr)
+
+    def __str__(self) -> str:
+        return f"the {self.path} field of your output" if self.path else "your output"
+
+
+@lru_cache(maxsize=None)
+def make_fused_output_schema(output_schema: Type[Any]) -> Type[BaseModel]:
+    """The node output and the success criteria verdict in one schema."""
+    return create_model(
+        f"{output_schema.__name__}WithValidation",
+        output=(output_schema, ...),
+        is_match_success_criteria=(bool, ...),
+    )
+
+
+def _create_fused_task_node(
+    name: str,
+    config: WorkflowNodeConfig,
+) -> Callable[[WorkflowInvocationState], WorkflowInvocationState]:
+    """
+    Create a node function producing the output and checking the success criteria in
+    one LLM call, the verdict is kept in state.validation for
+    create_fused_conditional_edge.
+    """
+    registry = get_template_registry()
+    template = registry.get(config.instruction)
+    criteria_template = registry.get(config.validation_config.success_criteria or "")
+    prompt_template = registry.get(_FUSED_VALIDATION_PROMPT)
+    fused_schema = make_fused_output_schema(config.output_schema)
+
+    def node_fn(state: WorkflowInvocationState) -> WorkflowInvocationState:
+        running_state = state.running_state
+        text = prompt_template.render(
+            instruction=template.render(running_state),
+            success_criteria=criteria_template.render(
+                {**running_state, name: _OutputReference()}
+            ),
+        )
+
+        messages = [
+            {
+                "role": "system",
+                "content": text,
+            },
+        ]
 
-        # Check output state
-        if structured_content and isinstance(structured_content, config.output_schema):
-            if isinstance(structured_content, TaskEntity) or isinstance(
-                structured_content, str
-            ):
-                new_state.running_state[name] = structured_content
-                new_state.output[name] = WorkflowNodeOutput(
-                    node=name,
-                    status="SUCCESS",
-                    message=None,
-                )
-            else:
-                raise ValueError(f"Output type not match, {structured_content}")
+        response = structure_chat_completion(fused_schema, messages)
+        structured_content = response.choices[0].message.parsed
 
+        new_state = state.model_copy()
+        if isinstance(structured_content, fused_schema):
+            _set_node_output(new_state, name, config, structured_content.output)
+            new_state.validation[name] = structured_content.is_match_success_criteria
+        else:
+            # A refusal or a parse failure fails the criteria, not a stale verdict
+            logger.warning(
+                "Fail to parse fused output",
+                node=name,
+                parsed=type(structured_content).__name__,
+            )
+            new_state.validation[name] = False
         return new_state
 
     return node_fn
@@ -86,14 +199,15 @@ def create_task_validation_node(
 ) -> Callable[[WorkflowInvocationState], WorkflowInvocationState]:
     """Create a workflow node function for loop output valiation nodes."""
 
-    def node_fn(state: WorkflowInvocationState) -> WorkflowInvocationState:
-        passed_template = Template(
-            config.validation_config.passed_message or _DEFAULT_PASSED_MSG
-        )
-        failed_template = Template(
-            config.validation_config.failed_message or _DEFAULT_FAILED_MSG
-        )
+    registry = get_template_registry()
+    passed_template = registry.get(
+        config.validation_config.passed_message or _DEFAULT_PASSED_MSG
+    )
+    failed_template = registry.get(
+        config.validation_config.failed_message or _DEFAULT_FAILED_MSG
+    )
 
+    def node_fn(state: WorkflowInvocationState) -> WorkflowInvocationState:
         new_state = state.model_copy()
         if success:
             new_state.output[name] = WorkflowNodeOutput(
@@ -128,11 +242,11 @@ def create_conditional_edge_chain(
     node_config: WorkflowNodeConfig,
 ) -> Callable[[WorkflowInvocationState], str]:
     success_criteria: str = node_config.validation_config.success_criteria or ""
+    template = get_template_registry().get(success_criteria)
 
     def node_conditional_edge(state: WorkflowInvocationState) -> str:
         context = state.running_state
 
-        template = Template(success_criteria)
         text = template.render(context)
 
         messages = [
@@ -155,6 +269,62 @@ def create_conditional_edge_chain(
     return node_conditional_edge
 
 
+def create_rule_conditional_edge(
+    name: str,
+    node_config: WorkflowNodeConfig,
+) -> Callable[[WorkflowInvocationState], str]:
+    """
+    Route on the success_rule, a Jinja expression evaluated over the running state in
+    the sandbox, without an LLM call. When the rule fails to evaluate, e.g. compares
+    an undefined value, the success_criteria are asked to the LLM if any.
+    """
+    success_rule = node_config.validation_config.success_rule
+    expression = get_template_registry().expression(success_rule)
+    fallback = (
+        create_conditional_edge_chain(name, node_config)
+        if node_config.validation_config.success_criteria
+        else None
+    )
+
+    def node_conditional_edge(state: WorkflowInvocationState) -> str:
+        try:
+            return "YES" if expression(**state.running_state) else "NO"
+        except (TemplateError, TypeError, ValueError) as e:
+            logger.warning(
+                "Fail to evaluate success rule",
+                node=name,
+                rule=success_rule,
+                err=str(e),
+            )
+            if fallback is None:
+                return "NO"
+            return fallback(state)
+
+    return node_conditional_edge
+
+
+def create_fused_conditional_edge(
+    name: str,
+) -> Callable[[WorkflowInvocationState], str]:
+    """Route on the verdict of the fused node, without another LLM call."""
+
+    def node_conditional_edge(state: WorkflowInvocationState) -> str:
+        return "YES" if state.validation.get(name) else "NO"
+
+    return node_conditional_edge
+
+
+def create_validation_edge(
+    name: str,
+    node_config: WorkflowNodeConfig,
+) -> Callable[[WorkflowInvocationState], str]:
+    if node_config.validation_config.success_rule:
+        return create_rule_conditional_edge(name, node_config)
+    if _is_fused_validation(node_config):
+        return create_fused_conditional_edge(name)
+    return create_conditional_edge_chain(name, node_config)
+
+
 def build_workflow_graph(config: WorkflowConfig) -> CompiledStateGraph:
     """
     Builds a workflow graph based on the provided `TaskWorkflowConfig`.
@@ -165,7 +335,9 @@ def build_workflow_graph(config: WorkflowConfig) -> CompiledStateGraph:
     begins with a node router and constructs conditional edges between nodes based on
     their success criteria. If a node has success criteria, loop output nodes are
     created to handle both success and failure cases, directing the flow to the end
-    of the workflow.
+    of the workflow. A success rule is evaluated locally, otherwise a fused validated
+    node checks its success criteria in its own LLM call and the edge routes on the
+    verdict.
 
     Args:
         config: The configuration for the task workflow.
@@ -200,10 +372,45 @@ def build_workflow_graph(config: WorkflowConfig) -> CompiledStateGraph:
             workflow.add_edge(k + "_LOOP_OUTPUT_FALSE", END)
             workflow.add_conditional_edges(
                 k,
-                create_conditional_edge_chain(k, v),
+                create_validation_edge(k, v),
                 {"YES": k + "_LOOP_OUTPUT_TRUE", "NO": k + "_LOOP_OUTPUT_FALSE"},
             )
         else:
             workflow.add_edge(k, END)
 
     return workflow.compile()
+
+
+class CompiledWorkflow:
+    """
+    The compiled graph of a workflow config and its node adjacency, built once and
+    shared by every run of the config. The config must not be mutated after it is
+    compiled.
+    """
+
+    def __init__(self, config: WorkflowConfig) -> None:
+        self.graph = build_workflow_graph(config)
+        self.upstreams: dict[str, list[str]] = {
+            k: list(v.input_schema.keys()) for k, v in config.nodes.items()
+        }
+        self.downstreams: dict[str, list[str]] = {}
+        for k, v in config.nodes.items():
+            for upstream in v.input_schema:
+                self.downstreams.setdefault(upstream, []).append(k)
+
+
+# id(config) -> compiled workflow, the entry is dropped once the config is collected
+_COMPILED_WORKFLOWS: dict[int, CompiledWorkflow] = {}
+_COMPILED_WORKFLOWS_LOCK = threading.Lock()
+
+
+def get_compiled_workflow(config: WorkflowConfig) -> CompiledWorkflow:
+    """The compiled workflow of the config, by identity of the config object."""
+    key = id(config)
+    with _COMPILED_WORKFLOWS_LOCK:
+        compiled = _COMPILED_WORKFLOWS.get(key)
+        if compiled is None:
+            compiled = CompiledWorkflow(config)
+            _COMPILED_WORKFLOWS[key] = compiled
+            weakref.finalize(config, _COMPILED_WORKFLOWS.pop, key, None)
+    return compiled
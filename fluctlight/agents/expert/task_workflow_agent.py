@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 from fluctlight.agents.expert.data_model import (
@@ -8,11 +9,14 @@ from fluctlight.agents.expert.task_workflow_config import (
     WorkflowInvocationState,
     WorkflowConfig,
 )
+from fluctlight.agents.expert.task_workflow import get_compiled_workflow
 from fluctlight.agents.expert.task_workflow_runner import WorkflowRunner
 from fluctlight.agents.message_intent_agent import MessageIntentAgent
 from fluctlight.data_model.interface import IMessage
 from fluctlight.intent.message_intent import MessageIntent
 from fluctlight.logger import get_logger
+from fluctlight.settings import WORKFLOW_MAX_WORKERS, WORKFLOW_PARALLEL_NODES
+from fluctlight.utt.state_store import ConversationStateStore
 
 logger = get_logger(__name__)
 
@@ -25,6 +29,8 @@ class TaskWorkflowAgent(MessageIntentAgent):
         intent: MessageIntent,
         config: WorkflowConfig,
         context: Optional[dict[str, Any]] = None,
+        parallel: bool = WORKFLOW_PARALLEL_NODES,
+        max_workers: int = WORKFLOW_MAX_WORKERS,
     ) -> None:
         super().__init__(intent=intent)
         self._name = name
@@ -32,7 +38,17 @@ class TaskWorkflowAgent(MessageIntentAgent):
         self._intent = intent
         self._context = context or {}
         self._config = config
-        self._invocation_contexts = {}
+        # Compile upfront, the runners of every message share the graph
+        get_compiled_workflow(config)
+        self._invocation_contexts: ConversationStateStore[WorkflowInvocationState] = (
+            ConversationStateStore(f"workflow:{name}", persist=True)
+        )
+        # Runs the independent nodes concurrently, None runs one node at a time
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workflow")
+            if parallel
+            else None
+        )
 
     def retrieve_context(self, message: IMessage) -> WorkflowInvocationState:
         if message.thread_message_id not in self._invocation_contexts:
@@ -53,17 +69,23 @@ class TaskWorkflowAgent(MessageIntentAgent):
     ) -> list[str]:
         ic: WorkflowInvocationState = self.retrieve_context(message)
         responses: list[str] = []
-        # build or restore worflow runner
+        # restore worflow runner, the compiled graph is cached per config
         workflow_runner = WorkflowRunner(self._config, ic=ic)
         while not workflow_runner.is_ended():
-            node_output = workflow_runner.run(message_text=message.text)
-            responses.append(node_output.message)
+            if self._executor is not None:
+                node_outputs = workflow_runner.run_parallel(
+                    message_text=message.text, executor=self._executor
+                )
+            else:
+                node_outputs = [workflow_runner.run(message_text=message.text)]
+            responses.extend(node_output.message for node_output in node_outputs)
             logger.debug("Task agent process message", name=self._name, ic=ic)
             # if current unhandled node have input message, break to obtain new input message
             # otherwise continue to handle next node
             if workflow_runner.has_input_message_in_current_upstreams():
                 break
 
+        self._invocation_contexts.touch(message.thread_message_id)
         return responses
 
     @property
@@ -86,6 +86,8 @@ class WorkflowInvocationState(BaseModel):
     current_node: str
     running_state: dict[str, Any] = {}
     output: dict[str, WorkflowNodeOutput] = {}
+    # Success criteria verdicts of the fused validated nodes
+    validation: dict[str, bool] = {}
 
 
 def is_internal_upstream(upstream: str) -> bool:
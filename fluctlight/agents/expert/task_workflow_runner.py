@@ -1,3 +1,4 @@
+from concurrent.futures import Executor
 from typing import Any
 from fluctlight.agents.expert.data_model import (
     IntakeHistoryMessage,
@@ -12,12 +13,13 @@ from fluctlight.agents.expert.task_workflow_config import (
     is_internal_upstream,
 )
 
-from fluctlight.agents.expert.task_workflow import build_workflow_graph
+from fluctlight.agents.expert.task_workflow import get_compiled_workflow
 from fluctlight.logger import get_logger
 
 logger = get_logger(__name__)
 
 _END = "END"
+_DONE_STATUSES = ("SUCCESS", "LOOP_MESSAGE_CHECK_PASSED")
 
 
 class WorkflowRunner:
@@ -27,7 +29,8 @@ class WorkflowRunner:
         ic: WorkflowInvocationState,
     ):
         self._config = config
-        self._graph = build_workflow_graph(config)
+        self._workflow = get_compiled_workflow(config)
+        self._graph = self._workflow.graph
         self._ic: WorkflowInvocationState = ic
 
     @property
@@ -46,21 +49,17 @@ class WorkflowRunner:
         if cur_node == _END:
             return []
 
-        if cur_node not in self._config.nodes:
+        if cur_node not in self._workflow.upstreams:
             raise ValueError(f"{cur_node} does not exist in the configuration.")
 
-        input_schema = self._config.nodes[cur_node].input_schema
-        return list(input_schema.keys())
+        return list(self._workflow.upstreams[cur_node])
 
     def has_input_message_in_current_upstreams(self) -> bool:
         return INTERNAL_UPSTREAM_INPUT_MESSAGE in self.get_current_upstreams()
 
     def get_node_downstreams(self, node: str) -> list[str]:
         """Returns the downstream nodes for a given node."""
-        downstreams = {
-            k for k, v in self._config.nodes.items() if node in v.input_schema
-        }
-        return list(downstreams)
+        return list(self._workflow.downstreams.get(node, []))
 
     def update_running_state(self, context: dict[str, Any]):
         """Updates the running state with the provided context."""
@@ -92,11 +91,29 @@ class WorkflowRunner:
             elif upstream == INTERNAL_UPSTREAM_HISTORY_MESSAGES:
                 pass
 
-    def run(self, message_text: str) -> WorkflowNodeOutput:
-        self.process_workflow_upstream_input(message_text)
+    def is_node_done(self, node: str) -> bool:
+        output = self._ic.output.get(node)
+        return output is not None and output.status in _DONE_STATUSES
+
+    def needs_input_message(self, node: str) -> bool:
+        return INTERNAL_UPSTREAM_INPUT_MESSAGE in self._workflow.upstreams[node]
+
+    def get_ready_nodes(self) -> list[str]:
+        """Returns the nodes not done yet whose upstream nodes are all done, in config order."""
+        return [
+            node
+            for node, upstreams in self._workflow.upstreams.items()
+            if not self.is_node_done(node)
+            and all(
+                upstream not in self._workflow.upstreams or self.is_node_done(upstream)
+                for upstream in upstreams
+            )
+        ]
 
-        cur_node = self.get_current_node()
-        events = self._graph.stream(self._ic, stream_mode="values")
+    def _run_node(self, ic: WorkflowInvocationState) -> tuple[Any, WorkflowNodeOutput]:
+        """Runs the graph from ic.current_node, returns its output state and output."""
+        node = ic.current_node
+        events = self._graph.stream(ic, stream_mode="values")
         for event in events:
             last_event = event
 
@@ -106,12 +123,22 @@ class WorkflowRunner:
             running_state=last_event["running_state"],
             output=last_event["output"],
         )
-        output_state = last_state.running_state[cur_node]
-        node_output: WorkflowNodeOutput = last_state.output[cur_node]
+        return last_state.running_state[node], last_state.output[node]
+
+    def _record_node_output(
+        self, node: str, output_state: Any, node_output: WorkflowNodeOutput
+    ) -> None:
+        self._ic.running_state[node] = output_state
+        self._ic.output[node] = node_output
+
+    def run(self, message_text: str) -> WorkflowNodeOutput:
+        self.process_workflow_upstream_input(message_text)
+
+        cur_node = self.get_current_node()
+        output_state, node_output = self._run_node(self._ic)
 
         # update state
-        self._ic.running_state[cur_node] = output_state
-        self._ic.output[cur_node] = node_output
+        self._record_node_output(cur_node, output_state, node_output)
         if (
             node_output.status == "SUCCESS"
             or node_output.status == "LOOP_MESSAGE_CHECK_PASSED"
@@ -128,3 +155,69 @@ class WorkflowRunner:
 
         self.append_history_message(message_text, node_output.message)
         return node_output
+
+    def run_parallel(
+        self, message_text: str, executor: Executor
+    ) -> list[WorkflowNodeOutput]:
+        """
+        Runs the current node together with every other ready node that takes no input
+        message, concurrently on the executor, then the nodes they unblock, until the
+        workflow ends, a node fails its validation or the ready nodes wait for the
+        next input message. Independent nodes finish in max instead of sum of their
+        latencies.
+
+        Returns the outputs of the nodes run, in config order within each batch.
+        """
+        self.process_workflow_upstream_input(message_text)
+
+        cur_node = self.get_current_node()
+        batch = [cur_node] + [
+            node
+            for node in self.get_ready_nodes()
+            if node != cur_node and not self.needs_input_message(node)
+        ]
+        node_outputs: list[WorkflowNodeOutput] = []
+        while batch:
+            # Each node runs on its own copy of the state, merged back once done
+            ics = [
+                WorkflowInvocationState(
+                    current_node=node,
+                    running_state=dict(self._ic.running_state),
+                    output=dict(self._ic.output),
+                )
+                for node in batch
+            ]
+            if len(ics) == 1:
+                results = [self._run_node(ics[0])]
+            else:
+                futures = [executor.submit(self._run_node, ic) for ic in ics]
+                results = [future.result() for future in futures]
+            logger.debug("run nodes", nodes=batch)
+
+            failed_node = None
+            for node, (output_state, node_output) in zip(batch, results):
+                self._record_node_output(node, output_state, node_output)
+                self.append_history_message(message_text, node_output.message)
+                node_outputs.append(node_output)
+                if failed_node is None and not self.is_node_done(node):
+                    failed_node = node
+            if failed_node is not None:
+                # Retried with the next input message
+                self._ic.current_node = failed_node
+                return node_outputs
+            if self.is_node_done(self._config.end):
+                break
+            batch = [
+                node
+                for node in self.get_ready_nodes()
+                if not self.needs_input_message(node)
+            ]
+
+        ready_nodes = self.get_ready_nodes()
+        if self.is_node_done(self._config.end) or not ready_nodes:
+            self._ic.current_node = _END
+            logger.debug("move to END")
+        else:
+            self._ic.current_node = ready_nodes[0]
+            logger.debug("move to next", next_downstream=ready_nodes[0])
+        return node_outputs
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fluctlight.agents.prompt_bank as prompt_bank
+from fluctlight.logger import get_logger
+from fluctlight.open.chat import simple_assistant
+from fluctlight.settings import CHAT_HISTORY_SUMMARY_MODEL
+from fluctlight.utt.state_store import ConversationStateStore
+
+logger = get_logger(__name__)
+
+
+class HistoryCompactor:
+    """
+    Fold the old turns of a thread into a rolling summary with a cheap model.
+
+    Summarization runs in a background thread, off the reply's critical path, and
+    the summaries of one thread are updated in order. Until a summary is ready the
+    thread is replied with the previous one. With persist the summaries are kept in
+    the STATE_BACKEND next to the history, see ConversationStateStore.
+    """
+
+    def __init__(
+        self,
+        model_key: str = CHAT_HISTORY_SUMMARY_MODEL,
+        max_workers: int = 2,
+        persist: bool = False,
+    ) -> None:
+        self.model_key = model_key
+        self.summaries: ConversationStateStore[str] = ConversationStateStore(
+            "chat_summary", persist=persist
+        )
+        self._backlog: dict[str, list[str]] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="history-compact"
+        )
+
+    def get_summary(self, thread_id: str) -> str | None:
+        return self.summaries.get(thread_id)
+
+    def submit(self, thread_id: str, turns: list[str]) -> None:
+        """Queue formatted turns, e.g. '[user]: hi', to fold into the thread summary."""
+        if not turns:
+            return
+        with self._lock:
+            self._backlog.setdefault(thread_id, []).extend(turns)
+            if thread_id in self._running:
+                return
+            self._running.add(thread_id)
+        self._executor.submit(self._run, thread_id)
+
+    def forget(self, thread_id: str) -> None:
+        with self._lock:
+            self.summaries.pop(thread_id, None)
+            self._backlog.pop(thread_id, None)
+            self._running.discard(thread_id)
+            self._idle.notify_all()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for the queued summarization, returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._running, timeout=timeout)
+
+    def summarize(self, summary: str | None, turns: list[str]) -> str:
+        return simple_assistant(
+            prompt=prompt_bank.HISTORY_SUMMARY.format(
+                summary=summary or "(empty)", turns="\n".join(turns)
+            ),
+            model_key=self.model_key,
+        )
+
+    def _run(self, thread_id: str) -> None:
+        while True:
+            with self._lock:
+                turns = self._backlog.pop(thread_id, None)
+                if not turns or thread_id not in self._running:
+                    self._running.discard(thread_id)
+                    self._idle.notify_all()
+                    return
+                summary = self.summaries.get(thread_id)
+            try:
+                summary = self.summarize(summary, turns)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(
+                    "Fail to summarize history", thread_id=thread_id, err=str(e)
+                )
+                continue
+            with self._lock:
+                # Skip a thread forgotten while it was summarized
+                if thread_id in self._running:
+                    self.summaries[thread_id] = summary
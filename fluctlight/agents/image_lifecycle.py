@@ -0,0 +1,179 @@
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel
+
+from fluctlight.data_model.interface.common import IdType
+from fluctlight.logger import get_logger
+from fluctlight.open.chat import chat_complete, get_message_from_completion
+from fluctlight.settings import (
+    CHAT_IMAGE_CAPTION_ENABLED,
+    CHAT_IMAGE_CAPTION_MODEL,
+    CHAT_IMAGE_REINCLUDE_LIMIT,
+)
+from fluctlight.utt.attachment_cache import (
+    CAPTION,
+    attachment_key,
+    get_attachment_cache,
+)
+
+logger = get_logger(__name__)
+
+_CAPTION_PROMPT = "Describe this image in one or two sentences, include any text in it."
+_IMAGE_MENTION_RE = re.compile(
+    r"\b(image|images|picture|pictures|pic|photo|photos|screenshot|diagram|chart)\b",
+    re.IGNORECASE,
+)
+# Images remembered per thread for re-inclusion
+_MAX_IMAGES_PER_THREAD = 20
+# Inline image of a history restored from the STATE_BACKEND, its reference is lost
+_UNKNOWN_IMAGE_PLACEHOLDER = {"type": "text", "text": "[image: attached earlier]"}
+
+
+def is_inline_image_part(part: Any) -> bool:
+    return (
+        isinstance(part, dict)
+        and part.get("type") == "image_url"
+        and part["image_url"]["url"].startswith("data:")
+    )
+
+
+def _data_url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def refers_to_image(text: str) -> bool:
+    """
+    Examples:
+    - 'what color is the car in the photo?' -> True
+    - 'thanks!' -> False
+    """
+    return _IMAGE_MENTION_RE.search(text) is not None
+
+
+class ImageReference(BaseModel):
+    attachment_id: IdType
+    url: str
+    caption: str | None = None
+
+    def to_placeholder(self) -> dict[str, Any]:
+        description = self.caption or "attached earlier"
+        return {"type": "text", "text": f"[image {self.attachment_id}: {description}]"}
+
+
+class ImageLifecycle:
+    """
+    Attachment lifecycle policy of the inline base64 images in a chat history.
+
+    An image is sent inline on its turn only, afterwards every inline (data: URL)
+    image of the history is replaced by a lightweight reference with its vision
+    caption, captioned by a cheap model in background. The parts are matched by
+    content, a history restored from the STATE_BACKEND is retired too, with a generic
+    placeholder when the reference is no longer known. When the user refers back to an image, the latest ones are downloaded
+    and sent again for that turn.
+    """
+
+    def __init__(
+        self,
+        caption_model_key: str = CHAT_IMAGE_CAPTION_MODEL,
+        caption: bool = CHAT_IMAGE_CAPTION_ENABLED,
+        reinclude_limit: int = CHAT_IMAGE_REINCLUDE_LIMIT,
+        max_workers: int = 2,
+    ) -> None:
+        self.caption_model_key = caption_model_key
+        self.reinclude_limit = reinclude_limit
+        self.images: dict[str, list[ImageReference]] = {}
+        # Reference of the inline image parts by hash of their data URL, by thread
+        self._inline: dict[str, dict[str, ImageReference]] = {}
+        self._lock = threading.Lock()
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="image-caption"
+            )
+            if caption
+            else None
+        )
+
+    def track(
+        self, thread_id: str, reference: ImageReference, image_part: dict[str, Any]
+    ) -> None:
+        """Track an inline image part sent on the thread's current turn."""
+        with self._lock:
+            inline = self._inline.setdefault(thread_id, {})
+            inline[_data_url_key(image_part["image_url"]["url"])] = reference
+            while len(inline) > _MAX_IMAGES_PER_THREAD:
+                del inline[next(iter(inline))]
+            images = self.images.setdefault(thread_id, [])
+            if not any(image is reference for image in images):
+                images.append(reference)
+                del images[:-_MAX_IMAGES_PER_THREAD]
+        if self._executor and reference.caption is None:
+            self._executor.submit(
+                self._caption, reference, image_part["image_url"]["url"]
+            )
+
+    def retire(self, thread_id: str, messages: list[dict[str, Any]]) -> None:
+        """Replace every inline image in messages by its reference placeholder."""
+        with self._lock:
+            inline = dict(self._inline.get(thread_id, {}))
+        for message in messages:
+            content = message["content"]
+            if not isinstance(content, list):
+                continue
+            for idx, part in enumerate(content):
+                if not is_inline_image_part(part):
+                    continue
+                reference = inline.get(_data_url_key(part["image_url"]["url"]))
+                content[idx] = (
+                    reference.to_placeholder()
+                    if reference
+                    else dict(_UNKNOWN_IMAGE_PLACEHOLDER)
+                )
+
+    def select_reinclusion(self, thread_id: str, text: str) -> list[ImageReference]:
+        """The latest images of the thread to send again when the text refers to them."""
+        if self.reinclude_limit <= 0 or not refers_to_image(text):
+            return []
+        with self._lock:
+            return self.images.get(thread_id, [])[-self.reinclude_limit :]
+
+    def forget(self, thread_id: str) -> None:
+        with self._lock:
+            self.images.pop(thread_id, None)
+            self._inline.pop(thread_id, None)
+
+    def _caption(self, reference: ImageReference, image_url: str) -> None:
+        cache = get_attachment_cache()
+        cache_key = attachment_key(reference.attachment_id)
+        if cache:
+            reference.caption = cache.get_artifact(cache_key, CAPTION)
+            if reference.caption is not None:
+                return
+        try:
+            response = chat_complete(
+                model_key=self.caption_model_key,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": _CAPTION_PROMPT},
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": image_url, "detail": "low"},
+                            },
+                        ],
+                    }
+                ],
+            )
+            reference.caption = get_message_from_completion(response)
+            if cache:
+                cache.set_artifact(cache_key, CAPTION, reference.caption)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(
+                "Fail to caption image",
+                attachment_id=reference.attachment_id,
+                err=str(e),
+            )
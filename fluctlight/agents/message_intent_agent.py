@@ -1,3 +1,4 @@
+import asyncio
 from abc import abstractmethod
 from typing import Any
 
@@ -18,6 +19,7 @@ class MessageIntentAgent(Task, IntentAgent):
         __init__(): Constructs a new instance of MessageIntentAgent.
         process(*args: Any, **kwds: Any) -> Any: Executes the main logic to handle a message event.
         process_message(message: CoreMessage) -> list[str]: An abstract method that must be overridden to define how a message event is processed.
+        aprocess_message(message: CoreMessage) -> list[str]: Async version of process_message, run process_message in a worker thread unless overridden.
         should_process(*args: Any, **kwds: Any) -> bool: Evaluates whether the specified intent requires processing based on the arguments provided.
 
     Properties:
@@ -40,12 +42,32 @@ class MessageIntentAgent(Task, IntentAgent):
         logger.debug("agent process messult result", agent=self.name, msg=msgs)
         return msgs
 
+    async def aprocess(self, *args: Any, **kwds: Any) -> Any:
+        message: IMessage = self._require_input(
+            kwargs=kwds, key="message", value_type=IMessage
+        )
+        message_intent: MessageIntent = self._require_input(
+            kwargs=kwds, key="message_intent", value_type=MessageIntent
+        )
+        msgs = await self.aprocess_message(
+            message=message, message_intent=message_intent
+        )
+        logger.debug("agent aprocess messult result", agent=self.name, msg=msgs)
+        return msgs
+
     @abstractmethod
     def process_message(
         self, message: IMessage, message_intent: MessageIntent
     ) -> list[str]:
         pass
 
+    async def aprocess_message(
+        self, message: IMessage, message_intent: MessageIntent
+    ) -> list[str]:
+        return await asyncio.to_thread(
+            self.process_message, message=message, message_intent=message_intent
+        )
+
     def should_process(self, *args: Any, **kwds: Any) -> bool:  # pylint: disable=unused-argument
         message_intent: MessageIntent = self._require_input(
             kwargs=kwds, key="message_intent", value_type=MessageIntent
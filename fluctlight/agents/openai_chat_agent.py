@@ -1,7 +1,14 @@
-from collections import OrderedDict
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Callable
 
+from openai.types.chat.chat_completion import ChatCompletion
+
 import fluctlight.agents.prompt_bank as prompt_bank
+from fluctlight.agents.history_compactor import HistoryCompactor
+from fluctlight.agents.image_lifecycle import ImageLifecycle, ImageReference
 from fluctlight.agents.message_intent_agent import MessageIntentAgent
 from fluctlight.audio.speech_to_text import get_speech_to_text
 from fluctlight.data_model.interface import IAttachment, IMessage
@@ -15,15 +22,27 @@ from fluctlight.open.utils import (
     vision_support_model,
 )
 from fluctlight.settings import (
+    ATTACHMENT_MAX_WORKERS,
+    ATTACHMENT_TIMEOUT_SEC,
+    CHAT_HISTORY_SUMMARY_BATCH,
+    CHAT_HISTORY_SUMMARY_ENABLED,
+    CHAT_HISTORY_TOKEN_BUDGET,
     GPT_CHAT_MODEL,
     GPT_REASON_MODEL,
     GPT_VISION_MODEL,
     SLACK_APP_OAUTH_TOKENS_FOR_WS,
     is_slack_bot,
 )
-from fluctlight.utt.files import base64_encode_media, download_media
-from fluctlight.open.chat import chat_complete
+from fluctlight.utt.attachment_cache import (
+    TRANSCRIPT,
+    attachment_key,
+    get_attachment_cache,
+)
+from fluctlight.utt.files import base64_encode_image, download_media
+from fluctlight.utt.state_store import ConversationStateStore
+from fluctlight.open.chat import achat_complete, chat_complete
 from fluctlight.open.think_format_util import extract_think_message
+from fluctlight.open.tokens import fit_to_token_budget
 from fluctlight.search.client import SerpApiClient
 
 logger = get_logger(__name__)
@@ -36,8 +55,14 @@ INTENT_KEY = "CHAT"
 class OpenAiChatAgent(MessageIntentAgent):
     """
     A Chat Agent using Open chat.completion API.
-    Conversation is kept with message_buffer keyed by thread_id, with a max buffer limit of 100
-    converation(respect to LRU).
+    Conversation is kept with message_buffer keyed by thread_id, with a max buffer limit of
+    buffer_limit conversations, evicted LRU, see ConversationStateStore.
+    Each thread keeps the system prompt plus the most recent turns within history_token_budget
+    tokens, older turns are dropped. With summarize_history they are collected in dropped_turns,
+    bounded like the buffer, and folded into a rolling summary in background once summary_batch
+    of them are collected. The summary and the dropped turns are persisted with the history,
+    a thread evicted from memory is reloaded with them.
+    Inline images are only sent on their turn, see ImageLifecycle.
     """
 
     def __init__(
@@ -48,10 +73,40 @@ class OpenAiChatAgent(MessageIntentAgent):
         reason_model_id: str = GPT_REASON_MODEL,
         vision_model_id: str = GPT_VISION_MODEL,
         intent_key: str = INTENT_KEY,
+        history_token_budget: int = CHAT_HISTORY_TOKEN_BUDGET,
+        summarize_history: bool = CHAT_HISTORY_SUMMARY_ENABLED,
+        summary_batch: int = CHAT_HISTORY_SUMMARY_BATCH,
+        attachment_max_workers: int = ATTACHMENT_MAX_WORKERS,
+        attachment_timeout_sec: float = ATTACHMENT_TIMEOUT_SEC,
     ) -> None:
         super().__init__(intent=create_intent(intent_key))
-        self.message_buffer = OrderedDict()
+        self.message_buffer: ConversationStateStore[list[dict[str, Any]]] = (
+            ConversationStateStore(
+                "chat_history",
+                max_entries=buffer_limit,
+                on_evict=self._on_evict_thread,
+                persist=True,
+            )
+        )
         self.buffer_limit = buffer_limit
+        self.history_token_budget = history_token_budget
+        self.history_compactor = (
+            HistoryCompactor(persist=True) if summarize_history else None
+        )
+        # Dropped turns waiting to be summarized, only kept for the compactor
+        self.dropped_turns: ConversationStateStore[list[dict[str, Any]]] | None = (
+            ConversationStateStore(
+                "chat_dropped_turns", max_entries=buffer_limit, persist=True
+            )
+            if self.history_compactor
+            else None
+        )
+        self.summary_batch = summary_batch
+        self.image_lifecycle = ImageLifecycle()
+        self.attachment_timeout_sec = attachment_timeout_sec
+        self._attachment_executor = ThreadPoolExecutor(
+            max_workers=attachment_max_workers, thread_name_prefix="attachment"
+        )
         self.transcribe_slack_audio = transcribe_slack_audio
         self.speech_to_text = get_speech_to_text()
         self.bearer_token = SLACK_APP_OAUTH_TOKENS_FOR_WS if is_slack_bot() else None
@@ -85,12 +140,43 @@ class OpenAiChatAgent(MessageIntentAgent):
         and generates a response from the AI. It maintains a conversation history
         for each unique thread identified by `thread_id`.
         """
+        content_from_files, skipped = self._collect_content(message)
+        thread_id, model_id = self._append_user_turn(
+            message, message_intent, content_from_files
+        )
+        response = chat_complete(
+            messages=self._get_prompt_messages(thread_id, model_id), model_key=model_id
+        )
+        return self._append_assistant_turn(thread_id, response) + skipped
+
+    async def aprocess_message(
+        self, message: IMessage, message_intent: MessageIntent
+    ) -> list[str]:
+        """Async version of process_message, the completion is awaited on the event loop."""
+        content_from_files, skipped = await asyncio.to_thread(
+            self._collect_content, message
+        )
+        thread_id, model_id = self._append_user_turn(
+            message, message_intent, content_from_files
+        )
+        response = await achat_complete(
+            messages=self._get_prompt_messages(thread_id, model_id), model_key=model_id
+        )
+        return self._append_assistant_turn(thread_id, response) + skipped
+
+    def _append_user_turn(
+        self,
+        message: IMessage,
+        message_intent: MessageIntent,
+        content_from_files: list[dict],
+    ) -> tuple[str, str]:
+        """Append the user turn to the thread buffer, returns (thread_id, model_id)."""
         thread_id = message.thread_message_id
         model_id = self.reason_model_id if message_intent.reason else self.chat_model_id
 
-        # Move the accessed thread_id to the end to mark it as recently used
         if thread_id in self.message_buffer:
-            self.message_buffer.move_to_end(thread_id)
+            # The images of the previous turns are not sent again
+            self.image_lifecycle.retire(thread_id, self.message_buffer[thread_id])
         else:
             self.message_buffer[thread_id] = []
             if not is_o_series_model(model_id):
@@ -100,14 +186,9 @@ class OpenAiChatAgent(MessageIntentAgent):
                         "content": prompt_bank.CONVERSATION_BOT_1,
                     }
                 )
-        # If the buffer exceeds limit items, remove the oldest one
-        if len(self.message_buffer) > self.buffer_limit:
-            self.message_buffer.popitem(last=False)
 
         content = [{"type": "text", "text": message.text}]
-        if message.has_attachments:
-            content_from_files = self.process_files(message)
-            content.extend(content_from_files)
+        content.extend(content_from_files)
 
         self.message_buffer[thread_id].append(
             {
@@ -118,10 +199,68 @@ class OpenAiChatAgent(MessageIntentAgent):
 
         if self.has_image_in_content(content) and not vision_support_model(model_id):
             model_id = self.vision_model_id
+        self._fit_history(thread_id, model_id)
+        self.message_buffer.touch(thread_id)
+        return thread_id, model_id
 
-        response = chat_complete(
-            messages=self.message_buffer[thread_id].copy(), model_key=model_id
+    def _on_evict_thread(self, thread_id: str, _: list[dict[str, Any]]) -> None:
+        self.image_lifecycle.forget(thread_id)
+        if self.message_buffer.persistent:
+            # Loaded back from the backend on the next message, with its summary
+            return
+        if self.history_compactor:
+            self.dropped_turns.pop(thread_id, None)
+            self.history_compactor.forget(thread_id)
+
+    def _fit_history(self, thread_id: str, model_id: str) -> None:
+        """Trim the thread to the token budget, the dropped turns are kept for the summary."""
+        if self.history_token_budget <= 0:
+            return
+        kept, dropped = fit_to_token_budget(
+            self.message_buffer[thread_id], self.history_token_budget, model_id
+        )
+        if dropped:
+            logger.info("Drop history turns", thread_id=thread_id, count=len(dropped))
+            self.message_buffer[thread_id] = kept
+        if not self.history_compactor:
+            return
+        pending = self.dropped_turns.get(thread_id, []) + dropped
+        if len(pending) >= self.summary_batch:
+            self.dropped_turns.pop(thread_id, None)
+            self.history_compactor.submit(thread_id, self._format_buffer(pending))
+        elif dropped:
+            self.dropped_turns[thread_id] = pending
+
+    def _get_prompt_messages(self, thread_id: str, model_id: str) -> list[dict]:
+        """The thread messages, with the summary of the dropped turns after the system prompt."""
+        messages = self.message_buffer[thread_id].copy()
+        summary = (
+            self.history_compactor.get_summary(thread_id)
+            if self.history_compactor
+            else None
         )
+        if summary:
+            idx = 0
+            while idx < len(messages) and messages[idx]["role"] in (
+                "system",
+                "developer",
+            ):
+                idx += 1
+            messages.insert(
+                idx,
+                {
+                    # O series model doesn't support system/developer role message
+                    "role": "user"
+                    if is_o_series_model(model_id)
+                    else self.get_system_role(model_id),
+                    "content": f"Summary of the earlier conversation:\n{summary}",
+                },
+            )
+        return messages
+
+    def _append_assistant_turn(
+        self, thread_id: str, response: ChatCompletion
+    ) -> list[str]:
         logger.info("response", response=response)
         output_text = get_message_from_completion(response)
         self.message_buffer[thread_id].append(
@@ -130,6 +269,7 @@ class OpenAiChatAgent(MessageIntentAgent):
                 "content": output_text,
             }
         )
+        self.message_buffer.touch(thread_id)
         return extract_think_message(output_text)
 
     def has_image_in_content(self, content: list[dict[str, Any]]) -> bool:
@@ -138,43 +278,167 @@ class OpenAiChatAgent(MessageIntentAgent):
                 return True
         return False
 
-    def process_files(self, message: IMessage) -> list[dict]:
+    def _collect_content(self, message: IMessage) -> tuple[list[dict], list[str]]:
+        """
+        Content from the attachments, plus the earlier images the text refers back to,
+        and a note to the user naming the skipped attachments if any.
+        """
+        content, skipped = (
+            self.process_files(message) if message.has_attachments else ([], [])
+        )
+        if not self.has_image_in_content(content):
+            thread_id = message.thread_message_id
+            for reference in self.image_lifecycle.select_reinclusion(
+                thread_id, message.text
+            ):
+                image_part = self._image_part(
+                    reference.url, attachment_key(reference.attachment_id)
+                )
+                self.image_lifecycle.track(thread_id, reference, image_part)
+                content.append(image_part)
+        if not skipped:
+            return content, []
+        return content, [f"Skipped attachments: {', '.join(skipped)}"]
+
+    def _image_part(self, url: str, cache_key: str) -> dict:
+        base64_image, mime_type = base64_encode_image(
+            url,
+            bearer_token=self.bearer_token,
+            timeout=self.attachment_timeout_sec,
+            cache_key=cache_key,
+        )
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime_type};base64,{base64_image}",
+                "detail": "low",
+            },
+        }
+
+    def process_files(self, message: IMessage) -> tuple[list[dict], list[str]]:
         """
         Process data by examining each file and determining its type.
+
+        Attachments are downloaded and transcribed in parallel, each within
+        attachment_timeout_sec from when a worker picks it up, the downloads are
+        aborted by then too so a worker is not held by a hung server. The batch is
+        capped at attachment_timeout_sec per attachment, the attachments still queued
+        by then are skipped. The content keeps the order of the attachments, an
+        attachment failing, too large or timed out is replaced by a note.
+        Returns the content and the skipped attachments, e.g. 'a.mp3 (timed out)'.
         """
-        data = []
         assert message.attachments, "message_event.files can not be None"
-        for attachment in message.attachments:
-            if self._accept_vision_content_type(attachment):
-                base64_image = base64_encode_media(
-                    attachment.url, bearer_token=self.bearer_token
-                )
-                data.append(
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "low",
-                        },
-                    }
-                )
-            elif self._accept_slack_audio(attachment):
-                data.append(
-                    {
-                        "type": "text",
-                        "text": self.transcribe_slack_audio(
-                            channel=message.channel.id, timestamp=message.ts
-                        ),
-                    }
-                )
-            elif self._accept_audio_content_type(attachment):
+        started: dict[int, float] = {}
+        changed = threading.Condition()
+
+        def process(index: int, attachment: IAttachment) -> dict | None:
+            with changed:
+                started[index] = time.monotonic()
+            return self._process_attachment(message, attachment)
+
+        def notify(_: Future) -> None:
+            with changed:
+                changed.notify_all()
+
+        queue_deadline = time.monotonic() + self.attachment_timeout_sec * len(
+            message.attachments
+        )
+        pending: dict[int, Future] = {}
+        for index, attachment in enumerate(message.attachments):
+            pending[index] = self._attachment_executor.submit(
+                process, index, attachment
+            )
+            pending[index].add_done_callback(notify)
+
+        items: dict[int, dict | None] = {}
+        skipped: dict[int, str] = {}
+        with changed:
+            while pending:
+                now = time.monotonic()
+                next_deadline = None
+                for index, future in list(pending.items()):
+                    attachment = message.attachments[index]
+                    if future.done():
+                        del pending[index]
+                        try:
+                            items[index] = future.result()
+                        except Exception as e:  # pylint: disable=broad-except
+                            logger.warning(
+                                "Fail to process attachment",
+                                attachment_id=attachment.id,
+                                err=repr(e),
+                            )
+                            skipped[index] = "could not be processed"
+                        continue
+                    if index not in started and now >= queue_deadline:
+                        if future.cancel():
+                            del pending[index]
+                            logger.warning(
+                                "Attachment not started in time",
+                                attachment_id=attachment.id,
+                            )
+                            skipped[index] = "not started in time"
+                            continue
+                        # Picked up by a worker meanwhile, timed from now on
+                        started[index] = now
+                    if index in started:
+                        deadline = started[index] + self.attachment_timeout_sec
+                    else:
+                        deadline = queue_deadline
+                    if now >= deadline:
+                        # Left running, its downloads give up by then too
+                        del pending[index]
+                        logger.warning(
+                            "Attachment timed out", attachment_id=attachment.id
+                        )
+                        skipped[index] = "timed out"
+                    elif next_deadline is None or deadline < next_deadline:
+                        next_deadline = deadline
+                if pending:
+                    # Woken up when an attachment is done, a worker may then pick up
+                    # the next one
+                    changed.wait(next_deadline - now)
+
+        data = []
+        for index, attachment in enumerate(message.attachments):
+            if index in skipped:
                 data.append(
                     {
                         "type": "text",
-                        "text": self._transcribe_audio(attachment),
+                        "text": f"[attachment {attachment.filename} {skipped[index]}]",
                     }
                 )
-        return data
+            elif items[index]:
+                data.append(items[index])
+        return data, [
+            f"{message.attachments[index].filename} ({reason})"
+            for index, reason in sorted(skipped.items())
+        ]
+
+    def _process_attachment(
+        self, message: IMessage, attachment: IAttachment
+    ) -> dict | None:
+        if self._accept_vision_content_type(attachment):
+            image_part = self._image_part(attachment.url, attachment_key(attachment.id))
+            self.image_lifecycle.track(
+                message.thread_message_id,
+                ImageReference(attachment_id=attachment.id, url=attachment.url),
+                image_part,
+            )
+            return image_part
+        if self._accept_slack_audio(attachment):
+            return {
+                "type": "text",
+                "text": self.transcribe_slack_audio(
+                    channel=message.channel.id, timestamp=message.ts
+                ),
+            }
+        if self._accept_audio_content_type(attachment):
+            return {
+                "type": "text",
+                "text": self._transcribe_audio(attachment),
+            }
+        return None
 
     def _accept_vision_content_type(self, attachment: IAttachment) -> bool:
         return attachment.content_type in VISION_INPUT_SUPPORT_TYPE
@@ -194,9 +458,23 @@ class OpenAiChatAgent(MessageIntentAgent):
 
     def _transcribe_audio(self, attachment: IAttachment) -> str:
         logger.info("attachment for transcribe", attachment=attachment)
-        media = download_media(attachment.url, bearer_token=self.bearer_token)
+        cache = get_attachment_cache()
+        cache_key = attachment_key(attachment.id)
+        if cache:
+            transcript = cache.get_artifact(cache_key, TRANSCRIPT)
+            if transcript is not None:
+                return transcript
+        media = download_media(
+            attachment.url,
+            bearer_token=self.bearer_token,
+            timeout=self.attachment_timeout_sec,
+            cache_key=cache_key,
+        )
         logger.info("medata", media_type=type(media), lenn=len(media))
-        return self.speech_to_text.transcribe(audio_bytes=media)
+        transcript = self.speech_to_text.transcribe(audio_bytes=media)
+        if cache:
+            cache.set_artifact(cache_key, TRANSCRIPT, transcript)
+        return transcript
 
     def _format_buffer(self, buffer: list[dict[str, Any]]) -> list[str]:
         output = []
@@ -206,7 +484,7 @@ class OpenAiChatAgent(MessageIntentAgent):
             elif isinstance(item["content"], list):
                 for content_item in item["content"]:
                     if content_item["type"] == "text":
-                        output.append(f']{item["role"]}]: {content_item["text"]}')
+                        output.append(f'[{item["role"]}]: {content_item["text"]}')
                     elif content_item["type"] == "image_url":
                         output.append(f'[{item["role"]}]: attach an image')
         return output
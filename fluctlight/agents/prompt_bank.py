@@ -3,3 +3,15 @@ from fluctlight.settings import BOT_NAME
 CONVERSATION_BOT_1 = f"""
 You are {BOT_NAME} a helpful assistant bot.
 """
+
+HISTORY_SUMMARY = """
+Update the running summary of a conversation with its newer turns below.
+Keep the facts, names, decisions, open questions and user preferences, drop the small talk.
+Answer with the updated summary only, in under 200 words.
+
+Current summary:
+{summary}
+
+Newer turns:
+{turns}
+"""
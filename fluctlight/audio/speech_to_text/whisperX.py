@@ -1,13 +1,14 @@
 import json
 import os
 
-import requests
+import httpx
 
 from fluctlight.audio.speech_to_text.base import SpeechToText
 from fluctlight.audio.speech_to_text.data_model import (
     WhisperXResponse,
 )
 from fluctlight.logger import get_logger
+from fluctlight.utt.http import get_http_pool
 from fluctlight.utt.singleton import Singleton
 from fluctlight.utt.timed import timed
 
@@ -77,11 +78,14 @@ class WhisperX(Singleton, SpeechToText):
             logger.info(
                 f"Sent request to whisperX server {url}: {len(audio_bytes)} bytes"
             )
-            response = requests.post(url, data=data, files=files)
+            pool = get_http_pool()
+            response = pool.request(
+                "POST", url, data=data, files=files, timeout=pool.media_timeout
+            )
             return WhisperXResponse(**response.json())
-        except requests.exceptions.Timeout as e:
+        except httpx.TimeoutException as e:
             logger.error(f"WhisperX server {url} timed out: {e}")
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Could not connect to whisperX server {url}: {e}")
         except KeyError as e:
             logger.error(f"Could not parse response from whisperX server {url}: {e}")
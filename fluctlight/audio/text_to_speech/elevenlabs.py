@@ -8,6 +8,7 @@ from fastapi import WebSocket
 from fluctlight.audio.text_to_speech.base import LANG_US, TextToSpeech
 from fluctlight.logger import get_logger
 from fluctlight.settings import ELEVEN_LABS_API_KEY
+from fluctlight.utt.http import get_http_pool
 from fluctlight.utt.singleton import Singleton
 from fluctlight.utt.timed import timed
 
@@ -68,8 +69,9 @@ class ElevenLabs(Singleton, TextToSpeech):
         )
         if first_sentence:
             url += "&optimize_streaming_latency=4"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers)
+        async with get_http_pool().astream(
+            "POST", url, json=data, headers=headers
+        ) as response:
             if response.status_code != 200:
                 logger.error(f"ElevenLabs returns response {response.status_code}")
             async for chunk in response.aiter_bytes():
@@ -118,16 +120,15 @@ class ElevenLabs(Singleton, TextToSpeech):
         }
         # Change to non-streaming endpoint
         url = config.url.format(voice_id=voice_id).replace("/stream", "")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url, json=data, headers=headers, timeout=DEFAULT_TIMEOUT_SEC
+        response = await get_http_pool().arequest(
+            "POST", url, json=data, headers=headers, timeout=DEFAULT_TIMEOUT_SEC
+        )
+        if response.status_code != 200:
+            logger.error("ElevenLabs returns response not OK", response=response)
+            raise httpx.NetworkError(
+                f"ElevenLabs call fail, code={response.status_code}"
             )
-            if response.status_code != 200:
-                logger.error("ElevenLabs returns response not OK", response=response)
-                raise httpx.NetworkError(
-                    f"ElevenLabs call fail, code={response.status_code}"
-                )
-            # Get audio/mpeg from the response and return it
-            else:
-                logger.info("ElevenLabs returns response OK", response=response)
-            return response.content
+        # Get audio/mpeg from the response and return it
+        else:
+            logger.info("ElevenLabs returns response OK", response=response)
+        return response.content
@@ -1,13 +1,13 @@
 import asyncio
 import base64
 
-import requests
 from fastapi import WebSocket
 
 from fluctlight.audio.text_to_speech.base import TextToSpeech
 from fluctlight.audio.text_to_speech.utils import MP3ToUlaw
 from fluctlight.logger import get_logger
 from fluctlight.settings import XTTS_API_KEY, XTTS_API_URL
+from fluctlight.utt.http import get_http_pool
 from fluctlight.utt.singleton import Singleton
 from fluctlight.utt.timed import timed
 
@@ -50,11 +50,11 @@ class XTTS(Singleton, TextToSpeech):
             "stream": first_sentence,
             "priority": priority,
         }
-        with requests.post(
-            XTTS_API_URL, json=data, headers=headers, stream=True
+        async with get_http_pool().astream(
+            "POST", XTTS_API_URL, json=data, headers=headers
         ) as response:
             response.raise_for_status()
-            for chunk in response.iter_content(chunk_size=None):
+            async for chunk in response.aiter_bytes():
                 if not chunk:
                     continue
                 if tts_event.is_set():
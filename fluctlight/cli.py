@@ -20,3 +20,59 @@ def start() -> None:
 
     logger.debug("Debug log is on[if you see this]")
     start_server()
+
+
+@main.command()
+@click.option(
+    "--examples",
+    "examples_path",
+    default=None,
+    help="JSONL of the logged intent examples, INTENT_EXAMPLES_PATH by default.",
+)
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="Where to save the classifier, INTENT_CLASSIFIER_PATH by default.",
+)
+@click.option("--epochs", default=20, show_default=True)
+@click.option(
+    "--min-examples",
+    default=5,
+    show_default=True,
+    help="Intents with fewer examples are left to the LLM.",
+)
+def train_intent_classifier(
+    examples_path: str | None, output_path: str | None, epochs: int, min_examples: int
+) -> None:
+    """Train the local intent classifier on the LLM matched examples."""
+    from collections import Counter
+
+    from fluctlight.intent.local_classifier import (
+        read_intent_examples,
+        train_local_intent_classifier,
+    )
+    from fluctlight.settings import INTENT_CLASSIFIER_PATH, INTENT_EXAMPLES_PATH
+
+    examples_path = examples_path or INTENT_EXAMPLES_PATH
+    output_path = output_path or INTENT_CLASSIFIER_PATH
+    if not examples_path or not output_path:
+        raise click.UsageError("Set --examples and --output")
+
+    examples = read_intent_examples(examples_path)
+    counts = Counter(label for _, label in examples)
+    examples = [
+        (text, label) for text, label in examples if counts[label] >= min_examples
+    ]
+    if len({label for _, label in examples}) < 2:
+        raise click.ClickException(f"Not enough examples per intent: {dict(counts)}")
+
+    classifier = train_local_intent_classifier(examples, epochs=epochs)
+    accuracy = sum(
+        classifier.predict(text)[0] == label for text, label in examples
+    ) / len(examples)
+    classifier.save(output_path)
+    click.echo(
+        f"Trained on {len(examples)} examples of {classifier.labels}, "
+        f"train accuracy {accuracy:.3f}, saved to {output_path}"
+    )
@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Any
+
+from fluctlight.logger import get_logger
+from fluctlight.open.rate_limit import get_rate_limiters
+from fluctlight.settings import GAUGES_LOG_INTERVAL_SEC
+from fluctlight.utt.state_store import get_state_store_gauges
+
+logger = get_logger(__name__)
+
+_LOCK = threading.Lock()
+_last_log_time: float | None = None
+
+
+def get_gauges() -> dict[str, Any]:
+    """
+    Gauges of the in process queues and state, e.g. the requests waiting for a rate
+    limit and the size of the per-thread state stores.
+    """
+    return {
+        "rate_limit_queue_depths": get_rate_limiters().queue_depths,
+        "state_stores": get_state_store_gauges(),
+    }
+
+
+def log_gauges(interval_sec: float = GAUGES_LOG_INTERVAL_SEC) -> bool:
+    """
+    Debug log the gauges at most once per interval_sec, 0 disables. Called by the bots
+    on each message, so an idle bot logs nothing. Returns whether they were logged.
+    """
+    global _last_log_time  # pylint: disable=global-statement
+    if interval_sec <= 0:
+        return False
+    now = time.monotonic()
+    with _LOCK:
+        if _last_log_time is not None and now - _last_log_time < interval_sec:
+            return False
+        _last_log_time = now
+    logger.debug("Gauges", **get_gauges())
+    return True
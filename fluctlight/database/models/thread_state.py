@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Float, LargeBinary, String
+
+from fluctlight.database.base import Base
+
+
+class ThreadState(Base):
+    __tablename__ = "thread_states"
+
+    namespace = Column(String(255), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    value = Column(LargeBinary, nullable=False)
+    updated_at = Column(Float, nullable=False)
@@ -1,3 +1,5 @@
+import asyncio
+
 import discord
 from discord.message import Message
 from discord.user import User
@@ -6,6 +8,7 @@ from fluctlight.agents.character import create_default_character_agent
 from fluctlight.agents.message_intent_agent import MessageIntentAgent
 from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
 from fluctlight.core.bot_proxy import BotProxy
+from fluctlight.core.gauges import log_gauges
 from fluctlight.data_model.interface import IChannel
 from fluctlight.discord.adapter import Adapter
 from fluctlight.discord.bot_client import DiscordBotClient
@@ -90,6 +93,7 @@ class DiscordBotProxy(BotProxy, DiscordChat, DiscordReaction, DiscordGuild, Sing
 
     async def on_message(self, message: Message) -> None:
         logger.debug("on message", message=message)
+        log_gauges()
         if not self._should_reply(message):
             return
 
@@ -107,12 +111,17 @@ class DiscordBotProxy(BotProxy, DiscordChat, DiscordReaction, DiscordGuild, Sing
             thread = None
 
         await self.add_reaction(message=message, reaction_name=DEFAULT_EYES_EMOJI)
-        message_intent = self.intent_matcher.match_message_intent(message=imessage)
+        # Keep the discord event loop free while matching intent and waiting on LLMs
+        message_intent = await asyncio.to_thread(
+            self.intent_matcher.match_message_intent, message=imessage
+        )
         if message_intent.unknown:
-            self.chat_agent(message=imessage, message_intent=message_intent)
+            await self.chat_agent.acall(message=imessage, message_intent=message_intent)
         else:
             for agent in self.agents:
-                response_texts = agent(message=imessage, message_intent=message_intent)
+                response_texts = await agent.acall(
+                    message=imessage, message_intent=message_intent
+                )
                 if response_texts is None:  ## agent didn't process this intent
                     continue
                 for text in response_texts:
@@ -1,11 +1,14 @@
 from .intent_agent import IntentAgent
 from .rag_intent_matcher import RagIntentMatcher
+from .embedding_intent_matcher import EmbeddingIntentMatcher
 from .intent_matcher_base import IntentMatcher, IntentMatcherBase
-from fluctlight.settings import INTENT_LLM_MATCHING
+from fluctlight.settings import INTENT_EMBEDDING_MATCHING, INTENT_LLM_MATCHING
 
 
 def get_default_intent_matcher(agents: list[IntentAgent]) -> IntentMatcher:
     if INTENT_LLM_MATCHING:
+        if INTENT_EMBEDDING_MATCHING:
+            return EmbeddingIntentMatcher(agents=agents)
         return RagIntentMatcher(agents=agents)
     else:
         return IntentMatcherBase(agents=agents)
@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+
+from fluctlight.intent.intent_agent import IntentAgent
+from fluctlight.intent.rag_intent_matcher import RagIntentMatcher
+from fluctlight.logger import get_logger
+from fluctlight.open.embedding import embed_texts
+from fluctlight.settings import INTENT_EMBEDDING_MARGIN, INTENT_EMBEDDING_MODEL
+
+logger = get_logger(__name__)
+
+
+def top_two(scores: np.ndarray) -> tuple[int, float]:
+    """
+    The index of the best score and its margin over the second best.
+    Examples:
+    - [0.2, 0.9, 0.7] -> (1, 0.2)
+    - [0.4] -> (0, inf)
+    """
+    if len(scores) == 1:
+        return 0, float("inf")
+    second, first = np.argpartition(scores, -2)[-2:]
+    return int(first), float(scores[first] - scores[second])
+
+
+class EmbeddingIntentMatcher(RagIntentMatcher):
+    """
+    Match the intent by the cosine similarity of the message and agent descriptions
+    embeddings, the descriptions are embedded once. The LLM graph is only run when
+    the top two intents are within margin of each other.
+    """
+
+    def __init__(
+        self,
+        agents: list[IntentAgent],
+        embedding_model_key: str = INTENT_EMBEDDING_MODEL,
+        margin: float = INTENT_EMBEDDING_MARGIN,
+        **kwargs,
+    ) -> None:
+        super().__init__(agents=agents, **kwargs)
+        self.embedding_model_key = embedding_model_key
+        self.margin = margin
+        self.embedding_matches = 0
+        self.llm_matches = 0
+        self._intent_vectors: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def intent_vectors(self) -> np.ndarray:
+        """Embedding of the llm matchable agent descriptions, in intent_keylist order."""
+        with self._lock:
+            if self._intent_vectors is None:
+                self._intent_vectors = embed_texts(
+                    [
+                        f"{agent.intent.key}: {agent.description}"
+                        for agent in self.agents
+                        if agent.llm_matchable
+                    ],
+                    model_key=self.embedding_model_key,
+                )
+        return self._intent_vectors
+
+    def score_intents(self, text: str) -> np.ndarray:
+        query = embed_texts([text], model_key=self.embedding_model_key)[0]
+        return self.intent_vectors @ query
+
+    def parse_intent_key(self, text: str) -> str | None:
+        if not self.intent_keylist:
+            return None
+        try:
+            scores = self.score_intents(text)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Fail to embed intent, fallback to llm", err=str(e))
+            self.llm_matches += 1
+            return super().parse_intent_key(text)
+
+        idx, margin = top_two(scores)
+        if margin >= self.margin:
+            self.embedding_matches += 1
+            intent_key = self.intent_keylist[idx]
+            logger.info("Embedding matched intent", intent=intent_key, margin=margin)
+            return intent_key
+
+        logger.info("Embedding match ambiguous, fallback to llm", margin=margin)
+        self.llm_matches += 1
+        return super().parse_intent_key(text)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+import threading
+from typing import Any
+
+from fluctlight.intent.intent_agent import IntentAgent
+from fluctlight.logger import get_logger
+from fluctlight.open.cache import MemoryCacheTier
+from fluctlight.utt.emoji import get_leading_emoji, strip_leading_emoji
+
+logger = get_logger(__name__)
+
+# Slack <@U123>, <!here>, <#C123|general>, discord <@!123>, <@&123>
+_MENTION_RE = re.compile(r"<[@#!][^>]*>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_intent_text(text: str) -> str:
+    """
+    Examples:
+    - '<@U123>  Hi   Bot ' -> 'hi bot'
+    - ':shop: Buy <@U123> shoes' -> ':shop: buy shoes'
+    """
+    emoji = get_leading_emoji(text)
+    text = _MENTION_RE.sub(" ", strip_leading_emoji(text) if emoji else text)
+    text = _WHITESPACE_RE.sub(" ", text).strip().lower()
+    return f":{emoji}: {text}" if emoji else text
+
+
+def agents_fingerprint(agents: list[IntentAgent]) -> str:
+    """Hash of the agents intent keys and descriptions, changes when any of them does."""
+    payload = json.dumps(
+        [
+            [agent.intent.key, agent.description, bool(agent.llm_matchable)]
+            for agent in agents
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IntentCache:
+    """
+    Intent keys matched by the LLM, shared across threads and keyed by the
+    normalized message text. Bounded LRU with TTL, the entries are dropped when
+    the agents or their descriptions change.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_sec: float = 3600) -> None:
+        self._entries = MemoryCacheTier(max_size=max_size, ttl_sec=ttl_sec)
+        self._lock = threading.Lock()
+        self._fingerprint: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_agents(self, agents: list[IntentAgent]) -> None:
+        fingerprint = agents_fingerprint(agents)
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            if self._fingerprint is not None:
+                self.invalidations += 1
+                logger.info("Agents changed, invalidate intent cache")
+            self._fingerprint = fingerprint
+            self._entries.clear()
+
+    def get(self, agents: list[IntentAgent], text: str) -> str | None:
+        self._check_agents(agents)
+        intent_key = self._entries.get(normalize_intent_text(text), str)
+        with self._lock:
+            if intent_key is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return intent_key
+
+    def set(self, agents: list[IntentAgent], text: str, intent_key: str) -> None:
+        self._check_agents(agents)
+        self._entries.set(normalize_intent_text(text), intent_key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "invalidations": self.invalidations,
+        }
@@ -1,6 +1,7 @@
 import json
+from typing import Literal, Type
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ValidationError, create_model
 
 from fluctlight.logger import get_logger
 
@@ -17,6 +18,20 @@ class IntentCandidate(BaseModel):
         return "{" + f"{ self.model_dump_json() }" + "}"
 
 
+def make_intent_candidate_schema(intent_keys: list[str]) -> Type[IntentCandidate]:
+    """
+    IntentCandidate with the intent fields constrained to an enum of intent_keys, for
+    structured output, so the model can only answer with a valid key.
+    """
+    intent_key_type = Literal[tuple(intent_keys)]  # type: ignore[valid-type]
+    return create_model(
+        "IntentChoice",
+        __base__=IntentCandidate,
+        intent_primary=(intent_key_type, ...),
+        intent_secondary=(intent_key_type | None, None),
+    )
+
+
 def parse_intent_candidate_json(text: str) -> IntentCandidate | None:
     try:
         data = json.loads(text)
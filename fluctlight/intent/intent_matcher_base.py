@@ -3,6 +3,8 @@ from abc import ABC, abstractmethod
 from fluctlight.agent_catalog.catalog_manager import get_catalog_manager
 from fluctlight.data_model.interface import IMessage
 from fluctlight.intent.intent_agent import IntentAgent
+from fluctlight.intent.intent_cache import IntentCache
+from fluctlight.intent.local_classifier import IntentExampleLog, LocalIntentClassifier
 from fluctlight.intent.message_intent import (
     DEFAULT_CHAT_INTENT,
     UNKNOWN_INTENT,
@@ -11,10 +13,17 @@ from fluctlight.intent.message_intent import (
     get_message_intent_by_text,
 )
 from fluctlight.logger import get_logger
+from fluctlight.utt.state_store import ConversationStateStore
 from fluctlight.settings import (
     INTENT_LLM_MATCHING,
     INTENT_CHAR_MATCHING,
     INTENT_EMOJI_MATCHING,
+    INTENT_CACHE_ENABLED,
+    INTENT_CACHE_MAX_SIZE,
+    INTENT_CACHE_TTL_SEC,
+    INTENT_CLASSIFIER_PATH,
+    INTENT_CLASSIFIER_THRESHOLD,
+    INTENT_EXAMPLES_PATH,
     CHAR_AGENT_BIND,
 )
 
@@ -22,7 +31,7 @@ logger = get_logger(__name__)
 
 
 class IntentMatcher(ABC):
-    intent_by_thread: dict[str, MessageIntent]
+    intent_by_thread: ConversationStateStore[MessageIntent]
     agents: list[IntentAgent]
     _chars_map: dict[str, str] | None = None
 
@@ -31,14 +40,28 @@ class IntentMatcher(ABC):
         agents: list[IntentAgent],
         disable_cache: bool = False,
     ) -> None:
-        self.intent_by_thread = {}
+        self.intent_by_thread = ConversationStateStore("intent_by_thread", persist=True)
         self.agents = agents
         self.disable_cache = disable_cache
         self.catalog_manager = get_catalog_manager()
+        # LLM matched intents shared across threads, by normalized text
+        self.intent_cache = (
+            IntentCache(max_size=INTENT_CACHE_MAX_SIZE, ttl_sec=INTENT_CACHE_TTL_SEC)
+            if INTENT_CACHE_ENABLED and not disable_cache
+            else None
+        )
+        self.example_log = (
+            IntentExampleLog(INTENT_EXAMPLES_PATH) if INTENT_EXAMPLES_PATH else None
+        )
+        self.local_classifier = load_local_classifier(INTENT_CLASSIFIER_PATH)
+        self.local_classifier_threshold = INTENT_CLASSIFIER_THRESHOLD
 
     @abstractmethod
-    def parse_intent_key(self, text: str) -> str:
-        pass
+    def parse_intent_key(self, text: str) -> str | None:
+        """
+        The intent key the LLM matched for the text, None without a decision, e.g. a
+        refusal, the message then falls back to chat and is not cached.
+        """
 
     def match_message_intent(self, message: IMessage) -> MessageIntent:
         """
@@ -104,11 +127,54 @@ class IntentMatcher(ABC):
         return intent
 
     def get_llm_agent_intent(self, intent: MessageIntent, text: str) -> MessageIntent:
-        intent.key = self.parse_intent_key(text)
+        intent_key = (
+            self.intent_cache.get(self.agents, text) if self.intent_cache else None
+        )
+        if intent_key is not None:
+            intent.metadata["intent_cache_hit"] = True
+        else:
+            local_match = self.get_local_intent_key(text)
+            if local_match is not None:
+                intent.key, proba = local_match
+                intent.unknown = False
+                intent.set_metadata(local_match=True, local_match_proba=proba)
+                return intent
+            intent_key = self.parse_intent_key(text)
+            if intent_key is None:
+                logger.info("No intent matched by llm, fallback to chat")
+                return intent
+            if self.intent_cache:
+                self.intent_cache.set(self.agents, text, intent_key)
+            if self.example_log:
+                self.example_log.append(text, intent_key, source="llm")
+        if self.intent_cache:
+            logger.debug("Intent cache", **self.intent_cache.stats)
+        intent.key = intent_key
         intent.unknown = False
         intent.metadata["llm_match"] = True
         return intent
 
+    def get_local_intent_key(self, text: str) -> tuple[str, float] | None:
+        """(intent key, probability) of the local classifier, None under the threshold."""
+        if self.local_classifier is None:
+            return None
+        intent_key, proba = self.local_classifier.predict(text)
+        if proba < self.local_classifier_threshold or intent_key not in {
+            agent.intent.key for agent in self.agents
+        }:
+            return None
+        return intent_key, proba
+
+
+def load_local_classifier(path: str) -> LocalIntentClassifier | None:
+    if not path:
+        return None
+    try:
+        return LocalIntentClassifier.load(path)
+    except OSError as e:
+        logger.warning("Local intent classifier not loaded", path=path, err=str(e))
+        return None
+
 
 class IntentMatcherBase(IntentMatcher):
     def __init__(
@@ -0,0 +1,189 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from fluctlight.intent.intent_cache import normalize_intent_text
+from fluctlight.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+DEFAULT_N_FEATURES = 2**16
+
+
+def extract_features(text: str) -> list[str]:
+    """
+    Word unigrams and bigrams, plus the character trigrams of the words.
+    Examples:
+    - 'Buy shoes' -> ['w:buy', 'w:shoes', 'b:buy shoes', 'c: bu', 'c:buy', ...]
+    """
+    words = _WORD_RE.findall(normalize_intent_text(text))
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        features.extend(f"c:{padded[i : i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def hash_features(
+    text: str, n_features: int = DEFAULT_N_FEATURES
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sparse hashed term frequencies of the text, as (sorted unique indices, 1 + log(tf))."""
+    buckets = [
+        zlib.crc32(f.encode("utf-8")) % n_features for f in extract_features(text)
+    ]
+    if not buckets:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices, counts = np.unique(np.array(buckets, dtype=np.int64), return_counts=True)
+    return indices, (1.0 + np.log(counts)).astype(np.float32)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+class LocalIntentClassifier:
+    """
+    Multinomial logistic regression over TF-IDF weighted hashed n-grams, the
+    parameters are plain NumPy arrays. Predicting is a sparse dot product, tens of
+    microseconds on CPU.
+    """
+
+    def __init__(
+        self, labels: list[str], weights: np.ndarray, bias: np.ndarray, idf: np.ndarray
+    ) -> None:
+        self.labels = labels
+        self.weights = weights  # (n_labels, n_features)
+        self.bias = bias  # (n_labels,)
+        self.idf = idf  # (n_features,)
+
+    @property
+    def n_features(self) -> int:
+        return self.idf.shape[0]
+
+    def vectorize(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        indices, values = hash_features(text, self.n_features)
+        values = values * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm > 0 else values
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        indices, values = self.vectorize(text)
+        return _softmax(self.weights[:, indices] @ values + self.bias)
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """The most probable label and its probability."""
+        proba = self.predict_proba(text)
+        idx = int(np.argmax(proba))
+        return self.labels[idx], float(proba[idx])
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                labels=np.array(self.labels),
+                weights=self.weights,
+                bias=self.bias,
+                idf=self.idf,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalIntentClassifier":
+        with np.load(path) as data:
+            return cls(
+                labels=[str(label) for label in data["labels"]],
+                weights=data["weights"],
+                bias=data["bias"],
+                idf=data["idf"],
+            )
+
+
+def train_local_intent_classifier(
+    examples: list[tuple[str, str]],
+    n_features: int = DEFAULT_N_FEATURES,
+    epochs: int = 20,
+    learning_rate: float = 0.5,
+    l2: float = 1e-5,
+    seed: int = 0,
+) -> LocalIntentClassifier:
+    """Train on (text, intent key) examples with SGD on the cross entropy."""
+    labels = sorted({label for _, label in examples})
+    label_idx = {label: idx for idx, label in enumerate(labels)}
+    hashed = [hash_features(text, n_features) for text, _ in examples]
+
+    # Smoothed idf over the hashed features
+    doc_freq = np.zeros(n_features, dtype=np.float32)
+    for indices, _ in hashed:
+        doc_freq[indices] += 1
+    idf = (np.log((1 + len(examples)) / (1 + doc_freq)) + 1).astype(np.float32)
+
+    classifier = LocalIntentClassifier(
+        labels=labels,
+        weights=np.zeros((len(labels), n_features), dtype=np.float32),
+        bias=np.zeros(len(labels), dtype=np.float32),
+        idf=idf,
+    )
+    rows = []
+    for (indices, values), (_, label) in zip(hashed, examples):
+        values = values * idf[indices]
+        norm = np.linalg.norm(values)
+        rows.append((indices, values / norm if norm > 0 else values, label_idx[label]))
+
+    rng = random.Random(seed)
+    weights, bias = classifier.weights, classifier.bias
+    for epoch in range(epochs):
+        rng.shuffle(rows)
+        rate = learning_rate / (1 + epoch * 0.1)
+        for indices, values, target in rows:
+            grad = _softmax(weights[:, indices] @ values + bias)
+            grad[target] -= 1
+            weights[:, indices] -= rate * (
+                np.outer(grad, values) + l2 * weights[:, indices]
+            )
+            bias -= rate * grad
+    return classifier
+
+
+class IntentExampleLog:
+    """
+    Append only JSONL log of (text, intent) decisions, the training set of the classifier.
+    Only actual decisions are logged, not the chat fallback of a failed match.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def append(self, text: str, intent_key: str, source: str) -> None:
+        line = json.dumps(
+            {"text": text, "intent": intent_key, "source": source, "ts": time.time()}
+        )
+        try:
+            with self._lock, open(self.path, "a", encoding="utf8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning("Fail to log intent example", err=str(e))
+
+
+def read_intent_examples(path: str) -> list[tuple[str, str]]:
+    examples = []
+    with open(path, "r", encoding="utf8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                examples.append((record["text"], record["intent"]))
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.warning("Skip invalid intent example", err=str(e))
+    return examples
@@ -9,12 +9,22 @@ from fluctlight.intent.intent_agent import IntentAgent
 from fluctlight.intent.intent_candidate import (
     EXAMPLE_INTENT_CANDIDATE,
     IntentCandidate,
+    make_intent_candidate_schema,
     parse_intent_candidate_json,
 )
 from fluctlight.intent.intent_matcher_base import IntentMatcher
 from fluctlight.logger import get_logger
+from fluctlight.open.chat import (
+    get_parsed_choice_from_completion,
+    structure_chat_completion,
+)
 from fluctlight.utt.prompt_utils import construct_system_prompt
-from fluctlight.settings import FIREWORKS_API_KEY
+from fluctlight.utt.template import get_template_registry
+from fluctlight.settings import (
+    FIREWORKS_API_KEY,
+    INTENT_LLM_STRUCTURED_MATCHING,
+    INTENT_LLM_STRUCTURED_MODEL,
+)
 
 logger = get_logger(__name__)
 
@@ -56,6 +66,17 @@ Incoming user messages are the previous output to analye.
 """
 
 
+_STRUCTURED_MATCH_PROMPT = """
+Determine the most appropriate intents of the user message.
+Extract the key phrases indicating the user's need, compare them with the intent
+descriptions, and pick the primary intent and optionally a secondary one.
+
+Intent list:
+-------------
+{{intent_list}}
+"""
+
+
 class GraphState(TypedDict):
     messages: list[BaseMessage]
     intent_json_payload: str | None  # Json paylod
@@ -68,10 +89,14 @@ class RagIntentMatcher(IntentMatcher):
         agents: list[IntentAgent],
         model_id: str = FIREWORKS_MIXTRAL_22B,
         max_tokens: int = 32768,
+        structured: bool = INTENT_LLM_STRUCTURED_MATCHING,
+        structured_model_key: str = INTENT_LLM_STRUCTURED_MODEL,
     ) -> None:
         super().__init__(
             agents=agents,
         )
+        self.structured = structured
+        self.structured_model_key = structured_model_key
         self.llm = ChatFireworks(
             model=model_id, max_tokens=max_tokens, api_key=FIREWORKS_API_KEY
         )
@@ -172,7 +197,9 @@ class RagIntentMatcher(IntentMatcher):
         workflow.add_edge("refine_intent", END)
         return workflow.compile()
 
-    def parse_intent_key(self, text: str) -> str:
+    def parse_intent_key(self, text: str) -> str | None:
+        if self.structured and self.intent_keylist:
+            return self.parse_intent_key_structured(text)
         last_state = self.graph.invoke(
             {
                 "messages": [HumanMessage(content=text)],
@@ -182,6 +209,35 @@ class RagIntentMatcher(IntentMatcher):
         logger.info("parse intent got last state", last_state=last_state)
         return self.parse_final_state(GraphState(**last_state))
 
+    def parse_intent_key_structured(self, text: str) -> str | None:
+        """
+        Match in one structured output call, the schema constrains the intent fields
+        to intent_keylist so the answer needs no refine round-trip.
+        """
+        completion = structure_chat_completion(
+            self.intent_candidate_schema,
+            messages=[
+                {"role": "system", "content": self.structured_match_prompt},
+                {"role": "user", "content": text},
+            ],
+            model_key=self.structured_model_key,
+        )
+        intent_candidate = get_parsed_choice_from_completion(completion)
+        logger.info("structured match intent", intent_candidate=intent_candidate)
+        if intent_candidate is None:
+            return None
+        return intent_candidate.intent_primary
+
+    @cached_property
+    def intent_candidate_schema(self) -> type[IntentCandidate]:
+        return make_intent_candidate_schema(self.intent_keylist)
+
+    @cached_property
+    def structured_match_prompt(self) -> str:
+        return get_template_registry().render(
+            _STRUCTURED_MATCH_PROMPT, intent_list=self.construct_intent_list
+        )
+
     @cached_property
     def construct_intent_list(self) -> str:
         return "\n---\n".join(
@@ -200,7 +256,7 @@ class RagIntentMatcher(IntentMatcher):
             if agent.llm_matchable
         ]
 
-    def parse_final_state(self, state: GraphState) -> str:
+    def parse_final_state(self, state: GraphState) -> str | None:
         intent_candidate = state["intent_candidate"]
         assert intent_candidate, "intent candidate cannot be None"
         for intent_key in self.intent_keylist:
@@ -210,4 +266,4 @@ class RagIntentMatcher(IntentMatcher):
         for intent_key in self.intent_keylist:
             if intent_key in intent_candidate.intent_secondary:
                 return intent_key
-        return "CHAT"
+        return None
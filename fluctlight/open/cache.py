@@ -0,0 +1,227 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Type
+
+from openai.types.chat import ParsedChatCompletion
+from pydantic import TypeAdapter
+
+from fluctlight.logger import get_logger
+from fluctlight.settings import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_SIZE,
+    LLM_CACHE_SQLITE_PATH,
+    LLM_CACHE_TTL_SEC,
+)
+
+logger = get_logger(__name__)
+
+
+def _schema_fingerprint(output_schema: Type[Any] | None) -> Any:
+    if output_schema is None:
+        return None
+    try:
+        json_schema = TypeAdapter(output_schema).json_schema()
+    except Exception:  # pylint: disable=broad-except
+        json_schema = None
+    # Keep the type name, two classes with the same schema parse to different types
+    return [
+        f"{output_schema.__module__}.{output_schema.__qualname__}",
+        json_schema,
+    ]
+
+
+def make_request_key(
+    model_key: str,
+    messages: list[Any],
+    output_schema: Type[Any] | None = None,
+) -> str:
+    """
+    Stable hash of a completion request.
+
+    Examples:
+    - make_request_key("gpt-4o", [{"role": "user", "content": "hi"}], Order) -> 'a3f1...'
+    """
+    payload = json.dumps(
+        [model_key, _schema_fingerprint(output_schema), messages],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheTier(ABC):
+    name: str
+
+    @abstractmethod
+    def get(self, key: str, output_schema: Type[Any]) -> Any | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCacheTier(CacheTier):
+    """In-memory LRU cache tier with TTL, values are kept as python objects."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 1024, ttl_sec: float = 3600) -> None:
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, output_schema: Type[Any]) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if expire_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCacheTier(CacheTier):
+    """On-disk cache tier, completions are stored as JSON and parsed back with the schema."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_sec: float = 3600) -> None:
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache "
+                "(key TEXT PRIMARY KEY, expire_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def get(self, key: str, output_schema: Type[Any]) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expire_at, value FROM llm_response_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        expire_at, value = row
+        if expire_at < time.time():
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key = ?", (key,)
+                )
+            return None
+        try:
+            return ParsedChatCompletion[output_schema].model_validate_json(value)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Drop unreadable cache entry", key=key, err=str(e))
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            text = value.model_dump_json()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Skip caching unserializable response", err=str(e))
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl_sec, text),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_response_cache")
+
+
+class ResponseCache:
+    """
+    Tiered LLM response cache, tiers are looked up in order and a hit in a lower
+    tier is promoted to the tiers above it.
+    """
+
+    def __init__(self, tiers: list[CacheTier]) -> None:
+        self.tiers = tiers
+        self.hits: dict[str, int] = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+
+    def get(self, key: str, output_schema: Type[Any]) -> Any | None:
+        for idx, tier in enumerate(self.tiers):
+            value = tier.get(key, output_schema)
+            if value is not None:
+                self.hits[tier.name] += 1
+                for upper in self.tiers[:idx]:
+                    upper.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        total_hits = sum(self.hits.values())
+        total = total_hits + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": total_hits / total if total else 0.0,
+        }
+
+
+def create_default_response_cache() -> ResponseCache:
+    tiers: list[CacheTier] = [
+        MemoryCacheTier(max_size=LLM_CACHE_MAX_SIZE, ttl_sec=LLM_CACHE_TTL_SEC)
+    ]
+    if LLM_CACHE_SQLITE_PATH:
+        tiers.append(SqliteCacheTier(LLM_CACHE_SQLITE_PATH, ttl_sec=LLM_CACHE_TTL_SEC))
+    return ResponseCache(tiers=tiers)
+
+
+_RESPONSE_CACHE: ResponseCache | None = (
+    create_default_response_cache() if LLM_CACHE_ENABLED else None
+)
+
+
+def get_response_cache() -> ResponseCache | None:
+    return _RESPONSE_CACHE
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    """Plug in a different response cache, None disables caching."""
+    global _RESPONSE_CACHE  # pylint: disable=global-statement
+    _RESPONSE_CACHE = cache
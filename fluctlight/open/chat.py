@@ -1,10 +1,48 @@
-from typing import Any, Type
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Type
 from langsmith import traceable
 from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 from openai.types.chat import ParsedChatCompletion
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
-from fluctlight.settings import GPT_STRUCTURE_OUTPUT_MODEL, GPT_CHAT_MODEL
-from fluctlight.open.client import get_open_client
+from fluctlight.logger import get_logger
+from fluctlight.settings import (
+    GPT_STRUCTURE_OUTPUT_MODEL,
+    GPT_CHAT_MODEL,
+    LLM_HEDGE_ENABLED,
+    LLM_SINGLE_FLIGHT_ENABLED,
+)
+from fluctlight.open.cache import get_response_cache, make_request_key
+from fluctlight.open.client import get_async_open_client, get_open_client
+from fluctlight.open.hedge import get_hedge_model_key, get_hedger
+from fluctlight.open.rate_limit import get_rate_limiters
+from fluctlight.open.router import get_model_router, is_router_model_key
+from fluctlight.utt.single_flight import AsyncSingleFlight, SingleFlight
+
+logger = get_logger(__name__)
+
+# Identical requests in flight at the same time share one upstream call
+_SINGLE_FLIGHT = SingleFlight()
+_ASYNC_SINGLE_FLIGHT = AsyncSingleFlight()
+
+
+def _coalesce(
+    request_key: str, model_key: str, fn: Callable[..., Any], **kwargs: Any
+) -> Any:
+    """Call upstream under the model rate limit, coalesced with identical requests."""
+    limited = partial(get_rate_limiters().call, model_key, fn)
+    if not LLM_SINGLE_FLIGHT_ENABLED:
+        return limited(**kwargs)
+    return _SINGLE_FLIGHT.do(request_key, limited, **kwargs)
+
+
+async def _acoalesce(
+    request_key: str, model_key: str, fn: Callable[..., Awaitable[Any]], **kwargs: Any
+) -> Any:
+    limited = partial(get_rate_limiters().acall, model_key, fn)
+    if not LLM_SINGLE_FLIGHT_ENABLED:
+        return await limited(**kwargs)
+    return await _ASYNC_SINGLE_FLIGHT.do(request_key, limited, **kwargs)
 
 
 def get_provider_and_model_id(model_key: str) -> tuple[str, str]:
@@ -28,10 +66,18 @@ def get_parsed_choice_from_completion(completion: ChatCompletion, idx: int = 0)
     return completion.choices[idx].message.parsed
 
 
+def get_delta_from_chunk(chunk: ChatCompletionChunk, idx: int = 0) -> str:
+    """Text delta of a streamed chunk, empty for role/usage only chunks."""
+    if len(chunk.choices) <= idx:
+        return ""
+    return chunk.choices[idx].delta.content or ""
+
+
 @traceable(run_type="llm")
 def chat_complete(
     messages: list[ChatCompletionMessageParam],
     model_key: str = GPT_CHAT_MODEL,
+    hedge: bool = LLM_HEDGE_ENABLED,
 ) -> ChatCompletion:
     """
     Generate a chat completion based on the provided messages.
@@ -40,6 +86,8 @@ def chat_complete(
         messages (list[ChatCompletionMessageParam]): The list of messages to be used for the chat completion.
         model_key (str): The model key in the format 'provider:model_id'. Defaults to 'openai:gpt-3'.
                          If the provider is not specified, it defaults to OpenAI.
+        hedge (bool): Send the request to a secondary model key as well when the primary
+                      has not returned after its observed p90 latency, first response wins.
 
     Returns:
         ChatCompletion: The chat completion result.
@@ -50,13 +98,64 @@ def chat_complete(
 
     If the provider is 'openai', the OPENAI_CLIENT will be used.
     For other providers, the appropriate client will be fetched using get_alt_client_from_model_key.
+    A router model key 'auto:<model-family>' is spread across the providers serving the family,
+    with failover on 429/5xx.
+    """
+    if is_router_model_key(model_key):
+        return get_model_router().call(
+            model_key,
+            lambda key: chat_complete(messages=messages, model_key=key, hedge=hedge),
+        )
+
+    hedge_model_key = get_hedge_model_key(model_key) if hedge else None
+    if hedge_model_key:
+        return get_hedger().call(
+            model_key,
+            lambda: chat_complete(messages=messages, model_key=model_key, hedge=False),
+            hedge_model_key,
+            lambda: chat_complete(
+                messages=messages, model_key=hedge_model_key, hedge=False
+            ),
+        )
+
+    provider, model_id = get_provider_and_model_id(model_key)
+    client = get_open_client(provider)
+    return _coalesce(
+        make_request_key(model_key, messages),
+        model_key,
+        client.chat.completions.create,
+        model=model_id,
+        messages=messages,
+    )
+
+
+@traceable(run_type="llm")
+def stream_chat_complete(
+    messages: list[ChatCompletionMessageParam],
+    model_key: str = GPT_CHAT_MODEL,
+) -> Iterator[str]:
+    """
+    Streaming version of chat_complete, yields the text deltas as they arrive.
+
+    Pair it with think_format_util.ThinkMessageSplitter to separate the
+    `<think>...</think>` reasoning of reasoning models while streaming.
+    A router model key streams from its first candidate, without failover.
     """
+    if is_router_model_key(model_key):
+        model_key = get_model_router().candidates(model_key)[0]
     provider, model_id = get_provider_and_model_id(model_key)
     client = get_open_client(provider)
-    return client.chat.completions.create(
+    stream = get_rate_limiters().call(
+        model_key,
+        client.chat.completions.create,
         model=model_id,
         messages=messages,
+        stream=True,
     )
+    for chunk in stream:
+        delta = get_delta_from_chunk(chunk)
+        if delta:
+            yield delta
 
 
 @traceable(run_type="llm")
@@ -64,6 +163,7 @@ def structure_chat_completion(
     output_schema: Type[Any],
     messages: list[ChatCompletionMessageParam],
     model_key: str = GPT_STRUCTURE_OUTPUT_MODEL,
+    use_cache: bool = True,
 ) -> ParsedChatCompletion:
     """
     Generate a structured chat completion based on the provided messages and output schema.
@@ -73,6 +173,8 @@ def structure_chat_completion(
         messages (list[ChatCompletionMessageParam]): The list of messages to be used for the chat completion.
         model_key (str): The model key in the format 'provider:model_id'. Defaults to 'openai:gpt-3'.
                          If the provider is not specified, it defaults to OpenAI.
+        use_cache (bool): Whether to look up and store the response in the response cache,
+                          keyed by (model_key, output_schema, messages).
 
     Returns:
         ParsedChatCompletion: The structured chat completion result.
@@ -83,15 +185,147 @@ def structure_chat_completion(
 
     If the provider is 'openai', the OPENAI_CLIENT will be used.
     For other providers, the appropriate client will be fetched using get_alt_client_from_model_key.
+    A router model key 'auto:<model-family>' is spread across the providers serving the family,
+    with failover on 429/5xx.
     """
+    if is_router_model_key(model_key):
+        return get_model_router().call(
+            model_key,
+            lambda key: structure_chat_completion(
+                output_schema=output_schema,
+                messages=messages,
+                model_key=key,
+                use_cache=use_cache,
+            ),
+        )
+
+    request_key = make_request_key(model_key, messages, output_schema)
+    cache = get_response_cache() if use_cache else None
+    if cache:
+        cached = cache.get(request_key, output_schema)
+        if cached is not None:
+            logger.debug("structure completion cache hit", key=request_key)
+            return cached
+
     provider, model_id = get_provider_and_model_id(model_key)
     client = get_open_client(provider)
 
-    completion = client.beta.chat.completions.parse(
+    completion = _coalesce(
+        request_key,
+        model_key,
+        client.beta.chat.completions.parse,
+        model=model_id,
+        messages=messages,
+        response_format=output_schema,
+    )
+    if cache:
+        cache.set(request_key, completion)
+    return completion
+
+
+@traceable(run_type="llm")
+async def achat_complete(
+    messages: list[ChatCompletionMessageParam],
+    model_key: str = GPT_CHAT_MODEL,
+    hedge: bool = LLM_HEDGE_ENABLED,
+) -> ChatCompletion:
+    """
+    Async version of chat_complete, awaiting the provider's AsyncOpenAI client.
+
+    Use this from inside an event loop (e.g. the discord bot) so a slow completion
+    does not block other conversations. With hedge the losing request is cancelled.
+    """
+    if is_router_model_key(model_key):
+        return await get_model_router().acall(
+            model_key,
+            lambda key: achat_complete(messages=messages, model_key=key, hedge=hedge),
+        )
+
+    hedge_model_key = get_hedge_model_key(model_key) if hedge else None
+    if hedge_model_key:
+        return await get_hedger().acall(
+            model_key,
+            lambda: achat_complete(messages=messages, model_key=model_key, hedge=False),
+            hedge_model_key,
+            lambda: achat_complete(
+                messages=messages, model_key=hedge_model_key, hedge=False
+            ),
+        )
+
+    provider, model_id = get_provider_and_model_id(model_key)
+    client = get_async_open_client(provider)
+    return await _acoalesce(
+        make_request_key(model_key, messages),
+        model_key,
+        client.chat.completions.create,
+        model=model_id,
+        messages=messages,
+    )
+
+
+@traceable(run_type="llm")
+async def astream_chat_complete(
+    messages: list[ChatCompletionMessageParam],
+    model_key: str = GPT_CHAT_MODEL,
+) -> AsyncIterator[str]:
+    """Async version of stream_chat_complete."""
+    if is_router_model_key(model_key):
+        model_key = get_model_router().candidates(model_key)[0]
+    provider, model_id = get_provider_and_model_id(model_key)
+    client = get_async_open_client(provider)
+    stream = await get_rate_limiters().acall(
+        model_key,
+        client.chat.completions.create,
+        model=model_id,
+        messages=messages,
+        stream=True,
+    )
+    async for chunk in stream:
+        delta = get_delta_from_chunk(chunk)
+        if delta:
+            yield delta
+
+
+@traceable(run_type="llm")
+async def astructure_chat_completion(
+    output_schema: Type[Any],
+    messages: list[ChatCompletionMessageParam],
+    model_key: str = GPT_STRUCTURE_OUTPUT_MODEL,
+    use_cache: bool = True,
+) -> ParsedChatCompletion:
+    """Async version of structure_chat_completion."""
+    if is_router_model_key(model_key):
+        return await get_model_router().acall(
+            model_key,
+            lambda key: astructure_chat_completion(
+                output_schema=output_schema,
+                messages=messages,
+                model_key=key,
+                use_cache=use_cache,
+            ),
+        )
+
+    request_key = make_request_key(model_key, messages, output_schema)
+    cache = get_response_cache() if use_cache else None
+    if cache:
+        cached = cache.get(request_key, output_schema)
+        if cached is not None:
+            logger.debug("structure completion cache hit", key=request_key)
+            return cached
+
+    provider, model_id = get_provider_and_model_id(model_key)
+    client = get_async_open_client(provider)
+
+    completion = await _acoalesce(
+        request_key,
+        model_key,
+        client.beta.chat.completions.parse,
         model=model_id,
         messages=messages,
         response_format=output_schema,
     )
+    if cache:
+        cache.set(request_key, completion)
     return completion
 
 
@@ -107,6 +341,18 @@ def simple_assistant(prompt: str, model_key: str = GPT_CHAT_MODEL) -> str:
     return get_message_from_completion(completion=response)
 
 
+async def asimple_assistant(prompt: str, model_key: str = GPT_CHAT_MODEL) -> str:
+    """Async simple assistant with prompt."""
+    response = await achat_complete(
+        model_key=model_key,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant"},
+            {"role": "user", "content": prompt},
+        ],
+    )
+    return get_message_from_completion(completion=response)
+
+
 def structure_simple_assistant(
     prompt: str,
     output_schema: Type[Any],
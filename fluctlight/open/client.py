@@ -18,6 +18,17 @@ def make_openai_client(
     return client
 
 
+def make_async_openai_client(
+    api_key: str, base_url: str | None = None, use_langsmith_wrapper: bool = False
+) -> openai.AsyncOpenAI:
+    client = openai.AsyncOpenAI(base_url=base_url, api_key=api_key)
+
+    if use_langsmith_wrapper:
+        client = wrap_openai(client)
+
+    return client
+
+
 OPENAI_CLIENT = make_openai_client(
     api_key=OPENAI_API_KEY, use_langsmith_wrapper=(not TEST_MODE)
 )
@@ -44,6 +55,7 @@ def get_alternative_platforms() -> dict[str, Alternative]:
 
 _ALT_PLATFORMS = get_alternative_platforms()
 _CLIENT_CACHE = {}
+_ASYNC_CLIENT_CACHE = {}
 
 
 def get_open_client(provider: str, disable_cache: bool = False) -> openai.OpenAI:
@@ -62,3 +74,25 @@ def get_open_client(provider: str, disable_cache: bool = False) -> openai.OpenAI
             use_langsmith_wrapper=(not TEST_MODE),
         )
     return _CLIENT_CACHE[provider]
+
+
+def get_async_open_client(
+    provider: str, disable_cache: bool = False
+) -> openai.AsyncOpenAI:
+    """Async counterpart of get_open_client, one cached AsyncOpenAI client per provider."""
+    provider = provider.strip().lower()
+    if provider == _OPENAI_PROVIDER:
+        api_key, base_url = OPENAI_API_KEY, None
+    elif provider in _ALT_PLATFORMS:
+        alternative = _ALT_PLATFORMS[provider]
+        api_key, base_url = alternative.api_key, alternative.base_url
+    else:
+        raise ValueError(f"Unknown platform: {provider}")
+
+    if provider not in _ASYNC_CLIENT_CACHE or disable_cache:
+        _ASYNC_CLIENT_CACHE[provider] = make_async_openai_client(
+            api_key=api_key,
+            base_url=base_url,
+            use_langsmith_wrapper=(not TEST_MODE),
+        )
+    return _ASYNC_CLIENT_CACHE[provider]
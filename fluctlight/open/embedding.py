@@ -0,0 +1,33 @@
+import numpy as np
+
+from fluctlight.logger import get_logger
+from fluctlight.open.chat import get_provider_and_model_id
+from fluctlight.open.client import get_open_client
+from fluctlight.open.rate_limit import get_rate_limiters
+from fluctlight.settings import INTENT_EMBEDDING_MODEL
+
+logger = get_logger(__name__)
+
+
+def embed_texts(
+    texts: list[str], model_key: str = INTENT_EMBEDDING_MODEL
+) -> np.ndarray:
+    """
+    Embed the texts in one request, returns a (len(texts), dim) float32 matrix with
+    L2 normalized rows, so the cosine similarity is a dot product.
+    """
+    provider, model_id = get_provider_and_model_id(model_key)
+    client = get_open_client(provider)
+    response = get_rate_limiters().call(
+        model_key, client.embeddings.create, model=model_id, input=texts
+    )
+    vectors = np.array(
+        [item.embedding for item in sorted(response.data, key=lambda d: d.index)],
+        dtype=np.float32,
+    )
+    return normalize_rows(vectors)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
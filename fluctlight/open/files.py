@@ -2,11 +2,12 @@ import uuid
 from pathlib import Path
 from typing import Optional
 
-import requests
+import httpx
 import structlog
 from openai.types import FileObject
 
 from fluctlight.open import OPENAI_CLIENT
+from fluctlight.utt.http import get_http_pool
 
 logger = structlog.getLogger(__name__)
 
@@ -46,12 +47,14 @@ def download_file(url: str, local_filename: Optional[str] = None) -> Optional[st
         local_filename = f"{uuid.uuid4()}.dat"  # Generate a unique filename with UUID
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Check if the request was successful
-        with open(local_filename, "wb") as file:
-            file.write(response.content)
+        pool = get_http_pool()
+        with pool.stream("GET", url, timeout=pool.media_timeout) as response:
+            response.raise_for_status()  # Check if the request was successful
+            with open(local_filename, "wb") as file:
+                for chunk in response.iter_bytes():
+                    file.write(chunk)
         return local_filename
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error("An error occurred while downloading the file", exc_info=e)
         return None
 
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable
+
+from fluctlight.logger import get_logger
+from fluctlight.open.client import _OPENAI_PROVIDER
+from fluctlight.open.router import parse_router_families
+from fluctlight.settings import (
+    LLM_HEDGE_DEFAULT_DELAY_SEC,
+    LLM_HEDGE_MAX_WORKERS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MODEL_KEY,
+    LLM_HEDGE_PERCENTILE,
+    LLM_ROUTER_FAMILIES,
+)
+
+logger = get_logger(__name__)
+
+
+def _normalize_model_key(model_key: str) -> str:
+    provider, model_id = (
+        model_key.split(":", 1) if ":" in model_key else (_OPENAI_PROVIDER, model_key)
+    )
+    return f"{provider.lower()}:{model_id}"
+
+
+def get_hedge_model_key(
+    model_key: str, router_families: str = LLM_ROUTER_FAMILIES
+) -> str | None:
+    """
+    Secondary model key to hedge a request with, None when there is none.
+
+    LLM_HEDGE_MODEL_KEY when set, otherwise the next model of the LLM_ROUTER_FAMILIES
+    family serving model_key, the same model served by another provider.
+    Examples:
+    - 'deepseek:deepseek-reasoner' with 'r1=deepseek:deepseek-reasoner|fireworks:deepseek-r1'
+      -> 'fireworks:deepseek-r1'
+    - 'openai:gpt-4o' in no family -> None
+    """
+    if LLM_HEDGE_MODEL_KEY:
+        return LLM_HEDGE_MODEL_KEY if LLM_HEDGE_MODEL_KEY != model_key else None
+    normalized = _normalize_model_key(model_key)
+    for model_keys in parse_router_families(router_families).values():
+        normalized_keys = [_normalize_model_key(key) for key in model_keys]
+        if normalized not in normalized_keys:
+            continue
+        idx = normalized_keys.index(normalized)
+        for other, other_normalized in zip(
+            model_keys[idx + 1 :] + model_keys[:idx],
+            normalized_keys[idx + 1 :] + normalized_keys[:idx],
+        ):
+            if other_normalized != normalized:
+                return other
+    return None
+
+
+class LatencyTracker:
+    """Rolling window of observed latencies per model key."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_key: str, latency_sec: float) -> None:
+        with self._lock:
+            if model_key not in self._samples:
+                self._samples[model_key] = deque(maxlen=self.window)
+            self._samples[model_key].append(latency_sec)
+
+    def percentile(self, model_key: str, percentile: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(model_key, []))
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[idx]
+
+    def count(self, model_key: str) -> int:
+        return len(self._samples.get(model_key, []))
+
+
+class Hedger:
+    """
+    Hedged requests: when the primary call has not returned after a delay (the
+    observed p90 of the primary by default), the same request is sent to a
+    secondary, the first successful response wins and the other is cancelled.
+
+    The sync path runs calls in a thread pool; a losing sync call cannot be
+    interrupted, its result is dropped when it completes.
+    """
+
+    def __init__(
+        self,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        default_delay_sec: float = LLM_HEDGE_DEFAULT_DELAY_SEC,
+        max_workers: int = LLM_HEDGE_MAX_WORKERS,
+    ) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay_sec = default_delay_sec
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm-hedge"
+        )
+        self.hedged = 0
+        self.secondary_wins = 0
+
+    def get_delay_sec(self, model_key: str) -> float:
+        if self.latency.count(model_key) < self.min_samples:
+            return self.default_delay_sec
+        return self.latency.percentile(model_key, self.percentile)
+
+    def _timed(self, model_key: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def timed_fn() -> Any:
+            start = time.perf_counter()
+            result = fn()
+            self.latency.record(model_key, time.perf_counter() - start)
+            return result
+
+        return timed_fn
+
+    def call(
+        self,
+        primary_key: str,
+        primary: Callable[[], Any],
+        secondary_key: str,
+        secondary: Callable[[], Any],
+        delay_sec: float | None = None,
+    ) -> Any:
+        if delay_sec is None:
+            delay_sec = self.get_delay_sec(primary_key)
+
+        primary_future = self._executor.submit(self._timed(primary_key, primary))
+        done, _ = wait([primary_future], timeout=delay_sec)
+        if done:
+            return primary_future.result()
+
+        self.hedged += 1
+        logger.info("Hedge request", primary=primary_key, secondary=secondary_key)
+        secondary_future = self._executor.submit(self._timed(secondary_key, secondary))
+        pending: set[Future] = {primary_future, secondary_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is secondary_future:
+                        self.secondary_wins += 1
+                    return future.result()
+        # Both failed, surface the primary error
+        return primary_future.result()
+
+    async def acall(
+        self,
+        primary_key: str,
+        primary: Callable[[], Awaitable[Any]],
+        secondary_key: str,
+        secondary: Callable[[], Awaitable[Any]],
+        delay_sec: float | None = None,
+    ) -> Any:
+        """Async version of call, the losing request is cancelled."""
+        if delay_sec is None:
+            delay_sec = self.get_delay_sec(primary_key)
+
+        async def timed(model_key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+            start = time.perf_counter()
+            result = await fn()
+            self.latency.record(model_key, time.perf_counter() - start)
+            return result
+
+        primary_task = asyncio.ensure_future(timed(primary_key, primary))
+        tasks = {primary_task}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay_sec)
+            if done:
+                return primary_task.result()
+
+            self.hedged += 1
+            logger.info("Hedge request", primary=primary_key, secondary=secondary_key)
+            secondary_task = asyncio.ensure_future(timed(secondary_key, secondary))
+            tasks.add(secondary_task)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary_task:
+                            self.secondary_wins += 1
+                        return task.result()
+            return primary_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+_HEDGER = Hedger()
+
+
+def get_hedger() -> Hedger:
+    return _HEDGER
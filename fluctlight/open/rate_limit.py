@@ -0,0 +1,263 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from fluctlight.settings import (
+    LLM_RATE_LIMIT_COMPLETION_TOKENS,
+    LLM_RATE_LIMIT_RPM,
+    LLM_RATE_LIMIT_TPM,
+    LLM_RATE_LIMITS,
+)
+
+# Rough cost of an image part, the provider bills by resolution
+_IMAGE_PART_TOKENS = 765
+# Per message overhead of the chat format
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Re-check interval of async waiters that are not at the head of the queue
+_ASYNC_POLL_SEC = 0.01
+
+
+def normalize_model_key(model_key: str) -> str:
+    """
+    Examples:
+    - 'gpt-4o' -> 'openai:gpt-4o'
+    - 'DeepSeek:deepseek-chat' -> 'deepseek:deepseek-chat'
+    """
+    provider, model_id = (
+        model_key.split(":", 1) if ":" in model_key else ("openai", model_key)
+    )
+    return f"{provider.lower()}:{model_id}"
+
+
+def parse_rate_limits(config: str) -> dict[str, tuple[int, int]]:
+    """
+    Parse the per model rate limits as requests and tokens per minute, 0 is unlimited.
+
+    Examples:
+    - 'openai:gpt-4o=500/30000;deepseek:*=60/0'
+      -> {'openai:gpt-4o': (500, 30000), 'deepseek:*': (60, 0)}
+    """
+    limits = {}
+    for entry in config.split(";"):
+        if "=" not in entry:
+            continue
+        model_key, limit = entry.split("=", 1)
+        rpm, _, tpm = limit.partition("/")
+        limits[normalize_model_key(model_key.strip())] = (
+            int(rpm or 0),
+            int(tpm or 0),
+        )
+    return limits
+
+
+def estimate_tokens(messages: list[Any], max_tokens: int | None = None) -> int:
+    """Cheap upper-ish estimate of prompt plus completion tokens, ~4 chars per token."""
+    tokens = 0
+    for message in messages:
+        tokens += _MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            tokens += len(content) // 4
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    tokens += len(part.get("text", "")) // 4
+                else:
+                    tokens += _IMAGE_PART_TOKENS
+    return tokens + (max_tokens or LLM_RATE_LIMIT_COMPLETION_TOKENS)
+
+
+def get_usage_tokens(completion: Any) -> int | None:
+    usage = getattr(completion, "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    return total_tokens if isinstance(total_tokens, int) else None
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to its per minute capacity."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # A request larger than the bucket goes through once the bucket is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Requests and tokens per minute limiter for one model.
+
+    Callers wait in FIFO order, only the head of the queue may take budget so a
+    large request is not starved by smaller ones behind it.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0) -> None:
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._cond = threading.Condition()
+        self._queue: deque[object] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _try_acquire(self, ticket: object, tokens: int) -> float | None:
+        """0 when acquired, else the seconds to wait, None to wait for the queue."""
+        if self._queue[0] is not ticket:
+            return None
+        delay = 0.0
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket:
+                bucket.refill()
+                delay = max(delay, bucket.wait_time(amount))
+        if delay > 0:
+            return delay
+        if self.requests:
+            self.requests.tokens -= 1
+        if self.tokens:
+            self.tokens.tokens -= tokens
+        return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    delay = self._try_acquire(ticket, tokens)
+                    if delay == 0:
+                        return
+                    self._cond.wait(timeout=delay)
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    async def aacquire(self, tokens: int) -> None:
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_acquire(ticket, tokens)
+                if delay == 0:
+                    return
+                await asyncio.sleep(_ASYNC_POLL_SEC if delay is None else delay)
+        finally:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Settle the token estimate with the actual usage, the bucket may go into debt."""
+        if not self.tokens or actual == estimated:
+            return
+        with self._cond:
+            self.tokens.tokens = min(
+                self.tokens.capacity, self.tokens.tokens + estimated - actual
+            )
+            self._cond.notify_all()
+
+
+class RateLimiterRegistry:
+    """
+    Rate limiters by model key, looked up as 'provider:model_id', then
+    'provider:*', then the default limits.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[int, int]] | None = None,
+        default_limits: tuple[int, int] = (0, 0),
+    ) -> None:
+        self.limits = limits or {}
+        self.default_limits = default_limits
+        self._limiters: dict[str, RateLimiter | None] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_key: str) -> RateLimiter | None:
+        model_key = normalize_model_key(model_key)
+        with self._lock:
+            if model_key not in self._limiters:
+                provider = model_key.split(":", 1)[0]
+                rpm, tpm = self.limits.get(
+                    model_key, self.limits.get(f"{provider}:*", self.default_limits)
+                )
+                self._limiters[model_key] = (
+                    RateLimiter(rpm=rpm, tpm=tpm) if rpm > 0 or tpm > 0 else None
+                )
+            return self._limiters[model_key]
+
+    @property
+    def queue_depths(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                model_key: limiter.queue_depth
+                for model_key, limiter in self._limiters.items()
+                if limiter
+            }
+
+    def call(self, model_key: str, fn: Callable[..., Any], **kwargs: Any) -> Any:
+        """Call fn(**kwargs) once the model has budget for the request."""
+        limiter = self.get(model_key)
+        if limiter is None:
+            return fn(**kwargs)
+        estimated = estimate_tokens(
+            kwargs.get("messages", []), kwargs.get("max_tokens")
+        )
+        limiter.acquire(estimated)
+        try:
+            result = fn(**kwargs)
+        except Exception:
+            # A failed request is not billed, the request slot stays consumed
+            limiter.reconcile(estimated, 0)
+            raise
+        actual = get_usage_tokens(result)
+        if actual is not None:
+            limiter.reconcile(estimated, actual)
+        return result
+
+    async def acall(
+        self, model_key: str, fn: Callable[..., Awaitable[Any]], **kwargs: Any
+    ) -> Any:
+        """Async version of call."""
+        limiter = self.get(model_key)
+        if limiter is None:
+            return await fn(**kwargs)
+        estimated = estimate_tokens(
+            kwargs.get("messages", []), kwargs.get("max_tokens")
+        )
+        await limiter.aacquire(estimated)
+        try:
+            result = await fn(**kwargs)
+        except Exception:
+            limiter.reconcile(estimated, 0)
+            raise
+        actual = get_usage_tokens(result)
+        if actual is not None:
+            limiter.reconcile(estimated, actual)
+        return result
+
+
+_RATE_LIMITERS = RateLimiterRegistry(
+    limits=parse_rate_limits(LLM_RATE_LIMITS),
+    default_limits=(LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM),
+)
+
+
+def get_rate_limiters() -> RateLimiterRegistry:
+    return _RATE_LIMITERS
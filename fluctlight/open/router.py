@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+import openai
+
+from fluctlight.logger import get_logger
+from fluctlight.settings import (
+    LLM_ROUTER_BREAKER_COOLDOWN_SEC,
+    LLM_ROUTER_BREAKER_FAILURES,
+    LLM_ROUTER_EWMA_ALPHA,
+    LLM_ROUTER_FAMILIES,
+)
+
+logger = get_logger(__name__)
+
+ROUTER_PROVIDER = "auto"
+
+# Latency assumed for a provider before it has been observed, so new ones get traffic
+_DEFAULT_LATENCY_SEC = 1.0
+# How much a recent error rate inflates a provider's latency score
+_ERROR_PENALTY = 10.0
+
+
+def is_router_model_key(model_key: str) -> bool:
+    return model_key.lower().startswith(f"{ROUTER_PROVIDER}:")
+
+
+def parse_router_families(config: str) -> dict[str, list[str]]:
+    """
+    Parse the model family routes.
+
+    Examples:
+    - 'r1=deepseek:deepseek-reasoner|fireworks:deepseek-r1;gpt-4o=openai:gpt-4o'
+      -> {'r1': ['deepseek:deepseek-reasoner', 'fireworks:deepseek-r1'], 'gpt-4o': ['openai:gpt-4o']}
+    """
+    families = {}
+    for route in config.split(";"):
+        if "=" not in route:
+            continue
+        family, model_keys = route.split("=", 1)
+        families[family.strip()] = [
+            k.strip() for k in model_keys.split("|") if k.strip()
+        ]
+    return families
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """429, 5xx and connection errors are worth trying on another provider."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+
+class ProviderStats:
+    """EWMA of latency and error rate with a consecutive failure circuit breaker."""
+
+    def __init__(self, alpha: float) -> None:
+        self.alpha = alpha
+        self.latency_sec: float | None = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_success(self, latency_sec: float) -> None:
+        if self.latency_sec is None:
+            self.latency_sec = latency_sec
+        else:
+            self.latency_sec += self.alpha * (latency_sec - self.latency_sec)
+        self.error_rate -= self.alpha * self.error_rate
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, max_failures: int, cooldown_sec: float) -> None:
+        self.error_rate += self.alpha * (1.0 - self.error_rate)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= max_failures:
+            self.open_until = time.monotonic() + cooldown_sec
+
+    @property
+    def is_open(self) -> bool:
+        """Circuit broken, half open again once the cooldown passed."""
+        return self.open_until > time.monotonic()
+
+    @property
+    def score(self) -> float:
+        latency = _DEFAULT_LATENCY_SEC if self.latency_sec is None else self.latency_sec
+        return latency * (1.0 + _ERROR_PENALTY * self.error_rate)
+
+
+class ModelRouter:
+    """
+    Route `auto:<model-family>` model keys across the providers serving the family.
+
+    The first candidate is picked at random weighted by 1/score to spread load,
+    the rest follow in score order as failover. Circuit broken providers are
+    skipped unless all of them are broken.
+    """
+
+    def __init__(
+        self,
+        families: dict[str, list[str]] | None = None,
+        alpha: float = LLM_ROUTER_EWMA_ALPHA,
+        max_failures: int = LLM_ROUTER_BREAKER_FAILURES,
+        cooldown_sec: float = LLM_ROUTER_BREAKER_COOLDOWN_SEC,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.families = families or {}
+        self.alpha = alpha
+        self.max_failures = max_failures
+        self.cooldown_sec = cooldown_sec
+        self.rng = rng or random.Random()
+        self.stats: dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def get_family_model_keys(self, family: str) -> list[str]:
+        """
+        The model keys configured for the family. A family not configured raises
+        ValueError, the providers don't serve a model under one shared name.
+        """
+        if not self.families.get(family):
+            raise ValueError(
+                f"Model family {family} is not configured in LLM_ROUTER_FAMILIES"
+            )
+        return self.families[family]
+
+    def _get_stats(self, model_key: str) -> ProviderStats:
+        if model_key not in self.stats:
+            self.stats[model_key] = ProviderStats(alpha=self.alpha)
+        return self.stats[model_key]
+
+    def candidates(self, model_key: str) -> list[str]:
+        """Ordered model keys to try for a router model key."""
+        family = model_key.split(":", 1)[1]
+        with self._lock:
+            model_keys = self.get_family_model_keys(family)
+            healthy = [k for k in model_keys if not self._get_stats(k).is_open]
+            broken = [k for k in model_keys if k not in healthy]
+            healthy.sort(key=lambda k: self._get_stats(k).score)
+            broken.sort(key=lambda k: self._get_stats(k).open_until)
+            if len(healthy) > 1:
+                weights = [1.0 / max(self._get_stats(k).score, 1e-6) for k in healthy]
+                first = self.rng.choices(healthy, weights=weights, k=1)[0]
+                healthy.remove(first)
+                healthy.insert(0, first)
+        return healthy + broken
+
+    def record_success(self, model_key: str, latency_sec: float) -> None:
+        with self._lock:
+            self._get_stats(model_key).record_success(latency_sec)
+
+    def record_failure(self, model_key: str) -> None:
+        with self._lock:
+            self._get_stats(model_key).record_failure(
+                max_failures=self.max_failures, cooldown_sec=self.cooldown_sec
+            )
+
+    def call(self, model_key: str, fn: Callable[[str], Any]) -> Any:
+        """Call fn with each candidate model key until one succeeds."""
+        candidates = self.candidates(model_key)
+        for idx, candidate in enumerate(candidates):
+            start = time.perf_counter()
+            try:
+                result = fn(candidate)
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                self.record_failure(candidate)
+                if idx == len(candidates) - 1:
+                    raise
+                logger.warning("Router failover", model_key=candidate, err=str(e))
+                continue
+            self.record_success(candidate, time.perf_counter() - start)
+            return result
+        raise ValueError(f"No provider configured for {model_key}")
+
+    async def acall(self, model_key: str, fn: Callable[[str], Awaitable[Any]]) -> Any:
+        """Async version of call."""
+        candidates = self.candidates(model_key)
+        for idx, candidate in enumerate(candidates):
+            start = time.perf_counter()
+            try:
+                result = await fn(candidate)
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                self.record_failure(candidate)
+                if idx == len(candidates) - 1:
+                    raise
+                logger.warning("Router failover", model_key=candidate, err=str(e))
+                continue
+            self.record_success(candidate, time.perf_counter() - start)
+            return result
+        raise ValueError(f"No provider configured for {model_key}")
+
+
+_MODEL_ROUTER = ModelRouter(families=parse_router_families(LLM_ROUTER_FAMILIES))
+
+
+def get_model_router() -> ModelRouter:
+    return _MODEL_ROUTER
@@ -1,3 +1,7 @@
+_THINK_START_TAG = "<think>"
+_THINK_END_TAG = "</think>"
+
+
 def extract_think_message(text: str) -> list[str]:
     """Extract the think message from the response text.
     example:  "<think>abc</think>xyz" => [abc, xyz]
@@ -8,11 +12,11 @@ def extract_think_message(text: str) -> list[str]:
     Returns:
         list[str]: List containing [think_content, remaining_text] or [text] if no think tags
     """
-    if "<think>" not in text or "</think>" not in text:
+    if _THINK_START_TAG not in text or _THINK_END_TAG not in text:
         return [text]
 
-    start_tag = "<think>"
-    end_tag = "</think>"
+    start_tag = _THINK_START_TAG
+    end_tag = _THINK_END_TAG
 
     try:
         start_idx = text.index(start_tag)
@@ -27,3 +31,102 @@ def extract_think_message(text: str) -> list[str]:
         return [think_content.strip(), remaining_text.strip()]
     except ValueError:
         return [text]
+
+
+def _partial_tag_suffix_len(text: str, tag: str) -> int:
+    """Length of the longest suffix of text which is a proper prefix of tag."""
+    for size in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkMessageSplitter:
+    """Incremental version of extract_think_message for streamed deltas.
+
+    Feed the deltas in order, each call returns the (think, answer) text that can
+    be shown so far. Text that may be the beginning of a tag split across deltas
+    is held back until the next feed or finish.
+
+    Only a leading `<think>` (after whitespace) opens a think section, the same
+    as a reasoning model output; otherwise everything is the answer.
+    example:  feed("<thi"), feed("nk>abc</th"), feed("ink>xyz") => think "abc", answer "xyz"
+    """
+
+    _START = "START"
+    _THINK = "THINK"
+    _ANSWER = "ANSWER"
+
+    def __init__(self) -> None:
+        self._state = self._START
+        self._pending = ""
+        self._strip_leading = True
+        self.think = ""
+        self.answer = ""
+
+    @property
+    def in_think(self) -> bool:
+        return self._state == self._THINK
+
+    def feed(self, delta: str) -> tuple[str, str]:
+        self._pending += delta
+        think_delta, answer_delta = "", ""
+
+        if self._state == self._START:
+            text = self._pending.lstrip()
+            if text.startswith(_THINK_START_TAG):
+                self._pending = text[len(_THINK_START_TAG) :]
+                self._state = self._THINK
+            elif _THINK_START_TAG.startswith(text):
+                # Still may be a think tag, wait for more deltas
+                return think_delta, answer_delta
+            else:
+                self._state = self._ANSWER
+
+        if self._state == self._THINK:
+            if _THINK_END_TAG in self._pending:
+                think_part, self._pending = self._pending.split(_THINK_END_TAG, 1)
+                think_delta = self._emit_think(think_part)
+                self._state = self._ANSWER
+                self._strip_leading = True
+            else:
+                hold = _partial_tag_suffix_len(self._pending, _THINK_END_TAG)
+                think_delta = self._emit_think(
+                    self._pending[: len(self._pending) - hold]
+                )
+                self._pending = self._pending[len(self._pending) - hold :]
+                return think_delta, answer_delta
+
+        if self._state == self._ANSWER:
+            answer_delta = self._emit_answer(self._pending)
+            self._pending = ""
+
+        return think_delta, answer_delta
+
+    def finish(self) -> tuple[str, str]:
+        """Flush the held back text once the stream ends.
+
+        An unclosed think section stays as think since it was already shown as such.
+        """
+        think_delta, answer_delta = "", ""
+        if self._state == self._THINK:
+            think_delta = self._emit_think(self._pending)
+        elif self._pending:
+            answer_delta = self._emit_answer(self._pending)
+        self._pending = ""
+        self._state = self._ANSWER
+        return think_delta, answer_delta
+
+    def _emit_think(self, text: str) -> str:
+        if self._strip_leading:
+            text = text.lstrip()
+            self._strip_leading = not text
+        self.think += text
+        return text
+
+    def _emit_answer(self, text: str) -> str:
+        if self._strip_leading:
+            text = text.lstrip()
+            self._strip_leading = not text
+        self.answer += text
+        return text
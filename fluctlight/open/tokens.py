@@ -0,0 +1,96 @@
+from functools import lru_cache
+from typing import Any
+
+import tiktoken
+
+from fluctlight.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Encoding of the models tiktoken doesn't know, e.g. deepseek
+_FALLBACK_ENCODING = "o200k_base"
+# Per message overhead of the chat format
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Image cost by detail, see https://platform.openai.com/docs/guides/vision
+_IMAGE_LOW_DETAIL_TOKENS = 85
+_IMAGE_HIGH_DETAIL_TOKENS = 765
+
+_SYSTEM_ROLES = ("system", "developer")
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model_id: str) -> tiktoken.Encoding | None:
+    """Encoding of a model, None when it can not be loaded (e.g. offline)."""
+    # Drop the provider of a model key, e.g. 'openai:gpt-4o'
+    model_id = model_id.split(":", 1)[-1]
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_id)
+        except KeyError:
+            return tiktoken.get_encoding(_FALLBACK_ENCODING)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning(
+            "Fallback to approximate token count", model=model_id, err=str(e)
+        )
+        return None
+
+
+def count_text_tokens(text: str, model_id: str) -> int:
+    encoding = get_encoding(model_id)
+    if encoding is None:
+        # ~4 chars per token for english text
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: dict[str, Any], model_id: str) -> int:
+    tokens = _MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_text_tokens(content, model_id)
+    elif isinstance(content, list):
+        for part in content:
+            if part["type"] == "text":
+                tokens += count_text_tokens(part["text"], model_id)
+            elif part["type"] == "image_url":
+                detail = part["image_url"].get("detail", "auto")
+                tokens += (
+                    _IMAGE_LOW_DETAIL_TOKENS
+                    if detail == "low"
+                    else _IMAGE_HIGH_DETAIL_TOKENS
+                )
+    return tokens
+
+
+def count_messages_tokens(messages: list[dict[str, Any]], model_id: str) -> int:
+    return sum(count_message_tokens(message, model_id) for message in messages)
+
+
+def fit_to_token_budget(
+    messages: list[dict[str, Any]], budget: int, model_id: str
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Keep the leading system prompt plus the most recent messages within the token
+    budget, returns (kept, dropped) with dropped in conversation order.
+
+    The last message is always kept, and the kept history never starts with an
+    assistant message so it reads as a conversation.
+    """
+    head = []
+    for message in messages:
+        if message["role"] not in _SYSTEM_ROLES:
+            break
+        head.append(message)
+    turns = messages[len(head) :]
+
+    remaining = budget - count_messages_tokens(head, model_id)
+    start = len(turns)
+    while start > 0:
+        tokens = count_message_tokens(turns[start - 1], model_id)
+        if tokens > remaining and start < len(turns):
+            break
+        remaining -= tokens
+        start -= 1
+    while start < len(turns) - 1 and turns[start]["role"] == "assistant":
+        start += 1
+    return head + turns[start:], turns[:start]
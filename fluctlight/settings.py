@@ -1,3 +1,5 @@
+import os
+
 from fluctlight.utt.config import (
     config_default,
     config_default_bool,
@@ -12,6 +14,8 @@ LOG_LEVEL = config_default("LOG_LEVEL", "INFO")
 DEBUG_MODE = config_default_bool("DEBUG_MODE", False)  # For debug print
 TEST_MODE = config_default_bool("TEST_MODE", False)  # For unit test
 APP_PORT = config_default_int("APP_PORT", 3000)
+## Debug log of the queue and state store gauges, once per interval at most
+GAUGES_LOG_INTERVAL_SEC = config_default_float("GAUGES_LOG_INTERVAL_SEC", 60)
 
 BOT_CLIENT = config_default("BOT_CLIENT", "SLACK").upper()
 
@@ -59,13 +63,96 @@ GPT_VISION_MODEL = config_default("GPT_VISION_MODEL", "gpt-4o")
 ## Use for reason
 GPT_REASON_MODEL = config_default("GPT_REASON_MODEL", "o1")
 
+# Token budget of a chat thread history sent to the model, 0 is unlimited
+CHAT_HISTORY_TOKEN_BUDGET = config_default_int("CHAT_HISTORY_TOKEN_BUDGET", 8000)
+## Fold the dropped turns into a rolling summary with a cheap model in background
+CHAT_HISTORY_SUMMARY_ENABLED = config_default_bool("CHAT_HISTORY_SUMMARY_ENABLED", True)
+CHAT_HISTORY_SUMMARY_MODEL = config_default("CHAT_HISTORY_SUMMARY_MODEL", "gpt-4o-mini")
+## Dropped messages collected before they are folded into the summary
+CHAT_HISTORY_SUMMARY_BATCH = config_default_int("CHAT_HISTORY_SUMMARY_BATCH", 6)
+## Max messages of a character thread history before the older half is folded
+CHAR_HISTORY_MAX_MESSAGES = config_default_int("CHAR_HISTORY_MAX_MESSAGES", 40)
+## Images are sent inline on their turn only, later turns carry a vision caption
+CHAT_IMAGE_CAPTION_ENABLED = config_default_bool("CHAT_IMAGE_CAPTION_ENABLED", True)
+CHAT_IMAGE_CAPTION_MODEL = config_default("CHAT_IMAGE_CAPTION_MODEL", "gpt-4o-mini")
+## Latest images sent again when the user refers back to an image, 0 to disable
+CHAT_IMAGE_REINCLUDE_LIMIT = config_default_int("CHAT_IMAGE_REINCLUDE_LIMIT", 1)
+
+# LLM response cache for structure output completion
+LLM_CACHE_ENABLED = config_default_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_MAX_SIZE = config_default_int("LLM_CACHE_MAX_SIZE", 1024)
+LLM_CACHE_TTL_SEC = config_default_float("LLM_CACHE_TTL_SEC", 3600)
+## Optional on-disk tier, disabled when empty
+LLM_CACHE_SQLITE_PATH = config_default("LLM_CACHE_SQLITE_PATH", "")
+
+# Coalesce identical in-flight completion requests into one upstream call
+LLM_SINGLE_FLIGHT_ENABLED = config_default_bool("LLM_SINGLE_FLIGHT_ENABLED", True)
+
+# Router for `auto:<model-family>` model keys across OPENAI_ALTERNATES providers
+## Families as `family=provider:model|provider:model;family2=...`, a family not
+## configured fails the call
+LLM_ROUTER_FAMILIES = config_default("LLM_ROUTER_FAMILIES", "")
+LLM_ROUTER_EWMA_ALPHA = config_default_float("LLM_ROUTER_EWMA_ALPHA", 0.2)
+LLM_ROUTER_BREAKER_FAILURES = config_default_int("LLM_ROUTER_BREAKER_FAILURES", 3)
+LLM_ROUTER_BREAKER_COOLDOWN_SEC = config_default_float(
+    "LLM_ROUTER_BREAKER_COOLDOWN_SEC", 30
+)
+
+# Hedged chat completions, a slow primary is raced against a secondary provider
+LLM_HEDGE_ENABLED = config_default_bool("LLM_HEDGE_ENABLED", False)
+## Secondary `provider:model`, defaults to the next model of the LLM_ROUTER_FAMILIES
+## family serving the primary, no hedging without one
+LLM_HEDGE_MODEL_KEY = config_default("LLM_HEDGE_MODEL_KEY", "")
+## Hedge after the observed latency percentile of the primary, or the default
+## delay until LLM_HEDGE_MIN_SAMPLES latencies have been observed
+LLM_HEDGE_PERCENTILE = config_default_float("LLM_HEDGE_PERCENTILE", 90)
+LLM_HEDGE_MIN_SAMPLES = config_default_int("LLM_HEDGE_MIN_SAMPLES", 20)
+LLM_HEDGE_DEFAULT_DELAY_SEC = config_default_float("LLM_HEDGE_DEFAULT_DELAY_SEC", 5)
+LLM_HEDGE_MAX_WORKERS = config_default_int("LLM_HEDGE_MAX_WORKERS", 16)
+
+# Client side rate limits per model, requests wait in a queue for budget
+## `provider:model=rpm/tpm;provider:*=rpm/tpm`, 0 is unlimited
+LLM_RATE_LIMITS = config_default("LLM_RATE_LIMITS", "")
+## Limits of the models not listed in LLM_RATE_LIMITS
+LLM_RATE_LIMIT_RPM = config_default_int("LLM_RATE_LIMIT_RPM", 0)
+LLM_RATE_LIMIT_TPM = config_default_int("LLM_RATE_LIMIT_TPM", 0)
+## Completion tokens assumed before the call when max_tokens is not set
+LLM_RATE_LIMIT_COMPLETION_TOKENS = config_default_int(
+    "LLM_RATE_LIMIT_COMPLETION_TOKENS", 512
+)
+
 # FIREWORKS API KEY, alt to OpenAI
 FIREWORKS_API_KEY = config_default("FIREWORKS_API_KEY")
 
 # Intent matching config
 INTENT_CHAR_MATCHING = config_default_bool("INTENT_CHAR_MATCHING", False)
 INTENT_LLM_MATCHING = config_default_bool("INTENT_LLM_MATCHING", False)
+## Match in one structured output call constrained to the intent keys, instead of
+## the match and refine calls
+INTENT_LLM_STRUCTURED_MATCHING = config_default_bool(
+    "INTENT_LLM_STRUCTURED_MATCHING", False
+)
+INTENT_LLM_STRUCTURED_MODEL = config_default(
+    "INTENT_LLM_STRUCTURED_MODEL", "gpt-4o-mini"
+)
 INTENT_EMOJI_MATCHING = config_default_bool("INTENT_EMOJI_MATCHING", True)
+## For INTENT_LLM_MATCHING, match by embedding similarity with the agent descriptions
+## first, the LLM is only called when the top two intents are within the margin
+INTENT_EMBEDDING_MATCHING = config_default_bool("INTENT_EMBEDDING_MATCHING", True)
+INTENT_EMBEDDING_MODEL = config_default(
+    "INTENT_EMBEDDING_MODEL", "text-embedding-3-small"
+)
+INTENT_EMBEDDING_MARGIN = config_default_float("INTENT_EMBEDDING_MARGIN", 0.05)
+## LLM matched intents cached across threads by normalized text
+INTENT_CACHE_ENABLED = config_default_bool("INTENT_CACHE_ENABLED", True)
+INTENT_CACHE_MAX_SIZE = config_default_int("INTENT_CACHE_MAX_SIZE", 4096)
+INTENT_CACHE_TTL_SEC = config_default_float("INTENT_CACHE_TTL_SEC", 3600)
+## Log the LLM matched (text, intent) examples, to train the local classifier with
+## `fluctlight train-intent-classifier`, empty to disable
+INTENT_EXAMPLES_PATH = config_default("INTENT_EXAMPLES_PATH", "")
+## Local classifier tried before the LLM, its match is used over the threshold
+INTENT_CLASSIFIER_PATH = config_default("INTENT_CLASSIFIER_PATH", "")
+INTENT_CLASSIFIER_THRESHOLD = config_default_float("INTENT_CLASSIFIER_THRESHOLD", 0.9)
 
 # For INTENT_CHAR_MATCHING
 CHAR_AGENT_BIND = config_default("CHAR_AGENT_BIND")
@@ -79,6 +166,76 @@ USE_SQL_CHAR_DB = config_default_bool("USE_SQL_CHAR_DB", False)
 # Default tmp path
 TMP_PATH = config_default("TMP", "/tmp/")
 
+# Prompt templates, compiled once in a sandboxed Jinja environment
+TEMPLATE_CACHE_MAX_SIZE = config_default_int("TEMPLATE_CACHE_MAX_SIZE", 1024)
+## Directory of the compiled template bytecode shared across processes, empty to
+## only keep the compiled templates in memory
+TEMPLATE_BYTECODE_CACHE_DIR = config_default("TEMPLATE_BYTECODE_CACHE_DIR", "")
+
+# Task workflows run the ready nodes that take no input message concurrently
+WORKFLOW_PARALLEL_NODES = config_default_bool("WORKFLOW_PARALLEL_NODES", False)
+WORKFLOW_MAX_WORKERS = config_default_int("WORKFLOW_MAX_WORKERS", 4)
+## Default of the validated nodes to produce their output and the success criteria
+## check in one LLM call instead of two, TaskNodeValidation.fused per node
+WORKFLOW_FUSED_VALIDATION = config_default_bool("WORKFLOW_FUSED_VALIDATION", False)
+
+# Per-thread conversation state of each agent and intent matcher, evicted LRU over
+# the entries or approximate bytes bounds and after the idle time, 0 is unlimited
+STATE_STORE_MAX_ENTRIES = config_default_int("STATE_STORE_MAX_ENTRIES", 1000)
+STATE_STORE_MAX_BYTES = config_default_int("STATE_STORE_MAX_BYTES", 64 * 1024 * 1024)
+STATE_STORE_IDLE_TTL_SEC = config_default_float("STATE_STORE_IDLE_TTL_SEC", 24 * 3600)
+## Durable thread state so a restart doesn't lose conversations, written behind in
+## batches and loaded on first access: none, sqlite (STATE_SQLITE_PATH, WAL) or
+## sqlalchemy (SQLALCHEMY_DATABASE_URL)
+STATE_BACKEND = config_default(
+    "STATE_BACKEND", "none", accept_values=["none", "sqlite", "sqlalchemy"]
+)
+STATE_SQLITE_PATH = config_default(
+    "STATE_SQLITE_PATH", os.path.join(TMP_PATH, "thread_state.db")
+)
+STATE_FLUSH_INTERVAL_SEC = config_default_float("STATE_FLUSH_INTERVAL_SEC", 1)
+STATE_FLUSH_BATCH = config_default_int("STATE_FLUSH_BATCH", 100)
+## Rows idle longer than STATE_STORE_IDLE_TTL_SEC are deleted this often, 0 never
+STATE_PRUNE_INTERVAL_SEC = config_default_float("STATE_PRUNE_INTERVAL_SEC", 3600)
+
+# Shared HTTP clients of the outbound I/O, kept alive and reused across calls
+HTTP_MAX_CONNECTIONS = config_default_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = config_default_int(
+    "HTTP_MAX_KEEPALIVE_CONNECTIONS", 20
+)
+HTTP_KEEPALIVE_EXPIRY_SEC = config_default_float("HTTP_KEEPALIVE_EXPIRY_SEC", 30)
+## Requests in flight to one host, 0 is only bounded by HTTP_MAX_CONNECTIONS
+HTTP_MAX_CONNECTIONS_PER_HOST = config_default_int("HTTP_MAX_CONNECTIONS_PER_HOST", 10)
+HTTP_TIMEOUT_SEC = config_default_float("HTTP_TIMEOUT_SEC", 60)
+HTTP_CONNECT_TIMEOUT_SEC = config_default_float("HTTP_CONNECT_TIMEOUT_SEC", 10)
+## Read timeout of the media uploads and downloads, e.g. audio to transcribe
+HTTP_MEDIA_TIMEOUT_SEC = config_default_float("HTTP_MEDIA_TIMEOUT_SEC", 300)
+## HTTP/2 is used when the `h2` package is installed
+HTTP_HTTP2_ENABLED = config_default_bool("HTTP_HTTP2_ENABLED", True)
+
+# Attachment processing
+## Downloads over the size are rejected while streaming, 0 is unlimited
+MEDIA_MAX_BYTES = config_default_int("MEDIA_MAX_BYTES", 20 * 1024 * 1024)
+## Attachments of a message downloaded and transcribed in parallel
+ATTACHMENT_MAX_WORKERS = config_default_int("ATTACHMENT_MAX_WORKERS", 4)
+ATTACHMENT_TIMEOUT_SEC = config_default_float("ATTACHMENT_TIMEOUT_SEC", 60)
+## Content addressed cache of downloaded attachments, transcripts and captions
+ATTACHMENT_CACHE_ENABLED = config_default_bool("ATTACHMENT_CACHE_ENABLED", True)
+ATTACHMENT_CACHE_DIR = config_default(
+    "ATTACHMENT_CACHE_DIR", os.path.join(TMP_PATH, "attachment_cache")
+)
+ATTACHMENT_CACHE_MAX_BYTES = config_default_int(
+    "ATTACHMENT_CACHE_MAX_BYTES", 512 * 1024 * 1024
+)
+## Images are downscaled to fit IMAGE_MAX_SIDE (512 for `low` detail vision) and
+## re-encoded in a process pool before vision calls, 0 sends them as uploaded
+IMAGE_MAX_SIDE = config_default_int("IMAGE_MAX_SIDE", 512)
+IMAGE_ENCODE_FORMAT = config_default(
+    "IMAGE_ENCODE_FORMAT", "JPEG", accept_values=["JPEG", "WEBP"]
+)
+IMAGE_ENCODE_QUALITY = config_default_int("IMAGE_ENCODE_QUALITY", 85)
+IMAGE_PROCESS_WORKERS = config_default_int("IMAGE_PROCESS_WORKERS", 2)
+
 # TTS section
 TTS_ENGINE = config_default("TTS_ENGINE", "ELEVEN_LABS")
 # TTS API
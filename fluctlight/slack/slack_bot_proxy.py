@@ -5,6 +5,7 @@ from fluctlight.agents.character import create_default_character_agent
 from fluctlight.agents.message_intent_agent import MessageIntentAgent
 from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
 from fluctlight.core.bot_proxy import BotProxy
+from fluctlight.core.gauges import log_gauges
 from fluctlight.data_model.slack import MessageEvent
 from fluctlight.intent.intent_matcher_base import IntentMatcher
 from fluctlight.logger import get_logger
@@ -48,6 +49,7 @@ class SlackBotProxy(BotProxy, MessagesFetcher, SlackChat, SlackReaction, Singlet
         )
 
     def on_message(self, message: MessageEvent) -> None:
+        log_gauges()
         if not self._should_reply(message):
             return
         imessage = self.adapter.cast_message(message)
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Optional, Type
 
@@ -15,6 +16,10 @@ class Task(ABC):
     def process(self, *args: Any, **kwds: Any) -> Any:
         pass
 
+    async def aprocess(self, *args: Any, **kwds: Any) -> Any:
+        """Async version of process, default to run process in a worker thread."""
+        return await asyncio.to_thread(self.process, *args, **kwds)
+
     def should_process(self, *args: Any, **kwds: Any) -> bool:  # pylint: disable=unused-argument
         return True
 
@@ -33,6 +38,19 @@ class Task(ABC):
         else:
             return self.fallback_process(*args, **kwds)
 
+    async def acall(self, *args: Any, **kwds: Any) -> Any:
+        """Async version of __call__, awaiting aprocess instead of process."""
+        if self.preprocess_hook:
+            args, kwds = self.preprocess_hook(*args, **kwds)
+
+        if self.should_process(*args, **kwds):
+            result = await self.aprocess(*args, **kwds)
+            if self.postprocess_hook:
+                result = self.postprocess_hook(result)
+            return result
+        else:
+            return self.fallback_process(*args, **kwds)
+
     def _require_input(
         self,
         kwargs: dict[str, Any],
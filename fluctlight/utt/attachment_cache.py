@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import structlog
+
+from fluctlight.settings import (
+    ATTACHMENT_CACHE_DIR,
+    ATTACHMENT_CACHE_ENABLED,
+    ATTACHMENT_CACHE_MAX_BYTES,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Derived artifact kinds
+TRANSCRIPT = "transcript"
+CAPTION = "caption"
+
+
+def attachment_key(attachment_id: str | int) -> str:
+    return f"attachment:{attachment_id}"
+
+
+class AttachmentCache:
+    """
+    Content addressed cache of attachments.
+
+    An attachment key (attachment id, or url) maps to the sha256 of its content, the
+    raw bytes are stored once per hash on disk, evicted LRU over max_bytes. Derived
+    artifacts (transcripts, captions) are indexed by content hash, so a file shared
+    again under another id reuses them.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.db"), check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS attachment_keys "
+                "(key TEXT PRIMARY KEY, sha256 TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS attachment_blobs "
+                "(sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS attachment_artifacts "
+                "(sha256 TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (sha256, kind))"
+            )
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM attachment_blobs"
+            ).fetchone()
+        self.total_bytes = total
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256[:2], sha256)
+
+    def content_hash(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM attachment_keys WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_bytes(self, key: str) -> bytes | None:
+        sha256 = self.content_hash(key)
+        if sha256 is None:
+            return None
+        try:
+            with open(self._blob_path(sha256), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE attachment_blobs SET accessed = ? WHERE sha256 = ?",
+                (time.time(), sha256),
+            )
+        return content
+
+    def put_bytes(self, key: str, content: bytes) -> str:
+        """Store the content of a key, returns its content hash."""
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(sha256)
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM attachment_blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if not exists and len(content) <= self.max_bytes:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+                self.total_bytes += len(content)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO attachment_keys VALUES (?, ?)",
+                    (key, sha256),
+                )
+                if not exists and len(content) <= self.max_bytes:
+                    self._conn.execute(
+                        "INSERT INTO attachment_blobs VALUES (?, ?, ?)",
+                        (sha256, len(content), time.time()),
+                    )
+            self._evict()
+        return sha256
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used blobs over max_bytes with the keys and artifacts
+        of their content, called with the lock.
+        """
+        if self.total_bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT sha256, size FROM attachment_blobs ORDER BY accessed"
+        ).fetchall()
+        with self._conn:
+            for sha256, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._blob_path(sha256))
+                except FileNotFoundError:
+                    pass
+                for table in (
+                    "attachment_blobs",
+                    "attachment_keys",
+                    "attachment_artifacts",
+                ):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE sha256 = ?", (sha256,)
+                    )
+                self.total_bytes -= size
+                logger.debug("Evict attachment", sha256=sha256, size=size)
+
+    def get_artifact(self, key: str, kind: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT a.value FROM attachment_keys k JOIN attachment_artifacts a "
+                "ON k.sha256 = a.sha256 WHERE k.key = ? AND a.kind = ?",
+                (key, kind),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_artifact(self, key: str, kind: str, value: str) -> None:
+        """Index a derived artifact by the content hash of a key already stored."""
+        sha256 = self.content_hash(key)
+        if sha256 is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO attachment_artifacts VALUES (?, ?, ?)",
+                (sha256, kind, value),
+            )
+
+
+_ATTACHMENT_CACHE: AttachmentCache | None = None
+_ATTACHMENT_CACHE_LOCK = threading.Lock()
+
+
+def get_attachment_cache() -> AttachmentCache | None:
+    """The shared attachment cache, None when disabled."""
+    global _ATTACHMENT_CACHE  # pylint: disable=global-statement
+    if not ATTACHMENT_CACHE_ENABLED:
+        return None
+    with _ATTACHMENT_CACHE_LOCK:
+        if _ATTACHMENT_CACHE is None:
+            _ATTACHMENT_CACHE = AttachmentCache(
+                cache_dir=ATTACHMENT_CACHE_DIR, max_bytes=ATTACHMENT_CACHE_MAX_BYTES
+            )
+    return _ATTACHMENT_CACHE
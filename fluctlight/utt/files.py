@@ -1,18 +1,38 @@
 import base64
+import io
+import mimetypes
+import multiprocessing
 import os
+import threading
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
 from typing import Any
 from urllib.parse import urlparse
 
-import requests
+import httpx
 import structlog
+from PIL import Image, ImageOps
 
-from fluctlight.settings import TMP_PATH
+from fluctlight.settings import (
+    IMAGE_ENCODE_FORMAT,
+    IMAGE_ENCODE_QUALITY,
+    IMAGE_MAX_SIDE,
+    IMAGE_PROCESS_WORKERS,
+    MEDIA_MAX_BYTES,
+    TMP_PATH,
+)
+from fluctlight.utt.attachment_cache import get_attachment_cache
+from fluctlight.utt.http import get_http_pool
 
 logger = structlog.get_logger(__name__)
 
 
+class MediaTooLargeError(ValueError):
+    pass
+
+
 @lru_cache(maxsize=128)
 def read_file_content(file_path: str, length: int = 0) -> str:
     with open(file_path, "r", encoding="utf8") as file:
@@ -34,7 +54,8 @@ def download_slack_downloadable(url: str, token: str) -> str:
     local_path = f"{TMP_PATH}/{filename}.{ext}"
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers, timeout=60)
+    pool = get_http_pool()
+    response = pool.request("GET", url, headers=headers, timeout=pool.media_timeout)
     response.raise_for_status()
     with open(local_path, "wb") as f:
         f.write(response.content)
@@ -48,18 +69,175 @@ def download_slack_downloadable(url: str, token: str) -> str:
     return local_path
 
 
-def download_media(url: str, bearer_token: str | None = None, timeout: int = 60) -> Any:
+def download_media(
+    url: str,
+    bearer_token: str | None = None,
+    timeout: float | None = None,
+    max_bytes: int = MEDIA_MAX_BYTES,
+    cache_key: str | None = None,
+) -> Any:
+    """
+    Download the media content, streamed so a file over max_bytes is rejected with
+    MediaTooLargeError before it is read into memory. max_bytes <= 0 is unlimited.
+
+    The attachment cache is consulted first by cache_key, the url by default. The
+    timeout, HTTP_MEDIA_TIMEOUT_SEC unless given, bounds each read and the whole
+    download, a slow trickling server raises httpx.ReadTimeout once it is over.
+    """
+    cache = get_attachment_cache()
+    cache_key = cache_key or url
+    if cache:
+        content = cache.get_bytes(cache_key)
+        if content is not None:
+            return content
+    content = _download_media(url, bearer_token, timeout, max_bytes)
+    if cache:
+        cache.put_bytes(cache_key, content)
+    return content
+
+
+def _download_media(
+    url: str, bearer_token: str | None, timeout: float | None, max_bytes: int
+) -> bytes:
     if bearer_token:
         headers = {"Authorization": f"Bearer {bearer_token}"}
     else:
         headers = {}
-    response = requests.get(url, headers=headers, timeout=timeout)
-    response.raise_for_status()
-    return response.content
+    pool = get_http_pool()
+    duration_sec = pool.media_timeout.read if timeout is None else timeout
+    deadline = time.monotonic() + duration_sec
+    with pool.stream(
+        "GET",
+        url,
+        headers=headers,
+        timeout=pool.media_timeout if timeout is None else timeout,
+    ) as response:
+        response.raise_for_status()
+        content_length = response.headers.get("Content-Length")
+        if 0 < max_bytes < int(content_length or 0):
+            raise MediaTooLargeError(f"{url} is {content_length} bytes > {max_bytes}")
+        content = bytearray()
+        for chunk in response.iter_bytes():
+            content.extend(chunk)
+            if 0 < max_bytes < len(content):
+                raise MediaTooLargeError(f"{url} is over {max_bytes} bytes")
+            if time.monotonic() > deadline:
+                raise httpx.ReadTimeout(
+                    f"{url} took over {duration_sec}s", request=response.request
+                )
+        return bytes(content)
 
 
 def base64_encode_media(
-    url: str, bearer_token: str | None = None, timeout: int = 60
+    url: str,
+    bearer_token: str | None = None,
+    timeout: float | None = None,
+    max_bytes: int = MEDIA_MAX_BYTES,
+    cache_key: str | None = None,
 ) -> str:
-    content = download_media(url=url, bearer_token=bearer_token, timeout=timeout)
+    content = download_media(
+        url=url,
+        bearer_token=bearer_token,
+        timeout=timeout,
+        max_bytes=max_bytes,
+        cache_key=cache_key,
+    )
     return base64.b64encode(content).decode("utf-8")
+
+
+def downscale_image(
+    content: bytes,
+    max_side: int = IMAGE_MAX_SIDE,
+    image_format: str = IMAGE_ENCODE_FORMAT,
+    quality: int = IMAGE_ENCODE_QUALITY,
+) -> bytes:
+    """Decode an image, fit it in max_side x max_side and re-encode it as JPEG/WEBP."""
+    with Image.open(io.BytesIO(content)) as image:
+        # Let the JPEG decoder scale down while decoding
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+_IMAGE_POOL: ProcessPoolExecutor | None = None
+_IMAGE_POOL_LOCK = threading.Lock()
+
+
+def _get_image_pool() -> ProcessPoolExecutor:
+    global _IMAGE_POOL  # pylint: disable=global-statement
+    with _IMAGE_POOL_LOCK:
+        if _IMAGE_POOL is None:
+            # spawn, forking a process with running threads is unsafe
+            _IMAGE_POOL = ProcessPoolExecutor(
+                max_workers=IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _IMAGE_POOL
+
+
+def preprocess_image(content: bytes, max_side: int = IMAGE_MAX_SIDE) -> bytes | None:
+    """
+    Downscale an image in the process pool, large decodes don't hold the GIL of the
+    bot. None when it can not be decoded.
+    """
+    try:
+        if IMAGE_PROCESS_WORKERS <= 0:
+            return downscale_image(content, max_side)
+        return _get_image_pool().submit(downscale_image, content, max_side).result()
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Fail to preprocess image, send it as is", err=repr(e))
+        return None
+
+
+def image_mime_type() -> str:
+    """Mime type of the re-encoded images."""
+    return f"image/{IMAGE_ENCODE_FORMAT.lower()}"
+
+
+def original_image_mime_type(content: bytes, url: str = "") -> str:
+    """
+    Mime type of an image sent as is, by its header, else by the url extension.
+    Examples:
+    - PNG bytes -> 'image/png'
+    - b'...', 'http://x/a.gif' -> 'image/gif'
+    """
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            if image.format in Image.MIME:
+                return Image.MIME[image.format]
+    except Exception:  # pylint: disable=broad-except
+        pass
+    mime_type, _ = mimetypes.guess_type(urlparse(url).path)
+    return mime_type or "application/octet-stream"
+
+
+def base64_encode_image(
+    url: str,
+    bearer_token: str | None = None,
+    timeout: float | None = None,
+    max_side: int = IMAGE_MAX_SIDE,
+    cache_key: str | None = None,
+) -> tuple[str, str]:
+    """
+    Download an image, downscaled to max_side and re-encoded, in base64 with its mime
+    type. An image not re-encoded, max_side <= 0 or not decoded, keeps its own type.
+    """
+    content = download_media(
+        url=url, bearer_token=bearer_token, timeout=timeout, cache_key=cache_key
+    )
+    processed = preprocess_image(content, max_side) if max_side > 0 else None
+    if processed is None:
+        mime_type = original_image_mime_type(content, url)
+    else:
+        content, mime_type = processed, image_mime_type()
+    return base64.b64encode(content).decode("utf-8"), mime_type
@@ -0,0 +1,203 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import urlparse
+
+import httpx
+import structlog
+
+from fluctlight.settings import (
+    HTTP_CONNECT_TIMEOUT_SEC,
+    HTTP_HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY_SEC,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MEDIA_TIMEOUT_SEC,
+    HTTP_TIMEOUT_SEC,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package, `pip install httpx[http2]`."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _host_of(url: str | httpx.URL) -> str:
+    parsed = urlparse(str(url))
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class _AsyncClientState:
+    def __init__(self, client: httpx.AsyncClient, max_per_host: int) -> None:
+        self.client = client
+        self.max_per_host = max_per_host
+        self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, url: str | httpx.URL) -> asyncio.Semaphore | None:
+        if self.max_per_host <= 0:
+            return None
+        host = _host_of(url)
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self.host_semaphores[host]
+
+
+class HttpPool:
+    """
+    Long lived HTTP clients shared by all outbound I/O.
+
+    Connections are kept alive and reused across calls, negotiated as HTTP/2 when
+    `h2` is installed. The number of requests in flight to one host is capped by
+    max_per_host on top of the pool wide max_connections, the excess waits for a
+    slot. The async client is bound to its event loop, one is created per loop.
+
+    Media uploads and downloads outlast the default timeout, they pass
+    timeout=media_timeout.
+    example:
+        with get_http_pool().stream("GET", url) as response: ...
+        response = await get_http_pool().arequest("POST", url, json=data)
+        pool.request("POST", url, files=files, timeout=pool.media_timeout)
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        max_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry_sec: float = HTTP_KEEPALIVE_EXPIRY_SEC,
+        timeout_sec: float = HTTP_TIMEOUT_SEC,
+        connect_timeout_sec: float = HTTP_CONNECT_TIMEOUT_SEC,
+        media_timeout_sec: float = HTTP_MEDIA_TIMEOUT_SEC,
+        http2: bool = HTTP_HTTP2_ENABLED,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_sec,
+        )
+        self.timeout = httpx.Timeout(timeout_sec, connect=connect_timeout_sec)
+        self.media_timeout = httpx.Timeout(
+            media_timeout_sec, connect=connect_timeout_sec
+        )
+        self.http2 = http2 and http2_available()
+        self.max_per_host = max_per_host
+        self._transport = transport
+        self._async_transport = async_transport
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, _AsyncClientState
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    follow_redirects=True,
+                    transport=self._transport,
+                )
+        return self._client
+
+    def _async_state(self) -> _AsyncClientState:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._async_clients.get(loop)
+            if state is None:
+                client = httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    follow_redirects=True,
+                    transport=self._async_transport,
+                )
+                state = _AsyncClientState(client, self.max_per_host)
+                self._async_clients[loop] = state
+        return state
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        """The async client of the running event loop."""
+        return self._async_state().client
+
+    def _host_semaphore(self, url: str | httpx.URL) -> threading.BoundedSemaphore:
+        host = _host_of(url)
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.max_per_host
+                )
+            return self._host_semaphores[host]
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs: Any) -> Iterator[httpx.Response]:
+        """Send a request, the body is read from the response while the slot is held."""
+        if self.max_per_host <= 0:
+            with self.client.stream(method, url, **kwargs) as response:
+                yield response
+            return
+        with self._host_semaphore(url):
+            with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        with self.stream(method, url, **kwargs) as response:
+            response.read()
+        return response
+
+    @asynccontextmanager
+    async def astream(
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        state = self._async_state()
+        semaphore = state.semaphore(url)
+        if semaphore is None:
+            async with state.client.stream(method, url, **kwargs) as response:
+                yield response
+            return
+        async with semaphore:
+            async with state.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def arequest(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self.astream(method, url, **kwargs) as response:
+            await response.aread()
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        """Close the async client of the running event loop."""
+        with self._lock:
+            state = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+
+_HTTP_POOL: HttpPool | None = None
+_HTTP_POOL_LOCK = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    global _HTTP_POOL  # pylint: disable=global-statement
+    with _HTTP_POOL_LOCK:
+        if _HTTP_POOL is None:
+            _HTTP_POOL = HttpPool()
+            logger.info("Init http pool", http2=_HTTP_POOL.http2)
+    return _HTTP_POOL
@@ -1,19 +1,25 @@
+from functools import lru_cache
 from typing import Any
 
-from jinja2 import Template
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from fluctlight.logger import get_logger
-from fluctlight.settings import DEBUG_MODE
+from fluctlight.settings import DEBUG_MODE, TEMPLATE_CACHE_MAX_SIZE
+from fluctlight.utt.template import get_template_registry
 
 logger = get_logger(__name__)
 
 
 def construct_system_prompt(prompt: str, context: dict[str, Any]) -> ChatPromptTemplate:
-    template = Template(prompt)
-    text = template.render(context)
+    text = get_template_registry().render(prompt, context)
     if DEBUG_MODE:
         logger.debug("construct system prompt", text=text)
+    return _system_prompt_template(text)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def _system_prompt_template(text: str) -> ChatPromptTemplate:
+    # Prompt templates are immutable, the same rendered text shares one
     return ChatPromptTemplate.from_messages(
         [
             ("system", text),
@@ -0,0 +1,350 @@
+import atexit
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Hashable
+
+from pydantic import BaseModel
+
+from fluctlight.logger import get_logger
+from fluctlight.settings import (
+    STATE_BACKEND,
+    STATE_FLUSH_BATCH,
+    STATE_FLUSH_INTERVAL_SEC,
+    STATE_PRUNE_INTERVAL_SEC,
+    STATE_SQLITE_PATH,
+    STATE_STORE_IDLE_TTL_SEC,
+)
+
+logger = get_logger(__name__)
+
+# (namespace, key) -> serialized value, None deletes the row
+StateRows = dict[tuple[str, str], bytes | None]
+
+_DELETED = object()
+
+# Pydantic models are restored from these packages only
+_MODEL_MODULE_PREFIXES = ("fluctlight.", "langchain_core.")
+_MODEL_TAG = "__model__"
+
+
+def _encode_model(value: Any) -> dict[str, Any]:
+    if not isinstance(value, BaseModel):
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+    model = type(value)
+    # Shallow, the nested models keep their own type through this hook
+    return {
+        _MODEL_TAG: f"{model.__module__}:{model.__qualname__}",
+        "data": {name: getattr(value, name) for name in model.model_fields},
+    }
+
+
+def _decode_model(obj: dict[str, Any]) -> Any:
+    if _MODEL_TAG not in obj:
+        return obj
+    module_name, qualname = obj[_MODEL_TAG].split(":", 1)
+    if not module_name.startswith(_MODEL_MODULE_PREFIXES):
+        raise ValueError(f"Model of module {module_name} is not allowed")
+    model: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        model = getattr(model, name)
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        raise ValueError(f"{obj[_MODEL_TAG]} is not a pydantic model")
+    return model.model_validate(obj["data"])
+
+
+def encode_state(value: Any) -> bytes:
+    """
+    JSON of a thread state, pydantic models are tagged with their class. Unlike
+    pickle, loading a row can't run code, the models are only rebuilt from the
+    fluctlight and langchain_core packages.
+    """
+    return json.dumps(value, default=_encode_model, ensure_ascii=False).encode("utf-8")
+
+
+def decode_state(data: bytes) -> Any:
+    return json.loads(data, object_hook=_decode_model)
+
+
+class StateBackend(ABC):
+    @abstractmethod
+    def load(self, namespace: str, key: str) -> bytes | None:
+        pass
+
+    @abstractmethod
+    def save_many(self, rows: StateRows) -> None:
+        """Upsert or delete the rows in one transaction."""
+
+    @abstractmethod
+    def prune(self, updated_before: float) -> int:
+        """Delete the rows not updated since the timestamp, returns the count."""
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteStateBackend(StateBackend):
+    """Thread state in a local SQLite file, in WAL mode so reads don't wait for writes."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS thread_states "
+                "(namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    def load(self, namespace: str, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM thread_states WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, rows: StateRows) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO thread_states VALUES (?, ?, ?, ?)",
+                [
+                    (namespace, key, value, now)
+                    for (namespace, key), value in rows.items()
+                    if value is not None
+                ],
+            )
+            self._conn.executemany(
+                "DELETE FROM thread_states WHERE namespace = ? AND key = ?",
+                [
+                    (namespace, key)
+                    for (namespace, key), value in rows.items()
+                    if value is None
+                ],
+            )
+
+    def prune(self, updated_before: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM thread_states WHERE updated_at < ?", (updated_before,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SqlAlchemyStateBackend(StateBackend):
+    """Thread state in the SQLALCHEMY_DATABASE_URL database, table thread_states."""
+
+    def __init__(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from fluctlight.database.connection import create_sessionmaker
+        from fluctlight.database.models.thread_state import ThreadState
+
+        self._model = ThreadState
+        self._sessionmaker = create_sessionmaker()
+
+    def load(self, namespace: str, key: str) -> bytes | None:
+        with self._sessionmaker() as db:
+            row = db.get(self._model, (namespace, key))
+            return row.value if row else None
+
+    def save_many(self, rows: StateRows) -> None:
+        now = time.time()
+        with self._sessionmaker() as db:
+            for (namespace, key), value in rows.items():
+                if value is None:
+                    row = db.get(self._model, (namespace, key))
+                    if row is not None:
+                        db.delete(row)
+                else:
+                    db.merge(
+                        self._model(
+                            namespace=namespace, key=key, value=value, updated_at=now
+                        )
+                    )
+            db.commit()
+
+    def prune(self, updated_before: float) -> int:
+        with self._sessionmaker() as db:
+            count = (
+                db.query(self._model)
+                .filter(self._model.updated_at < updated_before)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return count
+
+
+class ThreadStatePersister:
+    """
+    Write-behind persistence of the conversation state stores.
+
+    Saves are coalesced by (namespace, key) and written in batches by a background
+    thread, every flush_interval_sec or once flush_batch are pending, the values are
+    encoded to JSON at write time so the reply path only records the reference. Loads
+    read the pending value first, then the batch being written, then the backend. Every prune_interval_sec the rows
+    not updated for idle_ttl_sec are deleted, 0 disables the pruning.
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        flush_interval_sec: float = STATE_FLUSH_INTERVAL_SEC,
+        flush_batch: int = STATE_FLUSH_BATCH,
+        idle_ttl_sec: float = STATE_STORE_IDLE_TTL_SEC,
+        prune_interval_sec: float = STATE_PRUNE_INTERVAL_SEC,
+    ) -> None:
+        self.backend = backend
+        self.flush_interval_sec = flush_interval_sec
+        self.flush_batch = flush_batch
+        self.idle_ttl_sec = idle_ttl_sec
+        self.prune_interval_sec = prune_interval_sec
+        self._last_prune = time.monotonic()
+        self.pruned = 0
+        self._pending: dict[tuple[str, str], Any] = {}
+        # The batch being written, still read by load until the backend has it
+        self._writing: dict[tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.flushed = 0
+        self.errors = 0
+        self._thread = threading.Thread(
+            target=self._run, name="state-persister", daemon=True
+        )
+        self._thread.start()
+
+    def load(self, namespace: str, key: Hashable) -> Any | None:
+        row_key = (namespace, str(key))
+        with self._lock:
+            for pending in (self._pending, self._writing):
+                if row_key in pending:
+                    value = pending[row_key]
+                    return None if value is _DELETED else value
+        try:
+            data = self.backend.load(*row_key)
+            return decode_state(data) if data is not None else None
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Fail to load thread state", namespace=namespace, err=str(e))
+            return None
+
+    def save(self, namespace: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._pending[(namespace, str(key))] = value
+            if len(self._pending) >= self.flush_batch:
+                self._wakeup.set()
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        self.save(namespace, key, _DELETED)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._writing = pending
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            finally:
+                with self._lock:
+                    self._writing = {}
+
+    def _write(self, pending: dict[tuple[str, str], Any]) -> None:
+        """Encode and write a batch, the failed rows are requeued."""
+        rows: StateRows = {}
+        for row_key, value in pending.items():
+            try:
+                rows[row_key] = None if value is _DELETED else encode_state(value)
+            except RuntimeError:
+                # Mutated by the reply path while encoded, the next flush retries
+                self._requeue({row_key: value})
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(
+                    "Skip unserializable thread state", key=row_key, err=repr(e)
+                )
+        try:
+            self.backend.save_many(rows)
+            self.flushed += len(rows)
+        except Exception as e:  # pylint: disable=broad-except
+            self.errors += 1
+            logger.warning("Fail to write thread state", err=str(e))
+            self._requeue({k: pending[k] for k in rows})
+
+    def prune(self) -> int:
+        """Delete the rows left idle for longer than idle_ttl_sec."""
+        if self.idle_ttl_sec <= 0:
+            return 0
+        try:
+            count = self.backend.prune(time.time() - self.idle_ttl_sec)
+        except Exception as e:  # pylint: disable=broad-except
+            self.errors += 1
+            logger.warning("Fail to prune thread state", err=str(e))
+            return 0
+        self.pruned += count
+        if count:
+            logger.info("Prune idle thread state", count=count)
+        return count
+
+    def _requeue(self, pending: dict[tuple[str, str], Any]) -> None:
+        with self._lock:
+            for row_key, value in pending.items():
+                # A newer save wins
+                self._pending.setdefault(row_key, value)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval_sec)
+            self._wakeup.clear()
+            self.flush()
+            if (
+                self.prune_interval_sec > 0
+                and time.monotonic() - self._last_prune >= self.prune_interval_sec
+            ):
+                self._last_prune = time.monotonic()
+                self.prune()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self.backend.close()
+
+
+def create_state_backend(name: str = STATE_BACKEND) -> StateBackend | None:
+    if name == "sqlite":
+        return SqliteStateBackend(STATE_SQLITE_PATH)
+    if name == "sqlalchemy":
+        return SqlAlchemyStateBackend()
+    return None
+
+
+_PERSISTER: ThreadStatePersister | None = None
+_PERSISTER_LOCK = threading.Lock()
+
+
+def get_thread_state_persister() -> ThreadStatePersister | None:
+    """The shared persister of the thread state, None when STATE_BACKEND is none."""
+    global _PERSISTER  # pylint: disable=global-statement
+    with _PERSISTER_LOCK:
+        if _PERSISTER is None:
+            backend = create_state_backend()
+            if backend is None:
+                return None
+            _PERSISTER = ThreadStatePersister(backend)
+            atexit.register(_PERSISTER.close)
+            logger.info("Persist thread state", backend=STATE_BACKEND)
+    return _PERSISTER
@@ -0,0 +1,240 @@
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Iterator, TypeVar
+
+from pydantic import BaseModel
+
+from fluctlight.logger import get_logger
+from fluctlight.utt.state_backend import get_thread_state_persister
+from fluctlight.settings import (
+    STATE_STORE_IDLE_TTL_SEC,
+    STATE_STORE_MAX_BYTES,
+    STATE_STORE_MAX_ENTRIES,
+)
+
+logger = get_logger(__name__)
+
+V = TypeVar("V")
+
+_MAX_SIZE_DEPTH = 8
+
+
+def approx_size(obj: Any, depth: int = 0) -> int:
+    """
+    Approximate deep size in bytes of a state value, strings and bytes count by length.
+    Examples:
+    - approx_size("abc") -> 3
+    - approx_size([{"content": "abc"}]) -> 3 + container overhead
+    """
+    if isinstance(obj, (str, bytes, bytearray)):
+        return len(obj)
+    if depth >= _MAX_SIZE_DEPTH:
+        return sys.getsizeof(obj)
+    if isinstance(obj, BaseModel):
+        return approx_size(obj.__dict__, depth + 1)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            approx_size(k, depth + 1) + approx_size(v, depth + 1)
+            for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(approx_size(v, depth + 1) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class ConversationStateStore(Generic[V]):
+    """
+    Per-thread state keyed by thread id, bounded by entries and approximate bytes
+    with LRU eviction, and by idle time. 0 is unlimited for any of the bounds.
+
+    The size of a value is measured when it is set or touched, a value mutated in
+    place should be touched after the change. on_evict(key, value) is called for
+    each evicted entry, to release state kept elsewhere for the thread.
+
+    With persist, the values set or touched are written behind to the STATE_BACKEND
+    and a key missing in memory, e.g. after a restart or an eviction, is loaded from
+    it on first access. Idle expired keys are deleted from it, the rows left idle
+    longer than STATE_STORE_IDLE_TTL_SEC are pruned by the persister.
+    example:
+        store = ConversationStateStore("chat_history", max_entries=20)
+        store[thread_id] = []
+        store[thread_id].append(message)
+        store.touch(thread_id)
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = STATE_STORE_MAX_ENTRIES,
+        max_bytes: int = STATE_STORE_MAX_BYTES,
+        idle_ttl_sec: float = STATE_STORE_IDLE_TTL_SEC,
+        on_evict: Callable[[Hashable, V], None] | None = None,
+        sizeof: Callable[[Any], int] = approx_size,
+        persist: bool = False,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl_sec = idle_ttl_sec
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+        self._persister = get_thread_state_persister() if persist else None
+        # key -> (value, size, last access)
+        self._entries: OrderedDict[Hashable, tuple[V, int, float]] = OrderedDict()
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.evictions = 0
+        _STORES.add(self)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def __getitem__(self, key: Hashable) -> V:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                raise KeyError(key)
+            self._entries[key] = (entry[0], entry[1], time.monotonic())
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get(self, key: Hashable, default: V | None = None) -> V | None:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._put(key, value)
+            self._evict(keep=key)
+        if self._persister:
+            self._persister.save(self.namespace, key, value)
+
+    def touch(self, key: Hashable) -> None:
+        """Mark the key recently used and measure its value again."""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return
+            self._put(key, entry[0])
+            self._evict(keep=key)
+        if self._persister:
+            self._persister.save(self.namespace, key, entry[0])
+
+    def pop(self, key: Hashable, default: V | None = None) -> V | None:
+        with self._lock:
+            entry = self._get_entry(key)
+            if self._persister:
+                self._persister.delete(self.namespace, key)
+            if entry is None:
+                return default
+            del self._entries[key]
+            self.total_bytes -= entry[1]
+            return entry[0]
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            if key not in self:
+                raise KeyError(key)
+            self.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    @property
+    def persistent(self) -> bool:
+        """Whether an evicted key is loaded back from the STATE_BACKEND."""
+        return self._persister is not None
+
+    @property
+    def gauges(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
+
+    def _get_entry(self, key: Hashable) -> tuple[V, int, float] | None:
+        """
+        The entry of key, an idle expired one is evicted, a missing one is loaded
+        from the persister. Called with the lock.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            self._evict_key(key, expired=True)
+            entry = None
+        if entry is None and self._persister:
+            value = self._persister.load(self.namespace, key)
+            if value is not None:
+                self._put(key, value)
+                self._evict(keep=key)
+                entry = self._entries[key]
+        return entry
+
+    def _expired(self, entry: tuple[V, int, float]) -> bool:
+        return self.idle_ttl_sec > 0 and time.monotonic() - entry[2] > self.idle_ttl_sec
+
+    def _put(self, key: Hashable, value: V) -> None:
+        previous = self._entries.get(key)
+        if previous is not None:
+            self.total_bytes -= previous[1]
+        size = self.sizeof(value)
+        self._entries[key] = (value, size, time.monotonic())
+        self._entries.move_to_end(key)
+        self.total_bytes += size
+
+    def _evict(self, keep: Hashable) -> None:
+        """Evict idle entries, then the least recently used ones over the bounds."""
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            over_entries = 0 < self.max_entries < len(self._entries)
+            over_bytes = 0 < self.max_bytes < self.total_bytes
+            expired = self._expired(entry)
+            if not (over_entries or over_bytes or expired):
+                break
+            self._evict_key(key, expired=expired)
+
+    def _evict_key(self, key: Hashable, expired: bool = False) -> None:
+        """Evict from memory, an idle expired entry is deleted from the persister too."""
+        value, size, _ = self._entries.pop(key)
+        if expired and self._persister:
+            self._persister.delete(self.namespace, key)
+        self.total_bytes -= size
+        self.evictions += 1
+        logger.debug("Evict state", namespace=self.namespace, key=key, size=size)
+        if self.on_evict:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Fail to release evicted state", err=str(e))
+
+
+_STORES: "weakref.WeakSet[ConversationStateStore]" = weakref.WeakSet()
+
+
+def get_state_store_gauges() -> dict[str, dict[str, int]]:
+    """Gauges of the live state stores, summed by namespace."""
+    gauges: dict[str, dict[str, int]] = {}
+    for store in list(_STORES):
+        namespace = gauges.setdefault(
+            store.namespace, {"entries": 0, "bytes": 0, "evictions": 0}
+        )
+        for name, value in store.gauges.items():
+            namespace[name] += value
+    return gauges
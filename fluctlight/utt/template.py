@@ -1,4 +1,26 @@
+import hashlib
+import os
 import re
+import threading
+from functools import lru_cache
+from typing import Any
+
+from jinja2 import FileSystemBytecodeCache, FunctionLoader, Template, meta
+from jinja2.environment import TemplateExpression
+from jinja2.sandbox import SandboxedEnvironment
+
+from fluctlight.settings import TEMPLATE_BYTECODE_CACHE_DIR, TEMPLATE_CACHE_MAX_SIZE
+
+# Valid placeholder patterns, `{key}` where key can be a nested path like `a.b.c`
+_PLACEHOLDER_RE = re.compile(r"\{([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z0-9_]+)*)\}")
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def _split_fstring(fstring: str) -> tuple[str, ...]:
+    """The literal text and the placeholders of the format string, alternating."""
+    # "{{" and "}}" are handled as "{" and "}" respectively
+    fstring = fstring.replace("{{", "{").replace("}}", "}")
+    return tuple(_PLACEHOLDER_RE.split(fstring))
 
 
 def collect_placeholders(fstring: str):
@@ -11,15 +33,7 @@ def collect_placeholders(fstring: str):
     Returns:
         list: A list of placeholders without braces.
     """
-    # Escape "{{" and "}}" to gracefully handle them as "{" and "}" respectively
-    fstring = fstring.replace("{{", "\u007b").replace("}}", "\u007d")
-
-    # Regular expression to match valid placeholder patterns
-    pattern = re.compile(r"\{([a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z0-9_]+)*)\}")
-
-    placeholders = pattern.findall(fstring)
-    # Return only the first element of each match, which is the full placeholder key
-    return [match[0] for match in placeholders]
+    return list(_split_fstring(fstring)[1::2])
 
 
 def fstring_format(fstring: str, **kwargs) -> str:
@@ -61,20 +75,108 @@ def fstring_format(fstring: str, **kwargs) -> str:
                 obj = getattr(obj, k)
         return obj
 
-    # Escape "{{" and "}}" to gracefully handle them as "{" and "}" respectively
-    fstring = fstring.replace("{{", "\u007b").replace("}}", "\u007d")
+    parts = list(_split_fstring(fstring))
+    for i in range(1, len(parts), 2):
+        parts[i] = str(get_nested_value(kwargs, parts[i]))
+    return "".join(parts)
+
+
+class CompiledTemplate:
+    """A Jinja template compiled once, with the top level variables it reads."""
 
-    # Regular expression to match valid placeholder patterns
-    pattern = re.compile(r"\{([a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z0-9_]+)*)\}")
+    def __init__(self, source: str, template: Template, variables: frozenset[str]):
+        self.source = source
+        self.template = template
+        self.variables = variables
 
-    placeholders = pattern.findall(fstring)
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        return self.template.render(*args, **kwargs)
 
-    for match in placeholders:
-        placeholder = match[0]
-        value = get_nested_value(kwargs, placeholder)
-        fstring = fstring.replace(f"{{{placeholder}}}", str(value))
 
-    # Replace temporary markers with actual braces
-    fstring = fstring.replace("\u007b", "{").replace("\u007d", "}")
+class TemplateRegistry:
+    """
+    Prompt templates by source, compiled once in a sandboxed Jinja environment.
+
+    The templates are only read, never mutated, so one compiled template is shared
+    by all the renders. When bytecode_cache_dir is set the compiled bytecode is also
+    stored there, other processes skip the compilation.
+    example:
+        get_template_registry().render("Hello {{name}}", name="Bob")
+    """
 
-    return fstring
+    def __init__(
+        self,
+        max_size: int = TEMPLATE_CACHE_MAX_SIZE,
+        bytecode_cache_dir: str = TEMPLATE_BYTECODE_CACHE_DIR,
+    ) -> None:
+        self.max_size = max_size
+        self._sources: dict[str, str] = {}
+        self._templates: dict[str, CompiledTemplate] = {}
+        self._expressions: dict[str, TemplateExpression] = {}
+        self._lock = threading.Lock()
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        self.env = SandboxedEnvironment(
+            loader=FunctionLoader(self._sources.get),
+            bytecode_cache=bytecode_cache,
+            # The registry keeps the compiled templates
+            cache_size=0,
+        )
+
+    def get(self, source: str) -> CompiledTemplate:
+        with self._lock:
+            compiled = self._templates.get(source)
+            if compiled is None:
+                compiled = self._compile(source)
+                if len(self._templates) >= self.max_size > 0:
+                    # Drop the oldest
+                    self._templates.pop(next(iter(self._templates)))
+                self._templates[source] = compiled
+        return compiled
+
+    def _compile(self, source: str) -> CompiledTemplate:
+        # The loader serves the source by its hash, the bytecode cache key
+        name = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        self._sources[name] = source
+        try:
+            template = self.env.get_template(name)
+        finally:
+            del self._sources[name]
+        variables = frozenset(meta.find_undeclared_variables(self.env.parse(source)))
+        return CompiledTemplate(source, template, variables)
+
+    def expression(self, source: str) -> TemplateExpression:
+        """
+        A Jinja expression compiled once in the sandbox, called with the variables.
+        example:
+            get_template_registry().expression("order.quantity | int > 0")(order=order)
+        """
+        with self._lock:
+            expression = self._expressions.get(source)
+            if expression is None:
+                expression = self.env.compile_expression(source)
+                if len(self._expressions) >= self.max_size > 0:
+                    self._expressions.pop(next(iter(self._expressions)))
+                self._expressions[source] = expression
+        return expression
+
+    def render(self, source: str, *args: Any, **kwargs: Any) -> str:
+        """Render the template with a context dict and/or keyword arguments."""
+        return self.get(source).render(*args, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+_TEMPLATE_REGISTRY: TemplateRegistry | None = None
+_TEMPLATE_REGISTRY_LOCK = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    global _TEMPLATE_REGISTRY  # pylint: disable=global-statement
+    with _TEMPLATE_REGISTRY_LOCK:
+        if _TEMPLATE_REGISTRY is None:
+            _TEMPLATE_REGISTRY = TemplateRegistry()
+    return _TEMPLATE_REGISTRY
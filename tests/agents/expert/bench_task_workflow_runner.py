@@ -0,0 +1,81 @@
+"""
+Micro benchmark of the per message overhead of the workflow runner on the shopping
+assist config, with the LLM calls mocked out.
+
+    python -m tests.agents.expert.bench_task_workflow_runner
+"""
+
+import timeit
+from unittest.mock import MagicMock, patch
+
+from fluctlight.agents.expert.shopping_assist import (
+    UserIntent,
+    create_shopping_assist_task_graph_agent,
+)
+from fluctlight.agents.expert.task_workflow import (
+    ConditionalOutput,
+    build_workflow_graph,
+)
+from fluctlight.agents.expert.task_workflow_config import (
+    INTERNAL_UPSTREAM_HISTORY_MESSAGES,
+    WorkflowInvocationState,
+)
+from fluctlight.agents.expert.data_model import IntakeHistoryMessage
+from fluctlight.agents.expert.task_workflow_runner import WorkflowRunner
+
+NUMBER = 200
+
+
+def _mock_completion(schema, _messages):
+    response = MagicMock()
+    if schema is ConditionalOutput:
+        response.choices[0].message.parsed = ConditionalOutput(
+            is_match_success_criteria=False
+        )
+    else:
+        response.choices[0].message.parsed = UserIntent(
+            user_intent="other", user_query="Hello", assistant_response_msg="Hi"
+        )
+    return response
+
+
+def _new_ic(agent) -> WorkflowInvocationState:
+    running_state = agent._context.copy()  # pylint: disable=protected-access
+    running_state[INTERNAL_UPSTREAM_HISTORY_MESSAGES] = IntakeHistoryMessage()
+    return WorkflowInvocationState(
+        running_state=running_state, current_node="guide_to_buy_product"
+    )
+
+
+def _per_call_us(fn) -> float:
+    return min(timeit.repeat(fn, number=NUMBER, repeat=3)) / NUMBER * 1e6
+
+
+def main() -> None:
+    agent = create_shopping_assist_task_graph_agent()
+    config = agent._config  # pylint: disable=protected-access
+
+    def message_before() -> None:
+        # The graph was built and compiled by every runner
+        build_workflow_graph(config)
+        WorkflowRunner(config, ic=_new_ic(agent)).run(message_text="Hello")
+
+    def message_after() -> None:
+        WorkflowRunner(config, ic=_new_ic(agent)).run(message_text="Hello")
+
+    with patch(
+        "fluctlight.agents.expert.task_workflow.structure_chat_completion",
+        side_effect=_mock_completion,
+    ):
+        compile_us = _per_call_us(lambda: build_workflow_graph(config))
+        before_us = _per_call_us(message_before)
+        after_us = _per_call_us(message_after)
+
+    print(f"build_workflow_graph: {compile_us:9.1f} us")
+    print(f"message, per message compile: {before_us:9.1f} us")
+    print(f"message, cached compile: {after_us:9.1f} us")
+    print(f"speedup: {before_us / after_us:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,10 @@ from fluctlight.agents.expert.task_workflow import (
     create_task_validation_node,
     workflow_node_router,
     create_conditional_edge_chain,
+    create_rule_conditional_edge,
     build_workflow_graph,
+    get_compiled_workflow,
+    make_fused_output_schema,
     WorkflowInvocationState,
     WorkflowNodeConfig,
     ConditionalOutput,
@@ -95,6 +98,141 @@ class TestTaskWorkflow(unittest.TestCase):
         result = edge_fn(state)
         self.assertEqual(result, "YES")
 
+    @patch("fluctlight.agents.expert.task_workflow.structure_chat_completion")
+    def test_create_rule_conditional_edge(
+        self, mock_chat_completion: MagicMock
+    ) -> None:
+        config = WorkflowNodeConfig(
+            instruction="Test instruction",
+            output_schema=SomeEntity,
+            input_schema={},
+            validation_config=TaskNodeValidation(
+                success_rule="test_node.value | int > 0"
+            ),
+        )
+        edge_fn = create_rule_conditional_edge("test_node", config)
+
+        def state(value: str) -> WorkflowInvocationState:
+            return WorkflowInvocationState(
+                running_state={"test_node": SomeEntity(value=value)},
+                current_node="test_node",
+            )
+
+        self.assertEqual(edge_fn(state("2")), "YES")
+        self.assertEqual(edge_fn(state("0")), "NO")
+        mock_chat_completion.assert_not_called()
+
+    @patch("fluctlight.agents.expert.task_workflow.structure_chat_completion")
+    def test_rule_conditional_edge_fallback(
+        self, mock_chat_completion: MagicMock
+    ) -> None:
+        mock_response = MagicMock()
+        mock_response.choices[0].message.parsed = ConditionalOutput(
+            is_match_success_criteria=True
+        )
+        mock_chat_completion.return_value = mock_response
+        config = WorkflowNodeConfig(
+            instruction="Test instruction",
+            output_schema=SomeEntity,
+            input_schema={},
+            validation_config=TaskNodeValidation(
+                success_criteria="Is the value positive?",
+                success_rule="test_node.missing > 0",
+            ),
+        )
+        edge_fn = create_rule_conditional_edge("test_node", config)
+        state = WorkflowInvocationState(
+            running_state={"test_node": SomeEntity(value="1")},
+            current_node="test_node",
+        )
+        # Undefined can't be compared, the LLM checks the criteria
+        self.assertEqual(edge_fn(state), "YES")
+        mock_chat_completion.assert_called_once()
+
+    @patch("fluctlight.agents.expert.task_workflow.structure_chat_completion")
+    def test_fused_validation(self, mock_chat_completion: MagicMock) -> None:
+        fused_schema = make_fused_output_schema(SomeEntity)
+        mock_response = MagicMock()
+        mock_response.choices[0].message.parsed = fused_schema(
+            output=SomeEntity(value="Test"), is_match_success_criteria=True
+        )
+        mock_chat_completion.return_value = mock_response
+
+        config = WorkflowConfig(
+            nodes={
+                "node1": WorkflowNodeConfig(
+                    instruction="Extract from {{ text }}",
+                    output_schema=SomeEntity,
+                    input_schema={},
+                    validation_config=TaskNodeValidation(
+                        success_criteria="Is {{ node1.value }} about {{ topic }}?",
+                        passed_message="Passed {{ node1.value }}",
+                        fused=True,
+                    ),
+                ),
+            },
+            begin="node1",
+            end="node1",
+        )
+        graph = build_workflow_graph(config)
+        state = WorkflowInvocationState(
+            running_state={"text": "hello", "topic": "greeting"},
+            current_node="node1",
+        )
+        for event in graph.stream(state, stream_mode="values"):
+            last_event = event
+
+        # One call for both the output and the success criteria
+        mock_chat_completion.assert_called_once()
+        schema, messages = mock_chat_completion.call_args.args
+        self.assertIs(schema, fused_schema)
+        self.assertIn("Extract from hello", messages[0]["content"])
+        self.assertIn(
+            "Is the value field of your output about greeting?",
+            messages[0]["content"],
+        )
+        self.assertEqual(last_event["running_state"]["node1"], SomeEntity(value="Test"))
+        self.assertEqual(
+            last_event["output"]["node1"].status, "LOOP_MESSAGE_CHECK_PASSED"
+        )
+        self.assertEqual(last_event["output"]["node1"].message, "Passed Test")
+
+    @patch("fluctlight.agents.expert.task_workflow.structure_chat_completion")
+    def test_fused_validation_unparsed(self, mock_chat_completion: MagicMock) -> None:
+        mock_response = MagicMock()
+        mock_response.choices[0].message.parsed = None
+        mock_chat_completion.return_value = mock_response
+
+        config = WorkflowConfig(
+            nodes={
+                "node1": WorkflowNodeConfig(
+                    instruction="Extract from {{ text }}",
+                    output_schema=SomeEntity,
+                    input_schema={},
+                    validation_config=TaskNodeValidation(
+                        success_criteria="Is {{ node1.value }} valid?",
+                        fused=True,
+                    ),
+                ),
+            },
+            begin="node1",
+            end="node1",
+        )
+        graph = build_workflow_graph(config)
+        # The verdict of a previous message must not pass an unparsed output
+        state = WorkflowInvocationState(
+            running_state={"text": "hello"},
+            current_node="node1",
+            validation={"node1": True},
+        )
+        for event in graph.stream(state, stream_mode="values"):
+            last_event = event
+
+        self.assertFalse(last_event["validation"]["node1"])
+        self.assertEqual(
+            last_event["output"]["node1"].status, "LOOP_MESSAGE_CHECK_FAILED"
+        )
+
     def test_build_workflow_graph(self) -> None:
         config = WorkflowConfig(
             nodes={
@@ -117,6 +255,36 @@ class TestTaskWorkflow(unittest.TestCase):
         graph = build_workflow_graph(config)
         self.assertIsNotNone(graph)
 
+    def test_get_compiled_workflow(self) -> None:
+        def create_config() -> WorkflowConfig:
+            return WorkflowConfig(
+                nodes={
+                    "node1": WorkflowNodeConfig(
+                        instruction="Test instruction",
+                        output_schema=SomeEntity,
+                        input_schema={"__INPUT_MESSAGE": str},
+                    ),
+                    "node2": WorkflowNodeConfig(
+                        instruction="Test instruction",
+                        output_schema=AnotherEntity,
+                        input_schema={"node1": SomeEntity},
+                    ),
+                },
+                begin="node1",
+                end="node2",
+            )
+
+        config = create_config()
+        compiled = get_compiled_workflow(config)
+        self.assertIs(get_compiled_workflow(config), compiled)
+        self.assertIsNot(get_compiled_workflow(create_config()), compiled)
+        self.assertEqual(
+            compiled.upstreams, {"node1": ["__INPUT_MESSAGE"], "node2": ["node1"]}
+        )
+        self.assertEqual(
+            compiled.downstreams, {"__INPUT_MESSAGE": ["node1"], "node1": ["node2"]}
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
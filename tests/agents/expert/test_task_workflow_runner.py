@@ -1,4 +1,6 @@
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from fluctlight.agents.expert.task_workflow_runner import WorkflowRunner
 from fluctlight.agents.expert.task_workflow_config import (
@@ -6,6 +8,7 @@ from fluctlight.agents.expert.task_workflow_config import (
     WorkflowNodeConfig,
     WorkflowInvocationState,
     INTERNAL_UPSTREAM_HISTORY_MESSAGES,
+    INTERNAL_UPSTREAM_INPUT_MESSAGE,
     WorkflowNodeOutput,
 )
 from fluctlight.agents.expert.task_workflow import (
@@ -25,6 +28,14 @@ class SomeEntityB(TaskEntity):
     value: str
 
 
+class SomeEntityC(TaskEntity):
+    value: str
+
+
+class SomeEntityD(TaskEntity):
+    value: str
+
+
 class TestWorkflowRunner(unittest.TestCase):
     def setUp(self) -> None:
         self.config = WorkflowConfig(
@@ -203,5 +214,81 @@ class TestWorkflowRunner(unittest.TestCase):
         self.assertEqual(self.runner.get_current_node(), "task_b")
 
 
+class TestWorkflowRunnerParallel(unittest.TestCase):
+    def setUp(self) -> None:
+        # a -> (b, c) -> d
+        self.config = WorkflowConfig(
+            nodes={
+                "task_a": WorkflowNodeConfig(
+                    instruction="Start node",
+                    output_schema=SomeEntityA,
+                    input_schema={INTERNAL_UPSTREAM_INPUT_MESSAGE: str},
+                ),
+                "task_b": WorkflowNodeConfig(
+                    instruction="Lookup node",
+                    output_schema=SomeEntityB,
+                    input_schema={"task_a": SomeEntityA},
+                ),
+                "task_c": WorkflowNodeConfig(
+                    instruction="Check node",
+                    output_schema=SomeEntityC,
+                    input_schema={"task_a": SomeEntityA},
+                ),
+                "task_d": WorkflowNodeConfig(
+                    instruction="End node",
+                    output_schema=SomeEntityD,
+                    input_schema={"task_b": SomeEntityB, "task_c": SomeEntityC},
+                ),
+            },
+            begin="task_a",
+            end="task_d",
+        )
+        self.runner = WorkflowRunner(
+            self.config, WorkflowInvocationState(current_node="task_a")
+        )
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_get_ready_nodes(self) -> None:
+        self.assertEqual(self.runner.get_ready_nodes(), ["task_a"])
+        self.runner.ic.output["task_a"] = WorkflowNodeOutput(
+            node="task_a", status="SUCCESS"
+        )
+        self.assertEqual(self.runner.get_ready_nodes(), ["task_b", "task_c"])
+        self.assertTrue(self.runner.needs_input_message("task_a"))
+        self.assertFalse(self.runner.needs_input_message("task_b"))
+
+    @patch("fluctlight.agents.expert.task_workflow.structure_chat_completion")
+    def test_run_parallel(self, mock_chat_completion: MagicMock) -> None:
+        # b and c only get past the barrier when both are running at the same time
+        overlap = threading.Barrier(2, timeout=5)
+
+        def chat_completion(schema, _messages):
+            if schema in (SomeEntityB, SomeEntityC):
+                overlap.wait()
+            response = MagicMock()
+            response.choices[0].message.parsed = schema(value=schema.__name__)
+            return response
+
+        mock_chat_completion.side_effect = chat_completion
+
+        outputs = self.runner.run_parallel(message_text="Hello", executor=self.executor)
+
+        self.assertEqual(
+            [output.node for output in outputs],
+            ["task_a", "task_b", "task_c", "task_d"],
+        )
+        self.assertFalse(overlap.broken)
+        self.assertTrue(self.runner.is_ended())
+        self.assertEqual(
+            self.runner.ic.running_state["task_c"], SomeEntityC(value="SomeEntityC")
+        )
+        self.assertEqual(
+            self.runner.ic.running_state["task_d"], SomeEntityD(value="SomeEntityD")
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from fluctlight.agents.history_compactor import HistoryCompactor
+
+
+class TestHistoryCompactor(unittest.TestCase):
+    @patch("fluctlight.agents.history_compactor.simple_assistant")
+    def test_rolling_summary(self, mock_simple_assistant):
+        mock_simple_assistant.side_effect = ["summary 1", "summary 2"]
+        compactor = HistoryCompactor(model_key="gpt-4o-mini")
+
+        compactor.submit("t1", ["[user]: my name is Bob", "[assistant]: hi Bob"])
+        self.assertTrue(compactor.join(timeout=5))
+        self.assertEqual(compactor.get_summary("t1"), "summary 1")
+
+        compactor.submit("t1", ["[user]: I like tea"])
+        self.assertTrue(compactor.join(timeout=5))
+        self.assertEqual(compactor.get_summary("t1"), "summary 2")
+
+        prompt = mock_simple_assistant.call_args.kwargs["prompt"]
+        self.assertIn("summary 1", prompt)
+        self.assertIn("[user]: I like tea", prompt)
+        self.assertEqual(
+            mock_simple_assistant.call_args.kwargs["model_key"], "gpt-4o-mini"
+        )
+
+    def test_turns_of_a_thread_are_batched_in_order(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def summarize(summary, turns):
+            started.set()
+            release.wait(5)
+            calls.append((summary, turns))
+            return f"{summary}+{len(turns)}"
+
+        compactor = HistoryCompactor()
+        with patch.object(compactor, "summarize", side_effect=summarize):
+            compactor.submit("t1", ["a"])
+            self.assertTrue(started.wait(5))
+            compactor.submit("t1", ["b"])
+            compactor.submit("t1", ["c"])
+            release.set()
+            self.assertTrue(compactor.join(timeout=5))
+
+        # Turns queued while the first summary ran are folded in one call
+        self.assertEqual(calls, [(None, ["a"]), ("None+1", ["b", "c"])])
+        self.assertEqual(compactor.get_summary("t1"), "None+1+2")
+
+    def test_failure_keeps_previous_summary(self):
+        compactor = HistoryCompactor()
+        compactor.summaries["t1"] = "old"
+        with patch.object(compactor, "summarize", side_effect=ValueError("boom")):
+            compactor.submit("t1", ["a"])
+            self.assertTrue(compactor.join(timeout=5))
+        self.assertEqual(compactor.get_summary("t1"), "old")
+
+    def test_forget(self):
+        compactor = HistoryCompactor()
+        compactor.summaries["t1"] = "old"
+        compactor.forget("t1")
+        self.assertIsNone(compactor.get_summary("t1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
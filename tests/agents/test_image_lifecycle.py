@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fluctlight.agents.image_lifecycle import (
+    ImageLifecycle,
+    ImageReference,
+    refers_to_image,
+)
+
+
+def make_image_part(data: str = "abc") -> dict:
+    return {
+        "type": "image_url",
+        "image_url": {"url": f"data:image/jpeg;base64,{data}", "detail": "low"},
+    }
+
+
+class TestImageLifecycle(unittest.TestCase):
+    def test_refers_to_image(self):
+        self.assertTrue(refers_to_image("What color is the car in the Photo?"))
+        self.assertTrue(refers_to_image("zoom in the screenshot"))
+        self.assertFalse(refers_to_image("thanks, imagine that"))
+
+    def test_retire_replaces_inline_parts(self):
+        lifecycle = ImageLifecycle(caption=False)
+        reference = ImageReference(attachment_id=1, url="https://x/1.jpg")
+        image_part = make_image_part()
+        untracked_part = make_image_part("other")
+        url_part = {"type": "image_url", "image_url": {"url": "https://x/2.jpg"}}
+        messages = [
+            {"role": "system", "content": "be nice"},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "look"},
+                    # A copy, e.g. restored from the STATE_BACKEND
+                    dict(image_part),
+                    untracked_part,
+                    url_part,
+                ],
+            },
+        ]
+        lifecycle.track("t1", reference, image_part)
+        reference.caption = "a red car"
+        lifecycle.retire("t1", messages)
+
+        self.assertEqual(
+            messages[1]["content"],
+            [
+                {"type": "text", "text": "look"},
+                {"type": "text", "text": "[image 1: a red car]"},
+                {"type": "text", "text": "[image: attached earlier]"},
+                url_part,
+            ],
+        )
+
+    def test_select_reinclusion(self):
+        lifecycle = ImageLifecycle(caption=False, reinclude_limit=1)
+        first = ImageReference(attachment_id=1, url="https://x/1.jpg")
+        second = ImageReference(attachment_id=2, url="https://x/2.jpg")
+        lifecycle.track("t1", first, make_image_part())
+        lifecycle.track("t1", second, make_image_part())
+
+        self.assertEqual(lifecycle.select_reinclusion("t1", "ok thanks"), [])
+        self.assertEqual(
+            lifecycle.select_reinclusion("t1", "what is on the picture?"), [second]
+        )
+        self.assertEqual(lifecycle.select_reinclusion("t2", "the picture?"), [])
+
+        lifecycle.forget("t1")
+        self.assertEqual(lifecycle.select_reinclusion("t1", "the picture?"), [])
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    def test_caption_in_background(self, mock_chat_complete):
+        mock_chat_complete.return_value.choices = [
+            MagicMock(message=MagicMock(content="a cat on a sofa"))
+        ]
+        lifecycle = ImageLifecycle(caption_model_key="gpt-4o-mini")
+        reference = ImageReference(attachment_id=1, url="https://x/1.jpg")
+        image_part = make_image_part()
+
+        lifecycle.track("t1", reference, image_part)
+        lifecycle._executor.shutdown(wait=True)
+
+        self.assertEqual(reference.caption, "a cat on a sofa")
+        kwargs = mock_chat_complete.call_args.kwargs
+        self.assertEqual(kwargs["model_key"], "gpt-4o-mini")
+        self.assertEqual(
+            kwargs["messages"][0]["content"][1]["image_url"]["url"],
+            image_part["image_url"]["url"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
+import os
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
 from fluctlight.intent.message_intent import create_intent, DEFAULT_CHAT_INTENT
+from fluctlight.utt.state_backend import SqliteStateBackend, ThreadStatePersister
 from tests.data.imessages import (
     MESSAGE_HELLO_WORLD,
     MESSAGE_HELLO_WORLD2,
@@ -86,10 +91,11 @@ class TestOpenAiChatAgent(unittest.TestCase):
             # Replace 'type' with the actual key used to determine message type
             self.assertEqual(expected_order[i], message["role"])
 
-    @patch("fluctlight.agents.openai_chat_agent.base64_encode_media")
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
     @patch("fluctlight.agents.openai_chat_agent.chat_complete")
     def test_process_message_with_vision_input(
-        self, mock_chat_complete: MagicMock, mock_base64_encode_media: MagicMock
+        self, mock_chat_complete: MagicMock, mock_base64_encode_media: MagicMock, _
     ):
         # Mocking OpenAI response
         mock_response_text = "a image of a cat"
@@ -99,7 +105,7 @@ class TestOpenAiChatAgent(unittest.TestCase):
         ]
         mock_chat_complete.return_value = mock_response
         base64_image_encoded = "base64_image_encoded"
-        mock_base64_encode_media.return_value = base64_image_encoded
+        mock_base64_encode_media.return_value = (base64_image_encoded, "image/jpeg")
 
         agent = OpenAiChatAgent(
             chat_model_id="gpt-chat",
@@ -138,6 +144,415 @@ class TestOpenAiChatAgent(unittest.TestCase):
         )
         mock_base64_encode_media.assert_called_once()
 
+    @patch("fluctlight.open.tokens.get_encoding", return_value=None)
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_process_message_history_token_budget(
+        self, mock_chat_complete: MagicMock, _
+    ):
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(content="response"))]
+        mock_chat_complete.return_value = mock_response
+        agent = OpenAiChatAgent(chat_model_id="gpt-4o", history_token_budget=1)
+        thread_id = MESSAGE_HELLO_WORLD.thread_message_id
+
+        agent.process_message(
+            message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+        )
+        agent.process_message(
+            message=MESSAGE_HELLO_WORLD2, message_intent=DEFAULT_CHAT_INTENT
+        )
+
+        # The system prompt and the latest user turn are always kept
+        self.assertEqual(
+            ["system", "user", "assistant"],
+            [m["role"] for m in agent.message_buffer[thread_id]],
+        )
+        self.assertEqual(
+            ["user", "assistant"],
+            [m["role"] for m in agent.dropped_turns[thread_id]],
+        )
+        self.assertEqual(
+            MESSAGE_HELLO_WORLD2.text,
+            agent.message_buffer[thread_id][1]["content"][0]["text"],
+        )
+
+    @patch("fluctlight.open.tokens.get_encoding", return_value=None)
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_process_message_thread_eviction(self, mock_chat_complete: MagicMock, _):
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(content="response"))]
+        mock_chat_complete.return_value = mock_response
+        agent = OpenAiChatAgent(
+            chat_model_id="gpt-4o", buffer_limit=1, history_token_budget=1
+        )
+        agent.image_lifecycle = MagicMock()
+        first_thread_id = MESSAGE_HELLO_WORLD.thread_message_id
+        agent.process_message(
+            message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+        )
+        agent.process_message(
+            message=MESSAGE_HELLO_WORLD2, message_intent=DEFAULT_CHAT_INTENT
+        )
+        self.assertIn(first_thread_id, agent.dropped_turns)
+
+        agent.process_message(
+            message=MESSAGE_HELLO_WORLD.model_copy(update={"thread_message_id": 42}),
+            message_intent=DEFAULT_CHAT_INTENT,
+        )
+
+        self.assertEqual(list(agent.message_buffer), [42])
+        self.assertNotIn(first_thread_id, agent.dropped_turns)
+        agent.image_lifecycle.forget.assert_called_once_with(first_thread_id)
+        self.assertEqual(agent.message_buffer.gauges["evictions"], 1)
+        self.assertGreater(agent.message_buffer.gauges["bytes"], 0)
+
+    @patch("fluctlight.open.tokens.get_encoding", return_value=None)
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_no_dropped_turns_without_summary(self, mock_chat_complete: MagicMock, _):
+        mock_chat_complete.return_value.choices = [
+            MagicMock(message=MagicMock(content="response"))
+        ]
+        agent = OpenAiChatAgent(
+            chat_model_id="gpt-4o", history_token_budget=1, summarize_history=False
+        )
+        for _ in range(3):
+            agent.process_message(
+                message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+            )
+        self.assertIsNone(agent.dropped_turns)
+        self.assertEqual(
+            len(agent.message_buffer[MESSAGE_HELLO_WORLD.thread_message_id]), 3
+        )
+
+    @patch("fluctlight.open.tokens.get_encoding", return_value=None)
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_process_message_history_summary(self, mock_chat_complete: MagicMock, _):
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(content="response"))]
+        mock_chat_complete.return_value = mock_response
+        agent = OpenAiChatAgent(
+            chat_model_id="gpt-4o", history_token_budget=1, summary_batch=2
+        )
+        thread_id = MESSAGE_HELLO_WORLD.thread_message_id
+
+        with patch.object(
+            agent.history_compactor, "summarize", return_value="user said hello"
+        ) as mock_summarize:
+            agent.process_message(
+                message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+            )
+            agent.process_message(
+                message=MESSAGE_HELLO_WORLD2, message_intent=DEFAULT_CHAT_INTENT
+            )
+            self.assertTrue(agent.history_compactor.join(timeout=5))
+            mock_summarize.assert_called_once_with(
+                None,
+                [f"[user]: {MESSAGE_HELLO_WORLD.text}", "[assistant]: response"],
+            )
+            self.assertNotIn(thread_id, agent.dropped_turns)
+
+            agent.process_message(
+                message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+            )
+            self.assertTrue(agent.history_compactor.join(timeout=5))
+        messages = mock_chat_complete.call_args.kwargs["messages"]
+        self.assertEqual(["system", "system", "user"], [m["role"] for m in messages])
+        self.assertIn("user said hello", messages[1]["content"])
+
+    @patch("fluctlight.open.tokens.get_encoding", return_value=None)
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_summary_kept_for_persisted_history(self, mock_chat_complete: MagicMock, _):
+        mock_chat_complete.return_value.choices = [
+            MagicMock(message=MagicMock(content="response"))
+        ]
+        thread_id = MESSAGE_HELLO_WORLD.thread_message_id
+        other_thread = MESSAGE_HELLO_WORLD.model_copy(update={"thread_message_id": 42})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            persister = ThreadStatePersister(
+                SqliteStateBackend(os.path.join(tmp_dir, "state.db")),
+                flush_interval_sec=3600,
+            )
+            with patch(
+                "fluctlight.utt.state_store.get_thread_state_persister",
+                return_value=persister,
+            ):
+                agent = OpenAiChatAgent(
+                    chat_model_id="gpt-4o",
+                    buffer_limit=1,
+                    history_token_budget=1,
+                    summary_batch=2,
+                )
+                with patch.object(
+                    agent.history_compactor, "summarize", return_value="said hello"
+                ):
+                    for message in (MESSAGE_HELLO_WORLD, MESSAGE_HELLO_WORLD2):
+                        agent.process_message(
+                            message, message_intent=DEFAULT_CHAT_INTENT
+                        )
+                    self.assertTrue(agent.history_compactor.join(timeout=5))
+
+                # Evicted from memory by another thread, reloaded with its summary
+                agent.process_message(other_thread, message_intent=DEFAULT_CHAT_INTENT)
+                self.assertNotIn(thread_id, list(agent.message_buffer))
+                agent.process_message(
+                    MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+                )
+                messages = mock_chat_complete.call_args.kwargs["messages"]
+                self.assertIn("said hello", messages[1]["content"])
+
+                # And after a restart
+                restarted = OpenAiChatAgent(
+                    chat_model_id="gpt-4o", history_token_budget=0
+                )
+                restarted.process_message(
+                    MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+                )
+                messages = mock_chat_complete.call_args.kwargs["messages"]
+                self.assertIn("said hello", messages[1]["content"])
+            persister.close()
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_process_message_image_lifecycle(
+        self,
+        mock_chat_complete: MagicMock,
+        mock_base64_encode_media: MagicMock,
+        mock_caption_chat_complete: MagicMock,
+    ):
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(content="a cat"))]
+        mock_chat_complete.return_value = mock_response
+        mock_caption_chat_complete.return_value.choices = [
+            MagicMock(message=MagicMock(content="a cat on a sofa"))
+        ]
+        mock_base64_encode_media.return_value = ("base64_image_encoded", "image/jpeg")
+        agent = OpenAiChatAgent(chat_model_id="gpt-4o")
+        thread_id = MESSAGE_WITH_IMAGE.thread_message_id
+        attachment_id = MESSAGE_WITH_IMAGE.attachments[0].id
+
+        agent.process_message(MESSAGE_WITH_IMAGE, message_intent=DEFAULT_CHAT_INTENT)
+        agent.image_lifecycle._executor.shutdown(wait=True)
+        agent.process_message(MESSAGE_HELLO_WORLD2, message_intent=DEFAULT_CHAT_INTENT)
+
+        # The image of the first turn is replaced by its caption
+        first_user_content = agent.message_buffer[thread_id][1]["content"]
+        self.assertEqual(
+            first_user_content[1],
+            {"type": "text", "text": f"[image {attachment_id}: a cat on a sofa]"},
+        )
+        self.assertEqual(mock_base64_encode_media.call_count, 1)
+
+        # Referring back to the image sends it again for the turn
+        follow_up = MESSAGE_HELLO_WORLD2.model_copy()
+        follow_up.text = "what color is the sofa in the image?"
+        agent.process_message(follow_up, message_intent=DEFAULT_CHAT_INTENT)
+        self.assertEqual(mock_base64_encode_media.call_count, 2)
+        last_user_content = mock_chat_complete.call_args.kwargs["messages"][-1][
+            "content"
+        ]
+        self.assertEqual(last_user_content[1]["type"], "image_url")
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
+    @patch("fluctlight.agents.openai_chat_agent.chat_complete")
+    def test_retire_images_of_restored_history(
+        self, mock_chat_complete: MagicMock, mock_base64_encode_media: MagicMock, _
+    ):
+        mock_chat_complete.return_value.choices = [
+            MagicMock(message=MagicMock(content="a cat"))
+        ]
+        mock_base64_encode_media.return_value = ("base64_image_encoded", "image/jpeg")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            persister = ThreadStatePersister(
+                SqliteStateBackend(os.path.join(tmp_dir, "state.db")),
+                flush_interval_sec=3600,
+            )
+            with patch(
+                "fluctlight.utt.state_store.get_thread_state_persister",
+                return_value=persister,
+            ):
+                agent = OpenAiChatAgent(chat_model_id="gpt-4o")
+                agent.process_message(
+                    MESSAGE_WITH_IMAGE, message_intent=DEFAULT_CHAT_INTENT
+                )
+                persister.flush()
+
+                # Restarted, the history is loaded from the backend
+                restarted = OpenAiChatAgent(chat_model_id="gpt-4o")
+                restarted.process_message(
+                    MESSAGE_HELLO_WORLD2, message_intent=DEFAULT_CHAT_INTENT
+                )
+            persister.close()
+
+        messages = mock_chat_complete.call_args.kwargs["messages"]
+        self.assertNotIn("data:", str(messages))
+        self.assertEqual(
+            messages[1]["content"][1],
+            {"type": "text", "text": "[image: attached earlier]"},
+        )
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
+    def test_process_files_concurrent_in_order(
+        self, mock_base64_encode_media: MagicMock, _
+    ):
+        release = threading.Event()
+
+        def encode(url, bearer_token=None, timeout=None, cache_key=None):
+            if url.endswith("slow.jpg"):
+                release.wait(5)
+            elif url.endswith("bad.jpg"):
+                raise ValueError("boom")
+            else:
+                release.set()
+            return url, "image/jpeg"
+
+        mock_base64_encode_media.side_effect = encode
+        agent = OpenAiChatAgent(attachment_max_workers=3)
+        message = MESSAGE_WITH_IMAGE.model_copy()
+        attachment = MESSAGE_WITH_IMAGE.attachments[0]
+        message.attachments = [
+            attachment.model_copy(update={"id": idx, "url": url, "filename": url})
+            for idx, url in enumerate(["slow.jpg", "bad.jpg", "fast.jpg"])
+        ]
+
+        data, skipped = agent.process_files(message)
+
+        # The slow download only finishes once the fast one ran in parallel
+        self.assertEqual(data[0]["image_url"]["url"], "data:image/jpeg;base64,slow.jpg")
+        self.assertEqual(
+            data[1],
+            {"type": "text", "text": "[attachment bad.jpg could not be processed]"},
+        )
+        self.assertEqual(data[2]["image_url"]["url"], "data:image/jpeg;base64,fast.jpg")
+        self.assertEqual(skipped, ["bad.jpg (could not be processed)"])
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
+    def test_process_files_timeout_per_attachment(
+        self, mock_base64_encode_media: MagicMock, _
+    ):
+        release = threading.Event()
+        started = []
+
+        def encode(url, bearer_token=None, timeout=None, cache_key=None):
+            started.append(url)
+            if url == "hang.jpg":
+                release.wait(5)
+            else:
+                time.sleep(0.3)
+            return url, "image/jpeg"
+
+        mock_base64_encode_media.side_effect = encode
+        # One worker, each attachment gets its own timeout from when it starts
+        agent = OpenAiChatAgent(attachment_max_workers=1, attachment_timeout_sec=0.5)
+        message = MESSAGE_WITH_IMAGE.model_copy()
+        attachment = MESSAGE_WITH_IMAGE.attachments[0]
+        message.attachments = [
+            attachment.model_copy(update={"id": idx, "url": url, "filename": url})
+            for idx, url in enumerate(["a.jpg", "b.jpg", "hang.jpg"])
+        ]
+
+        try:
+            content, notes = agent._collect_content(message)
+        finally:
+            release.set()
+
+        self.assertEqual(content[1]["image_url"]["url"], "data:image/jpeg;base64,b.jpg")
+        self.assertEqual(
+            content[2], {"type": "text", "text": "[attachment hang.jpg timed out]"}
+        )
+        self.assertEqual(notes, ["Skipped attachments: hang.jpg (timed out)"])
+        # The hung attachment timed out after it started, not in the queue
+        self.assertEqual(started, ["a.jpg", "b.jpg", "hang.jpg"])
+
+    @patch("fluctlight.agents.image_lifecycle.chat_complete")
+    @patch("fluctlight.agents.openai_chat_agent.base64_encode_image")
+    def test_process_files_queue_cap(self, mock_base64_encode_media: MagicMock, _):
+        release = threading.Event()
+        started = []
+
+        def encode(url, bearer_token=None, timeout=None, cache_key=None):
+            started.append(url)
+            release.wait(5)
+            return url, "image/jpeg"
+
+        mock_base64_encode_media.side_effect = encode
+        agent = OpenAiChatAgent(attachment_max_workers=1, attachment_timeout_sec=0.2)
+        message = MESSAGE_WITH_IMAGE.model_copy()
+        attachment = MESSAGE_WITH_IMAGE.attachments[0]
+        message.attachments = [
+            attachment.model_copy(update={"id": idx, "url": url, "filename": url})
+            for idx, url in enumerate(["hang1.jpg", "hang2.jpg"])
+        ]
+
+        try:
+            _, skipped = agent.process_files(message)
+        finally:
+            release.set()
+
+        # The worker is held by the first one, the second never ran
+        self.assertEqual(started, ["hang1.jpg"])
+        self.assertEqual(
+            skipped, ["hang1.jpg (timed out)", "hang2.jpg (not started in time)"]
+        )
+
+    @patch("fluctlight.agents.openai_chat_agent.download_media", return_value=b"ogg")
+    def test_transcribe_audio_cached(self, mock_download_media: MagicMock):
+        cache = MagicMock()
+        cache.get_artifact.side_effect = [None, "hello"]
+        agent = OpenAiChatAgent()
+        agent.speech_to_text = MagicMock()
+        agent.speech_to_text.transcribe.return_value = "hello"
+        attachment = MESSAGE_WITH_IMAGE.attachments[0].model_copy(
+            update={"content_type": "audio/ogg"}
+        )
+
+        with patch(
+            "fluctlight.agents.openai_chat_agent.get_attachment_cache",
+            return_value=cache,
+        ):
+            self.assertEqual(agent._transcribe_audio(attachment), "hello")
+            self.assertEqual(agent._transcribe_audio(attachment), "hello")
+
+        cache_key = f"attachment:{attachment.id}"
+        mock_download_media.assert_called_once_with(
+            attachment.url,
+            bearer_token=agent.bearer_token,
+            timeout=agent.attachment_timeout_sec,
+            cache_key=cache_key,
+        )
+        agent.speech_to_text.transcribe.assert_called_once_with(audio_bytes=b"ogg")
+        cache.set_artifact.assert_called_once_with(cache_key, "transcript", "hello")
+
+
+class TestOpenAiChatAgentAsync(unittest.IsolatedAsyncioTestCase):
+    @patch("fluctlight.agents.openai_chat_agent.achat_complete", new_callable=AsyncMock)
+    async def test_aprocess_message(self, mock_achat_complete: AsyncMock):
+        mock_response_text = "mocked async response"
+        mock_response = MagicMock()
+        mock_response.choices = [
+            MagicMock(message=MagicMock(content=mock_response_text))
+        ]
+        mock_achat_complete.return_value = mock_response
+        agent = OpenAiChatAgent(chat_model_id="gpt-4o")
+
+        response = await agent.acall(
+            message=MESSAGE_HELLO_WORLD, message_intent=DEFAULT_CHAT_INTENT
+        )
+
+        self.assertEqual(response, [mock_response_text])
+        mock_achat_complete.assert_awaited_once()
+        expected_order = ["system", "user", "assistant"]
+        self.assertEqual(
+            expected_order,
+            [
+                m["role"]
+                for m in agent.message_buffer[MESSAGE_HELLO_WORLD.thread_message_id]
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
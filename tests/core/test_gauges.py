@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import patch
+
+from fluctlight.core import gauges
+from fluctlight.open.rate_limit import RateLimiterRegistry
+from fluctlight.utt.state_store import ConversationStateStore
+
+
+class TestGauges(unittest.TestCase):
+    def setUp(self) -> None:
+        gauges._last_log_time = None  # pylint: disable=protected-access
+
+    def test_get_gauges(self):
+        registry = RateLimiterRegistry(limits={"openai:gpt-4o": (60, 0)})
+        registry.get("openai:gpt-4o")
+        with patch("fluctlight.core.gauges.get_rate_limiters", return_value=registry):
+            self.assertEqual(
+                gauges.get_gauges()["rate_limit_queue_depths"], {"openai:gpt-4o": 0}
+            )
+
+    def test_state_store_gauges(self):
+        store = ConversationStateStore("test_gauges_log", max_entries=1)
+        store["t1"] = "a"
+        store["t2"] = "bc"
+        self.assertEqual(
+            gauges.get_gauges()["state_stores"]["test_gauges_log"],
+            {"entries": 1, "bytes": 2, "evictions": 1},
+        )
+
+    def test_log_once_per_interval(self):
+        with patch.object(gauges.logger, "debug") as debug:
+            self.assertTrue(gauges.log_gauges(interval_sec=3600))
+            self.assertFalse(gauges.log_gauges(interval_sec=3600))
+            self.assertFalse(gauges.log_gauges(interval_sec=0))
+        debug.assert_called_once()
+        self.assertIn("rate_limit_queue_depths", debug.call_args.kwargs)
+        self.assertIn("state_stores", debug.call_args.kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+from fluctlight.intent.intent_agent import IntentAgent
+from fluctlight.intent.intent_matcher_base import IntentMatcher
+
+
+class CountingIntentMatcher(IntentMatcher):
+    """Parses every text as intent_key, counting the parse calls."""
+
+    def __init__(self, agents: list[IntentAgent], intent_key: str | None) -> None:
+        super().__init__(agents=agents)
+        self.intent_key = intent_key
+        self.parsed = 0
+
+    def parse_intent_key(self, text: str) -> str | None:
+        self.parsed += 1
+        return self.intent_key
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from fluctlight.agents.expert.shopping_assist import (
+    INTENT_KEY as shopping_assisist_intent_key,
+)
+from fluctlight.agents.expert.shopping_assist import (
+    create_shopping_assist_task_graph_agent,
+)
+from fluctlight.agents.miao_agent import MiaoAgent
+from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
+from fluctlight.intent.embedding_intent_matcher import EmbeddingIntentMatcher, top_two
+from fluctlight.open.embedding import normalize_rows
+
+# Query vectors by text, agent descriptions get one axis each
+_QUERIES = {
+    "order a pair of shoes": [0.1, 0.0, 1.0],
+    "hmm": [0.6, 0.0, 0.58],
+}
+
+
+def fake_embed_texts(texts: list[str], model_key: str) -> np.ndarray:
+    if len(texts) > 1:
+        return np.eye(len(texts), dtype=np.float32)
+    return normalize_rows(np.array([_QUERIES[texts[0]]], dtype=np.float32))
+
+
+class TestEmbeddingIntentMatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.intent_matcher = EmbeddingIntentMatcher(
+            [
+                OpenAiChatAgent(),
+                MiaoAgent(),
+                create_shopping_assist_task_graph_agent(),
+            ],
+            margin=0.05,
+        )
+
+    def test_top_two(self):
+        self.assertEqual(top_two(np.array([0.2, 0.9, 0.7]))[0], 1)
+        self.assertAlmostEqual(top_two(np.array([0.2, 0.9, 0.7]))[1], 0.2)
+        self.assertEqual(top_two(np.array([0.4])), (0, float("inf")))
+
+    @patch(
+        "fluctlight.intent.embedding_intent_matcher.embed_texts",
+        side_effect=fake_embed_texts,
+    )
+    def test_embedding_match(self, mock_embed_texts):
+        self.assertEqual(
+            self.intent_matcher.intent_keylist[2], shopping_assisist_intent_key
+        )
+        with patch.object(
+            self.intent_matcher.graph, "invoke", side_effect=AssertionError
+        ):
+            self.assertEqual(
+                self.intent_matcher.parse_intent_key("order a pair of shoes"),
+                shopping_assisist_intent_key,
+            )
+            self.intent_matcher.parse_intent_key("order a pair of shoes")
+        # Descriptions embedded once, then one call per message
+        self.assertEqual(mock_embed_texts.call_count, 3)
+        self.assertEqual(self.intent_matcher.embedding_matches, 2)
+        self.assertEqual(self.intent_matcher.llm_matches, 0)
+
+    @patch(
+        "fluctlight.intent.embedding_intent_matcher.embed_texts",
+        side_effect=fake_embed_texts,
+    )
+    @patch("fluctlight.intent.rag_intent_matcher.RagIntentMatcher.parse_intent_key")
+    def test_low_margin_fallback_to_llm(self, mock_parse_intent_key, _):
+        mock_parse_intent_key.return_value = "MIAO"
+        self.assertEqual(self.intent_matcher.parse_intent_key("hmm"), "MIAO")
+        mock_parse_intent_key.assert_called_once_with("hmm")
+        self.assertEqual(self.intent_matcher.llm_matches, 1)
+
+    @patch(
+        "fluctlight.intent.embedding_intent_matcher.embed_texts",
+        side_effect=RuntimeError("down"),
+    )
+    @patch("fluctlight.intent.rag_intent_matcher.RagIntentMatcher.parse_intent_key")
+    def test_embedding_error_fallback_to_llm(self, mock_parse_intent_key, _):
+        mock_parse_intent_key.return_value = "CHAT"
+        self.assertEqual(self.intent_matcher.parse_intent_key("hi"), "CHAT")
+
+
+if __name__ == "__main__":
+    unittest.main()
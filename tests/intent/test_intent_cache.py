@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+from fluctlight.agents.miao_agent import MiaoAgent
+from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
+from fluctlight.intent.intent_cache import IntentCache, normalize_intent_text
+from tests.data.imessages import MESSAGE_HELLO_WORLD
+from tests.intent.intent_test_utils import CountingIntentMatcher
+
+
+class TestIntentCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.agents = [OpenAiChatAgent(), MiaoAgent()]
+
+    def test_normalize_intent_text(self):
+        self.assertEqual(normalize_intent_text("<@U123>  Hi \n  Bot "), "hi bot")
+        self.assertEqual(normalize_intent_text("<@!42> HI BOT"), "hi bot")
+        self.assertEqual(
+            normalize_intent_text(":shop: Buy <@U123> shoes"), ":shop: buy shoes"
+        )
+
+    def test_get_set(self):
+        cache = IntentCache(max_size=2)
+        self.assertIsNone(cache.get(self.agents, "hi bot"))
+        cache.set(self.agents, "hi bot", "CHAT")
+        self.assertEqual(cache.get(self.agents, "<@U1> Hi  bot"), "CHAT")
+        self.assertEqual(
+            cache.stats,
+            {
+                "hits": 1,
+                "misses": 1,
+                "hit_ratio": 0.5,
+                "size": 1,
+                "invalidations": 0,
+            },
+        )
+
+    def test_invalidate_when_agents_change(self):
+        cache = IntentCache()
+        cache.set(self.agents, "hi bot", "CHAT")
+        self.assertIsNone(cache.get(self.agents[:1], "hi bot"))
+        self.assertEqual(cache.stats["invalidations"], 1)
+
+        with patch.object(
+            MiaoAgent, "description", new_callable=lambda: property(lambda _: "new")
+        ):
+            cache.set(self.agents, "hi bot", "MIAO")
+        self.assertIsNone(cache.get(self.agents, "hi bot"))
+
+    def test_expire(self):
+        cache = IntentCache(ttl_sec=0)
+        cache.set(self.agents, "hi bot", "CHAT")
+        self.assertIsNone(cache.get(self.agents, "hi bot"))
+
+    @patch("fluctlight.intent.intent_matcher_base.INTENT_LLM_MATCHING", True)
+    @patch("fluctlight.intent.intent_matcher_base.INTENT_CHAR_MATCHING", False)
+    def test_shared_across_threads(self):
+        matcher = CountingIntentMatcher(self.agents, "MIAO")
+        intent = matcher.match_message_intent(MESSAGE_HELLO_WORLD)
+        self.assertNotIn("intent_cache_hit", intent.metadata)
+
+        message = MESSAGE_HELLO_WORLD.model_copy(
+            update={"text": " hello   WORLD!!!", "thread_message_id": 42}
+        )
+        intent = matcher.match_message_intent(message)
+
+        self.assertEqual(intent.key, "MIAO")
+        self.assertTrue(intent.metadata["intent_cache_hit"])
+        self.assertEqual(matcher.parsed, 1)
+        self.assertEqual(matcher.intent_cache.stats["hit_ratio"], 0.5)
+
+    @patch("fluctlight.intent.intent_matcher_base.INTENT_LLM_MATCHING", True)
+    @patch("fluctlight.intent.intent_matcher_base.INTENT_CHAR_MATCHING", False)
+    def test_fallback_not_cached(self):
+        # No llm decision, e.g. a refusal
+        matcher = CountingIntentMatcher(self.agents, None)
+        intent = matcher.match_message_intent(MESSAGE_HELLO_WORLD)
+        self.assertEqual(intent.key, "CHAT")
+        self.assertTrue(intent.metadata["fallback_to_chat"])
+
+        message = MESSAGE_HELLO_WORLD.model_copy(update={"thread_message_id": 42})
+        matcher.match_message_intent(message)
+        self.assertEqual(matcher.parsed, 2)
+        self.assertEqual(matcher.intent_cache.stats["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 
+from pydantic import ValidationError
+
 from fluctlight.intent.intent_candidate import (
     IntentCandidate,
+    make_intent_candidate_schema,
     parse_intent_candidate_json,
 )
 
@@ -25,6 +28,18 @@ class TestIntentCandidate(unittest.TestCase):
         expected_json = f"{{{candidate.model_dump_json()}}}"
         self.assertEqual(candidate.perfered_json_serialization, expected_json)
 
+    def test_make_intent_candidate_schema(self):
+        schema = make_intent_candidate_schema(["CHAT", "MIAO"])
+        json_schema = schema.model_json_schema()
+        self.assertEqual(
+            json_schema["properties"]["intent_primary"]["enum"], ["CHAT", "MIAO"]
+        )
+        candidate = schema(understanding="", intent_primary="MIAO")
+        self.assertIsInstance(candidate, IntentCandidate)
+        self.assertIsNone(candidate.intent_secondary)
+        with self.assertRaises(ValidationError):
+            schema(understanding="", intent_primary="ORDER_FOOD")
+
     def test_parse_intent_candidate_json_success(self):
         json_text = """
         {
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from fluctlight.agents.miao_agent import MiaoAgent
+from fluctlight.agents.openai_chat_agent import OpenAiChatAgent
+from fluctlight.cli import main
+from fluctlight.intent.local_classifier import (
+    IntentExampleLog,
+    LocalIntentClassifier,
+    hash_features,
+    read_intent_examples,
+    train_local_intent_classifier,
+)
+from tests.data.imessages import MESSAGE_HELLO_WORLD
+from tests.intent.intent_test_utils import CountingIntentMatcher
+
+EXAMPLES = [
+    ("show me a cat picture", "MIAO"),
+    ("meow meow", "MIAO"),
+    ("I love kittens", "MIAO"),
+    ("tell me a cat joke", "MIAO"),
+    ("do you like cats", "MIAO"),
+    ("how is the weather today", "CHAT"),
+    ("let's have a free chat", "CHAT"),
+    ("what do you think about movies", "CHAT"),
+    ("tell me about history", "CHAT"),
+    ("good morning", "CHAT"),
+]
+
+
+class TestLocalIntentClassifier(unittest.TestCase):
+    def test_hash_features(self):
+        indices, values = hash_features("Buy buy shoes", n_features=1024)
+        self.assertEqual(len(indices), len(set(indices)))
+        self.assertTrue(all(0 <= i < 1024 for i in indices))
+        self.assertGreater(values.max(), 1.0)
+        self.assertEqual(len(hash_features("")[0]), 0)
+
+    def test_train_predict_save_load(self):
+        classifier = train_local_intent_classifier(EXAMPLES, n_features=4096)
+        self.assertEqual(classifier.labels, ["CHAT", "MIAO"])
+        self.assertEqual(classifier.predict("a cat picture please")[0], "MIAO")
+        self.assertEqual(classifier.predict("how is the weather")[0], "CHAT")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "classifier.npz")
+            classifier.save(path)
+            loaded = LocalIntentClassifier.load(path)
+        self.assertEqual(loaded.labels, classifier.labels)
+        self.assertEqual(loaded.predict("meow"), classifier.predict("meow"))
+
+    def test_example_log(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "examples.jsonl")
+            log = IntentExampleLog(path)
+            log.append("meow", "MIAO", source="llm")
+            log.append("hi", "CHAT", source="llm")
+            with open(path, "a", encoding="utf8") as f:
+                f.write("not json\n")
+            self.assertEqual(
+                read_intent_examples(path), [("meow", "MIAO"), ("hi", "CHAT")]
+            )
+
+    def test_train_cli(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            examples_path = os.path.join(tmp_dir, "examples.jsonl")
+            output_path = os.path.join(tmp_dir, "classifier.npz")
+            log = IntentExampleLog(examples_path)
+            for text, intent_key in EXAMPLES:
+                log.append(text, intent_key, source="llm")
+
+            result = CliRunner().invoke(
+                main,
+                [
+                    "train-intent-classifier",
+                    "--examples",
+                    examples_path,
+                    "--output",
+                    output_path,
+                ],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("train accuracy 1.000", result.output)
+            self.assertEqual(
+                LocalIntentClassifier.load(output_path).labels, ["CHAT", "MIAO"]
+            )
+
+
+@patch("fluctlight.intent.intent_matcher_base.INTENT_LLM_MATCHING", True)
+@patch("fluctlight.intent.intent_matcher_base.INTENT_CHAR_MATCHING", False)
+class TestLocalIntentMatching(unittest.TestCase):
+    def setUp(self) -> None:
+        self.matcher = CountingIntentMatcher([OpenAiChatAgent(), MiaoAgent()], "CHAT")
+        self.matcher.intent_cache = None
+        self.matcher.local_classifier = train_local_intent_classifier(
+            EXAMPLES, n_features=4096
+        )
+
+    def test_confident_local_match(self):
+        self.matcher.local_classifier_threshold = 0.5
+        message = MESSAGE_HELLO_WORLD.model_copy(update={"text": "cat picture meow"})
+        intent = self.matcher.match_message_intent(message)
+        self.assertEqual(intent.key, "MIAO")
+        self.assertTrue(intent.metadata["local_match"])
+        self.assertEqual(self.matcher.parsed, 0)
+
+    def test_low_confidence_fallback_to_llm_and_log(self):
+        self.matcher.local_classifier_threshold = 1.0
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "examples.jsonl")
+            self.matcher.example_log = IntentExampleLog(path)
+            message = MESSAGE_HELLO_WORLD.model_copy(update={"text": "hello there"})
+            intent = self.matcher.match_message_intent(message)
+            self.assertEqual(read_intent_examples(path), [("hello there", "CHAT")])
+        self.assertTrue(intent.metadata["llm_match"])
+        self.assertEqual(self.matcher.parsed, 1)
+
+    def test_fallback_not_logged(self):
+        self.matcher.local_classifier_threshold = 1.0
+        # No llm decision, the chat fallback is not a label to learn from
+        self.matcher.intent_key = None
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "examples.jsonl")
+            self.matcher.example_log = IntentExampleLog(path)
+            message = MESSAGE_HELLO_WORLD.model_copy(update={"text": "hello there"})
+            intent = self.matcher.match_message_intent(message)
+            self.assertFalse(os.path.exists(path))
+        self.assertTrue(intent.metadata["fallback_to_chat"])
+        self.assertNotIn("llm_match", intent.metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
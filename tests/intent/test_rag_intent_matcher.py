@@ -1,5 +1,6 @@
 import os
 import unittest
+from unittest.mock import MagicMock, patch
 
 from langchain_core.messages import HumanMessage
 
@@ -77,6 +78,31 @@ class TestRagIntentMatcher(unittest.TestCase):
         message_intent_key = self.intent_matcher.parse_final_state(state)
         self.assertEqual(message_intent_key, shopping_assisist_intent_key)
 
+    @patch("fluctlight.intent.rag_intent_matcher.structure_chat_completion")
+    def test_parse_intent_structured(self, mock_structure_chat_completion):
+        self.intent_matcher.structured = True
+        schema = self.intent_matcher.intent_candidate_schema
+        mock_structure_chat_completion.return_value.choices = [
+            MagicMock(
+                message=MagicMock(
+                    parsed=schema(
+                        understanding="order",
+                        intent_primary=shopping_assisist_intent_key,
+                    )
+                )
+            )
+        ]
+        with patch.object(
+            self.intent_matcher.graph, "invoke", side_effect=AssertionError
+        ):
+            result = self.intent_matcher.parse_intent_key("Help me order sth")
+
+        self.assertEqual(result, shopping_assisist_intent_key)
+        args, kwargs = mock_structure_chat_completion.call_args
+        self.assertIs(args[0], schema)
+        self.assertIn(shopping_assisist_intent_key, kwargs["messages"][0]["content"])
+        self.assertEqual(kwargs["messages"][1]["content"], "Help me order sth")
+
 
 # Run the tests
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from openai.types.chat import ParsedChatCompletion
+from pydantic import BaseModel
+
+from fluctlight.open.cache import (
+    MemoryCacheTier,
+    ResponseCache,
+    SqliteCacheTier,
+    make_request_key,
+)
+
+
+class Answer(BaseModel):
+    value: int
+
+
+class OtherAnswer(BaseModel):
+    value: int
+
+
+def make_completion(value: int) -> ParsedChatCompletion:
+    return ParsedChatCompletion[Answer].model_validate(
+        {
+            "id": "cmpl-1",
+            "created": 1,
+            "model": "gpt-4o",
+            "object": "chat.completion",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": f'{{"value": {value}}}',
+                        "parsed": {"value": value},
+                    },
+                }
+            ],
+        }
+    )
+
+
+class TestMakeRequestKey(unittest.TestCase):
+    def test_stable_key(self):
+        messages = [{"role": "user", "content": "hi"}]
+        self.assertEqual(
+            make_request_key("gpt-4o", messages, Answer),
+            make_request_key("gpt-4o", [{"content": "hi", "role": "user"}], Answer),
+        )
+
+    def test_key_changes_with_inputs(self):
+        messages = [{"role": "user", "content": "hi"}]
+        key = make_request_key("gpt-4o", messages, Answer)
+        self.assertNotEqual(key, make_request_key("o1", messages, Answer))
+        self.assertNotEqual(key, make_request_key("gpt-4o", messages, OtherAnswer))
+        self.assertNotEqual(
+            key,
+            make_request_key("gpt-4o", [{"role": "user", "content": "hello"}], Answer),
+        )
+
+
+class TestMemoryCacheTier(unittest.TestCase):
+    def test_lru_eviction(self):
+        tier = MemoryCacheTier(max_size=2)
+        tier.set("a", 1)
+        tier.set("b", 2)
+        tier.get("a", Answer)  # a is now most recently used
+        tier.set("c", 3)
+        self.assertEqual(tier.get("a", Answer), 1)
+        self.assertIsNone(tier.get("b", Answer))
+        self.assertEqual(len(tier), 2)
+
+    @patch("fluctlight.open.cache.time.monotonic")
+    def test_ttl_expire(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        tier = MemoryCacheTier(ttl_sec=10)
+        tier.set("a", 1)
+        mock_monotonic.return_value = 105.0
+        self.assertEqual(tier.get("a", Answer), 1)
+        mock_monotonic.return_value = 111.0
+        self.assertIsNone(tier.get("a", Answer))
+
+
+class TestSqliteCacheTier(unittest.TestCase):
+    def test_roundtrip_with_schema(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tier = SqliteCacheTier(os.path.join(tmp_dir, "cache.db"))
+            tier.set("a", make_completion(7))
+            cached = tier.get("a", Answer)
+            self.assertIsInstance(cached.choices[0].message.parsed, Answer)
+            self.assertEqual(cached.choices[0].message.parsed.value, 7)
+            self.assertIsNone(tier.get("b", Answer))
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_stats_and_promotion(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            memory = MemoryCacheTier()
+            disk = SqliteCacheTier(os.path.join(tmp_dir, "cache.db"))
+            cache = ResponseCache(tiers=[memory, disk])
+
+            self.assertIsNone(cache.get("a", Answer))
+            disk.set("a", make_completion(1))
+            self.assertIsNotNone(cache.get("a", Answer))  # disk hit
+            self.assertIsNotNone(cache.get("a", Answer))  # promoted, memory hit
+
+            self.assertEqual(
+                cache.stats,
+                {"hits": {"memory": 1, "sqlite": 1}, "misses": 1, "hit_ratio": 2 / 3},
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,44 @@
+import threading
+import time
 import unittest
-from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch, MagicMock
 from openai.types.chat import ChatCompletion
 from openai.types.chat.chat_completion import Choice
 from openai.types.chat.chat_completion_message import ChatCompletionMessage
+from fluctlight.open.cache import MemoryCacheTier, ResponseCache
 from fluctlight.open.chat import (
     get_provider_and_model_id,
     get_message_from_completion,
     get_parsed_choice_from_completion,
     chat_complete,
+    stream_chat_complete,
+    astream_chat_complete,
     structure_chat_completion,
     simple_assistant,
     structure_simple_assistant,
+    achat_complete,
+    astructure_chat_completion,
+    asimple_assistant,
 )
 
 
+def make_stream_chunks(deltas: list[str | None]) -> list[MagicMock]:
+    chunks = [
+        MagicMock(choices=[MagicMock(delta=MagicMock(content=d))]) for d in deltas
+    ]
+    # Usage only chunk at the end of stream has no choices
+    chunks.append(MagicMock(choices=[]))
+    return chunks
+
+
 class TestChat(unittest.TestCase):
+    def setUp(self):
+        # Keep tests isolated from the process wide response cache
+        patcher = patch("fluctlight.open.chat.get_response_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_get_provider_and_model_id(self):
         self.assertEqual(get_provider_and_model_id("openai:gpt-3"), ("openai", "gpt-3"))
         self.assertEqual(
@@ -60,6 +84,50 @@ class TestChat(unittest.TestCase):
             messages=messages,
         )
 
+    @patch("fluctlight.open.chat.get_open_client")
+    def test_chat_complete_coalesce_in_flight(self, mock_get_client):
+        release = threading.Event()
+        mock_response = MagicMock(spec=ChatCompletion)
+
+        def create(**kwargs):
+            release.wait(timeout=5)
+            return mock_response
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = create
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "same question"}]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(chat_complete, messages=messages, model_key="gpt-3")
+                for _ in range(3)
+            ]
+            time.sleep(0.1)
+            release.set()
+            responses = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual(responses, [mock_response] * 3)
+        self.assertEqual(mock_client.chat.completions.create.call_count, 1)
+
+    @patch("fluctlight.open.chat.get_open_client")
+    def test_stream_chat_complete(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = iter(
+            make_stream_chunks(["Hel", None, "lo"])
+        )
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "test"}]
+        deltas = list(stream_chat_complete(messages=messages, model_key="gpt-3"))
+
+        self.assertEqual(deltas, ["Hel", "lo"])
+        mock_client.chat.completions.create.assert_called_with(
+            model="gpt-3",
+            messages=messages,
+            stream=True,
+        )
+
     @patch("fluctlight.open.chat.get_open_client")
     def test_structure_chat_completion(self, mock_get_client):
         mock_client = MagicMock()
@@ -79,6 +147,27 @@ class TestChat(unittest.TestCase):
             response_format=dict,
         )
 
+    @patch("fluctlight.open.chat.get_response_cache")
+    @patch("fluctlight.open.chat.get_open_client")
+    def test_structure_chat_completion_cache(self, mock_get_client, mock_get_cache):
+        mock_get_cache.return_value = ResponseCache(tiers=[MemoryCacheTier()])
+        mock_client = MagicMock()
+        mock_client.beta.chat.completions.parse.return_value = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "test"}]
+        response1 = structure_chat_completion(output_schema=dict, messages=messages)
+        response2 = structure_chat_completion(output_schema=dict, messages=messages)
+        self.assertIs(response1, response2)
+        self.assertEqual(mock_client.beta.chat.completions.parse.call_count, 1)
+
+        # Opt out per call
+        structure_chat_completion(
+            output_schema=dict, messages=messages, use_cache=False
+        )
+        self.assertEqual(mock_client.beta.chat.completions.parse.call_count, 2)
+        self.assertEqual(mock_get_cache.return_value.stats["misses"], 1)
+
     @patch("fluctlight.open.chat.chat_complete")
     def test_simple_assistant(self, mock_chat_complete):
         mock_completion = MagicMock(spec=ChatCompletion)
@@ -110,5 +199,79 @@ class TestChat(unittest.TestCase):
         mock_structure_chat_complete.assert_called_once()
 
 
+class TestAsyncChat(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Keep tests isolated from the process wide response cache
+        patcher = patch("fluctlight.open.chat.get_response_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("fluctlight.open.chat.get_async_open_client")
+    async def test_achat_complete(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_response = MagicMock(spec=ChatCompletion)
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "test"}]
+        response = await achat_complete(messages=messages, model_key="deepseek:chat")
+
+        self.assertEqual(response, mock_response)
+        mock_get_client.assert_called_once_with("deepseek")
+        mock_client.chat.completions.create.assert_awaited_with(
+            model="chat",
+            messages=messages,
+        )
+
+    @patch("fluctlight.open.chat.get_async_open_client")
+    async def test_astream_chat_complete(self, mock_get_client):
+        async def stream():
+            for chunk in make_stream_chunks(["<think>", "hmm</think>", "ok"]):
+                yield chunk
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=stream())
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "test"}]
+        deltas = [d async for d in astream_chat_complete(messages=messages)]
+
+        self.assertEqual(deltas, ["<think>", "hmm</think>", "ok"])
+
+    @patch("fluctlight.open.chat.get_async_open_client")
+    async def test_astructure_chat_completion(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_response = MagicMock(spec=ChatCompletion)
+        mock_client.beta.chat.completions.parse = AsyncMock(return_value=mock_response)
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "test"}]
+        response = await astructure_chat_completion(
+            output_schema=dict, messages=messages, model_key="openai:gpt-3"
+        )
+
+        self.assertEqual(response, mock_response)
+        mock_client.beta.chat.completions.parse.assert_awaited_with(
+            model="gpt-3",
+            messages=messages,
+            response_format=dict,
+        )
+
+    @patch("fluctlight.open.chat.achat_complete")
+    async def test_asimple_assistant(self, mock_achat_complete):
+        mock_completion = MagicMock(spec=ChatCompletion)
+        mock_completion.choices = [
+            MagicMock(
+                spec=Choice,
+                message=MagicMock(spec=ChatCompletionMessage, content="test response"),
+            )
+        ]
+        mock_achat_complete.return_value = mock_completion
+
+        response = await asimple_assistant("test prompt")
+        self.assertEqual(response, "test response")
+        mock_achat_complete.assert_awaited_once()
+
+
 if __name__ == "__main__":
     unittest.main()
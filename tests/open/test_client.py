@@ -1,10 +1,13 @@
 import unittest
+
+import openai
 from httpx import URL
 from unittest.mock import patch, MagicMock
 from fluctlight.open.client import (
     make_openai_client,
     get_alternative_platforms,
     get_open_client,
+    get_async_open_client,
     Alternative,
     OPENAI_CLIENT,
 )
@@ -76,6 +79,25 @@ class TestOpenAIClient(unittest.TestCase):
             get_open_client("unknown")
         self.assertEqual(str(context.exception), "Unknown platform: unknown")
 
+    @patch.dict("fluctlight.open.client._ASYNC_CLIENT_CACHE", {})
+    @patch.dict(
+        "fluctlight.open.client._ALT_PLATFORMS",
+        {"deepseek": Alternative(api_key="test-key", base_url="http://test.com")},
+    )
+    def test_get_async_open_client(self):
+        client1 = get_async_open_client("deepseek")
+        client2 = get_async_open_client("DeepSeek")
+
+        self.assertIsInstance(client1, openai.AsyncOpenAI)
+        self.assertIs(client1, client2)  # Test caching
+        self.assertEqual(client1.api_key, "test-key")
+        self.assertEqual(client1.base_url, "http://test.com")
+
+    def test_get_async_open_client_unknown(self):
+        with self.assertRaises(ValueError) as context:
+            get_async_open_client("unknown")
+        self.assertEqual(str(context.exception), "Unknown platform: unknown")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from fluctlight.open.embedding import embed_texts
+
+
+class TestEmbedTexts(unittest.TestCase):
+    @patch("fluctlight.open.embedding.get_open_client")
+    def test_embed_texts(self, mock_get_open_client):
+        mock_get_open_client.return_value.embeddings.create.return_value.data = [
+            MagicMock(index=1, embedding=[0.0, 2.0]),
+            MagicMock(index=0, embedding=[3.0, 4.0]),
+        ]
+        vectors = embed_texts(["a", "b"], model_key="text-embedding-3-small")
+        np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
+        mock_get_open_client.assert_called_once_with("openai")
+
+
+if __name__ == "__main__":
+    unittest.main()
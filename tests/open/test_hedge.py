@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fluctlight.open.chat import chat_complete
+from fluctlight.open.hedge import Hedger, LatencyTracker, get_hedge_model_key
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_percentile(self):
+        tracker = LatencyTracker(window=10)
+        self.assertIsNone(tracker.percentile("m", 90))
+        for latency in range(1, 11):
+            tracker.record("m", float(latency))
+        self.assertEqual(tracker.percentile("m", 90), 10.0)
+        self.assertEqual(tracker.percentile("m", 50), 6.0)
+        tracker.record("m", 0.5)
+        self.assertEqual(tracker.count("m"), 10)
+
+
+class TestGetHedgeModelKey(unittest.TestCase):
+    def test_router_family(self):
+        families = "r1=deepseek:deepseek-reasoner|fireworks:deepseek-r1"
+        self.assertEqual(
+            get_hedge_model_key("DeepSeek:deepseek-reasoner", families),
+            "fireworks:deepseek-r1",
+        )
+        self.assertEqual(
+            get_hedge_model_key("fireworks:deepseek-r1", families),
+            "deepseek:deepseek-reasoner",
+        )
+        # Never the same model id at another provider, which may not serve it
+        self.assertIsNone(get_hedge_model_key("openai:gpt-4o", families))
+        self.assertIsNone(get_hedge_model_key("deepseek:deepseek-chat", ""))
+
+    @patch("fluctlight.open.hedge.LLM_HEDGE_MODEL_KEY", "fireworks:v3")
+    def test_configured(self):
+        self.assertEqual(get_hedge_model_key("openai:gpt-4o"), "fireworks:v3")
+        self.assertIsNone(get_hedge_model_key("fireworks:v3"))
+
+
+class TestHedger(unittest.TestCase):
+    def setUp(self) -> None:
+        self.hedger = Hedger(min_samples=2, default_delay_sec=0.05, max_workers=4)
+
+    def test_fast_primary_not_hedged(self):
+        secondary = MagicMock()
+        result = self.hedger.call("p", lambda: "primary", "s", secondary)
+        self.assertEqual(result, "primary")
+        secondary.assert_not_called()
+        self.assertEqual(self.hedger.hedged, 0)
+        self.assertEqual(self.hedger.latency.count("p"), 1)
+
+    def test_slow_primary_hedged(self):
+        release = threading.Event()
+
+        def slow_primary():
+            release.wait(5)
+            return "primary"
+
+        result = self.hedger.call("p", slow_primary, "s", lambda: "secondary")
+        release.set()
+        self.assertEqual(result, "secondary")
+        self.assertEqual(self.hedger.hedged, 1)
+        self.assertEqual(self.hedger.secondary_wins, 1)
+
+    def test_secondary_error_waits_for_primary(self):
+        def slow_primary():
+            time.sleep(0.1)
+            return "primary"
+
+        def failing_secondary():
+            raise ValueError("boom")
+
+        result = self.hedger.call("p", slow_primary, "s", failing_secondary)
+        self.assertEqual(result, "primary")
+        self.assertEqual(self.hedger.secondary_wins, 0)
+
+    def test_both_fail_raise_primary_error(self):
+        def slow_failing_primary():
+            time.sleep(0.1)
+            raise KeyError("primary")
+
+        def failing_secondary():
+            raise ValueError("secondary")
+
+        with self.assertRaises(KeyError):
+            self.hedger.call("p", slow_failing_primary, "s", failing_secondary)
+
+    def test_delay_from_observed_percentile(self):
+        self.assertEqual(self.hedger.get_delay_sec("p"), 0.05)
+        self.hedger.latency.record("p", 1.0)
+        self.hedger.latency.record("p", 2.0)
+        self.assertEqual(self.hedger.get_delay_sec("p"), 2.0)
+
+
+class TestAsyncHedger(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_primary_cancelled(self):
+        hedger = Hedger(default_delay_sec=0.05)
+        cancelled = asyncio.Event()
+
+        async def slow_primary():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "primary"
+
+        async def secondary():
+            return "secondary"
+
+        result = await hedger.acall("p", slow_primary, "s", secondary)
+        self.assertEqual(result, "secondary")
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    async def test_fast_primary_not_hedged(self):
+        hedger = Hedger(default_delay_sec=1)
+
+        async def primary():
+            return "primary"
+
+        async def secondary():
+            raise AssertionError("should not be called")
+
+        self.assertEqual(await hedger.acall("p", primary, "s", secondary), "primary")
+        self.assertEqual(hedger.hedged, 0)
+
+
+class TestChatCompleteHedge(unittest.TestCase):
+    @patch("fluctlight.open.chat.get_hedge_model_key", return_value="deepseek:chat")
+    @patch("fluctlight.open.chat.get_open_client")
+    def test_hedge(self, mock_get_open_client, _):
+        primary_client = MagicMock()
+        primary_client.chat.completions.create.side_effect = lambda **_: (
+            time.sleep(0.5) or "primary"
+        )
+        secondary_client = MagicMock()
+        secondary_client.chat.completions.create.return_value = "secondary"
+        mock_get_open_client.side_effect = lambda provider: (
+            primary_client if provider == "openai" else secondary_client
+        )
+        hedger = Hedger(default_delay_sec=0.05)
+
+        with patch("fluctlight.open.chat.get_hedger", return_value=hedger):
+            result = chat_complete(
+                messages=[{"role": "user", "content": "Hello"}],
+                model_key="openai:gpt-4o",
+                hedge=True,
+            )
+
+        self.assertEqual(result, "secondary")
+        secondary_client.chat.completions.create.assert_called_once_with(
+            model="chat", messages=[{"role": "user", "content": "Hello"}]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from fluctlight.open.rate_limit import (
+    RateLimiter,
+    RateLimiterRegistry,
+    estimate_tokens,
+    normalize_model_key,
+    parse_rate_limits,
+)
+
+
+def make_completion(total_tokens: int) -> MagicMock:
+    completion = MagicMock()
+    completion.usage.total_tokens = total_tokens
+    return completion
+
+
+class TestRateLimitUtils(unittest.TestCase):
+    def test_normalize_model_key(self):
+        self.assertEqual(normalize_model_key("gpt-4o"), "openai:gpt-4o")
+        self.assertEqual(normalize_model_key("DeepSeek:chat"), "deepseek:chat")
+
+    def test_parse_rate_limits(self):
+        self.assertEqual(
+            parse_rate_limits("openai:gpt-4o=500/30000; deepseek:*=60;bad"),
+            {"openai:gpt-4o": (500, 30000), "deepseek:*": (60, 0)},
+        )
+        self.assertEqual(parse_rate_limits(""), {})
+
+    def test_estimate_tokens(self):
+        messages = [
+            {"role": "system", "content": "a" * 40},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "b" * 8},
+                    {"type": "image_url", "image_url": {"url": "http://x"}},
+                ],
+            },
+        ]
+        self.assertEqual(
+            estimate_tokens(messages, max_tokens=100), 4 + 10 + 4 + 2 + 765 + 100
+        )
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_unlimited_without_limits(self):
+        registry = RateLimiterRegistry(limits={"openai:gpt-4o": (10, 0)})
+        self.assertIsNone(registry.get("deepseek:chat"))
+        self.assertIsNotNone(registry.get("gpt-4o"))
+        fn = MagicMock(return_value="ok")
+        self.assertEqual(registry.call("deepseek:chat", fn, messages=[]), "ok")
+
+    def test_provider_wildcard(self):
+        registry = RateLimiterRegistry(limits={"deepseek:*": (10, 0)})
+        self.assertIsNotNone(registry.get("deepseek:chat"))
+        self.assertIs(registry.get("deepseek:chat"), registry.get("DeepSeek:chat"))
+
+    def test_requests_wait_for_budget(self):
+        # 600 rpm = 10 requests per second, the bucket starts full with 600
+        limiter = RateLimiter(rpm=600)
+        limiter.requests.tokens = 0
+        start = time.monotonic()
+        limiter.acquire(tokens=0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(limiter.queue_depth, 0)
+
+    def test_reconcile_from_usage(self):
+        registry = RateLimiterRegistry(limits={"openai:gpt-4o": (0, 6000)})
+        limiter = registry.get("openai:gpt-4o")
+        messages = [{"role": "user", "content": "hi"}]
+        estimated = estimate_tokens(messages)
+        registry.call(
+            "openai:gpt-4o", lambda **_: make_completion(100), messages=messages
+        )
+        # The estimate was refunded down to the actual usage
+        self.assertAlmostEqual(limiter.tokens.tokens, 6000 - 100, delta=1)
+        self.assertGreater(estimated, 100)
+
+    def test_failed_call_refunds_tokens(self):
+        registry = RateLimiterRegistry(limits={"openai:gpt-4o": (10, 6000)})
+        limiter = registry.get("openai:gpt-4o")
+
+        def fail(**_):
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            registry.call("openai:gpt-4o", fail, messages=[])
+        self.assertAlmostEqual(limiter.tokens.tokens, 6000, delta=1)
+        self.assertAlmostEqual(limiter.requests.tokens, 9, delta=0.1)
+
+    def test_fifo_queue(self):
+        limiter = RateLimiter(rpm=600)
+        limiter.requests.tokens = 0
+        order = []
+
+        def worker(idx: int):
+            limiter.acquire(tokens=0)
+            order.append(idx)
+
+        threads = []
+        for idx in range(3):
+            thread = threading.Thread(target=worker, args=(idx,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.02)
+        self.assertGreater(limiter.queue_depth, 0)
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(limiter.queue_depth, 0)
+
+
+class TestAsyncRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_acall_waits_and_reconciles(self):
+        registry = RateLimiterRegistry(limits={"openai:gpt-4o": (600, 6000)})
+        limiter = registry.get("openai:gpt-4o")
+        limiter.requests.tokens = 0
+
+        async def complete(**_):
+            return make_completion(50)
+
+        start = time.monotonic()
+        await registry.acall("openai:gpt-4o", complete, messages=[])
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertAlmostEqual(limiter.tokens.tokens, 6000 - 50, delta=1)
+        self.assertEqual(registry.queue_depths, {"openai:gpt-4o": 0})
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        limiter = RateLimiter(rpm=1)
+        limiter.requests.tokens = 0
+        task = asyncio.ensure_future(limiter.aacquire(tokens=0))
+        await asyncio.sleep(0.02)
+        self.assertEqual(limiter.queue_depth, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(limiter.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
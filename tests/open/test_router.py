@@ -0,0 +1,132 @@
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+
+from fluctlight.open.chat import chat_complete
+from fluctlight.open.router import (
+    ModelRouter,
+    is_retryable_error,
+    is_router_model_key,
+    parse_router_families,
+)
+
+
+def make_status_error(status_code: int) -> openai.APIStatusError:
+    response = httpx.Response(
+        status_code, request=httpx.Request("POST", "http://test.com")
+    )
+    if status_code == 429:
+        return openai.RateLimitError("rate limited", response=response, body=None)
+    if status_code >= 500:
+        return openai.InternalServerError("server error", response=response, body=None)
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+class TestModelRouter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.router = ModelRouter(
+            families={"r1": ["deepseek:deepseek-reasoner", "fireworks:r1"]},
+            max_failures=2,
+            cooldown_sec=60,
+            rng=random.Random(0),
+        )
+
+    def test_is_router_model_key(self):
+        self.assertTrue(is_router_model_key("auto:r1"))
+        self.assertTrue(is_router_model_key("AUTO:r1"))
+        self.assertFalse(is_router_model_key("deepseek:r1"))
+        self.assertFalse(is_router_model_key("gpt-4o"))
+
+    def test_parse_router_families(self):
+        self.assertEqual(
+            parse_router_families("r1=deepseek:a|fireworks:b; gpt-4o=openai:gpt-4o"),
+            {"r1": ["deepseek:a", "fireworks:b"], "gpt-4o": ["openai:gpt-4o"]},
+        )
+        self.assertEqual(parse_router_families(""), {})
+
+    def test_is_retryable_error(self):
+        self.assertTrue(is_retryable_error(make_status_error(429)))
+        self.assertTrue(is_retryable_error(make_status_error(503)))
+        self.assertFalse(is_retryable_error(make_status_error(400)))
+        self.assertFalse(is_retryable_error(ValueError("no")))
+
+    def test_unconfigured_family_is_rejected(self):
+        fn = MagicMock()
+        with self.assertRaises(ValueError):
+            self.router.call("auto:gpt-4o", fn)
+        # Not fanned out to the alt platforms
+        fn.assert_not_called()
+        self.assertEqual(self.router.stats, {})
+
+    def test_prefers_lower_latency(self):
+        for _ in range(5):
+            self.router.record_success("deepseek:deepseek-reasoner", 10.0)
+            self.router.record_success("fireworks:r1", 0.1)
+        picks = [self.router.candidates("auto:r1")[0] for _ in range(200)]
+        self.assertGreater(picks.count("fireworks:r1"), 180)
+
+    def test_failover_on_rate_limit(self):
+        calls = []
+
+        def fn(model_key: str) -> str:
+            calls.append(model_key)
+            if len(calls) == 1:
+                raise make_status_error(429)
+            return model_key
+
+        result = self.router.call("auto:r1", fn)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(result, calls[1])
+        self.assertNotEqual(calls[0], calls[1])
+        self.assertEqual(self.router.stats[calls[0]].consecutive_failures, 1)
+
+    def test_no_failover_on_client_error(self):
+        fn = MagicMock(side_effect=make_status_error(400))
+        with self.assertRaises(openai.BadRequestError):
+            self.router.call("auto:r1", fn)
+        self.assertEqual(fn.call_count, 1)
+
+    def test_circuit_breaker_skips_provider(self):
+        self.router.record_failure("deepseek:deepseek-reasoner")
+        self.router.record_failure("deepseek:deepseek-reasoner")
+        self.assertTrue(self.router.stats["deepseek:deepseek-reasoner"].is_open)
+        for _ in range(20):
+            self.assertEqual(
+                self.router.candidates("auto:r1"),
+                ["fireworks:r1", "deepseek:deepseek-reasoner"],
+            )
+        # Success after cooldown closes the breaker
+        self.router.record_success("deepseek:deepseek-reasoner", 1.0)
+        self.assertFalse(self.router.stats["deepseek:deepseek-reasoner"].is_open)
+
+    def test_all_failed_raises_last_error(self):
+        fn = MagicMock(side_effect=make_status_error(503))
+        with self.assertRaises(openai.InternalServerError):
+            self.router.call("auto:r1", fn)
+        self.assertEqual(fn.call_count, 2)
+
+
+class TestChatCompleteRouting(unittest.TestCase):
+    @patch("fluctlight.open.chat.get_open_client")
+    @patch("fluctlight.open.chat.get_model_router")
+    def test_chat_complete_with_router_key(self, mock_get_router, mock_get_client):
+        mock_get_router.return_value = ModelRouter(
+            families={"r1": ["deepseek:deepseek-reasoner"]}
+        )
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        messages = [{"role": "user", "content": "route me"}]
+        chat_complete(messages=messages, model_key="auto:r1")
+
+        mock_get_client.assert_called_once_with("deepseek")
+        mock_client.chat.completions.create.assert_called_once_with(
+            model="deepseek-reasoner", messages=messages
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
-from fluctlight.open.think_format_util import extract_think_message
+from fluctlight.open.think_format_util import (
+    ThinkMessageSplitter,
+    extract_think_message,
+)
 import unittest
 
 
@@ -30,5 +33,47 @@ class TestThinkFormatUtil(unittest.TestCase):
         )
 
 
+def split_stream(deltas: list[str]) -> tuple[str, str]:
+    splitter = ThinkMessageSplitter()
+    think, answer = "", ""
+    for delta in deltas:
+        think_delta, answer_delta = splitter.feed(delta)
+        think += think_delta
+        answer += answer_delta
+    think_delta, answer_delta = splitter.finish()
+    think += think_delta
+    answer += answer_delta
+    assert (think, answer) == (splitter.think, splitter.answer)
+    return think, answer
+
+
+class TestThinkMessageSplitter(unittest.TestCase):
+    def test_no_think_tags(self):
+        self.assertEqual(split_stream(["hello", " world"]), ("", "hello world"))
+
+    def test_think_tags_in_one_delta(self):
+        self.assertEqual(split_stream(["<think>abc</think>xyz"]), ("abc", "xyz"))
+
+    def test_tags_split_across_deltas(self):
+        deltas = ["<thi", "nk> a", "bc </th", "ink>", " xy", "z"]
+        self.assertEqual(split_stream(deltas), ("abc ", "xyz"))
+
+    def test_think_streams_before_end_tag(self):
+        splitter = ThinkMessageSplitter()
+        self.assertEqual(splitter.feed("<think>reason"), ("reason", ""))
+        self.assertTrue(splitter.in_think)
+        self.assertEqual(splitter.feed("ing</"), ("ing", ""))
+        self.assertEqual(splitter.feed("think>answer"), ("", "answer"))
+        self.assertFalse(splitter.in_think)
+
+    def test_partial_start_tag_is_answer(self):
+        self.assertEqual(split_stream(["<thi", "s is text"]), ("", "<this is text"))
+
+    def test_unclosed_think(self):
+        self.assertEqual(
+            split_stream(["<think>incomp", "lete</thi"]), ("incomplete</thi", "")
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
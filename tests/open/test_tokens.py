@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+
+from fluctlight.open.tokens import (
+    count_message_tokens,
+    count_text_tokens,
+    fit_to_token_budget,
+)
+
+
+def make_message(role: str, chars: int) -> dict:
+    return {"role": role, "content": "a" * chars}
+
+
+# Approximate count, 4 chars per token, without loading tiktoken encodings
+@patch("fluctlight.open.tokens.get_encoding", return_value=None)
+class TestTokens(unittest.TestCase):
+    def test_count_text_tokens(self, _):
+        self.assertEqual(count_text_tokens("a" * 8, "gpt-4o"), 2)
+        self.assertEqual(count_text_tokens("a" * 9, "gpt-4o"), 3)
+
+    def test_count_message_tokens(self, _):
+        message = {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "a" * 40},
+                {"type": "image_url", "image_url": {"url": "x", "detail": "low"}},
+            ],
+        }
+        self.assertEqual(count_message_tokens(message, "gpt-4o"), 4 + 10 + 85)
+
+    def test_fit_within_budget(self, _):
+        messages = [make_message("system", 40), make_message("user", 40)]
+        kept, dropped = fit_to_token_budget(messages, 100, "gpt-4o")
+        self.assertEqual(kept, messages)
+        self.assertEqual(dropped, [])
+
+    def test_fit_drops_oldest_turns(self, _):
+        # 14 tokens per message
+        messages = [
+            make_message("system", 40),
+            make_message("user", 40),
+            make_message("assistant", 40),
+            make_message("user", 40),
+            make_message("assistant", 40),
+            make_message("user", 40),
+        ]
+        kept, dropped = fit_to_token_budget(messages, 14 * 4, "gpt-4o")
+        self.assertEqual(kept, [messages[0]] + messages[3:])
+        self.assertEqual(dropped, messages[1:3])
+
+    def test_fit_skips_leading_assistant(self, _):
+        messages = [
+            make_message("system", 40),
+            make_message("user", 40),
+            make_message("assistant", 40),
+            make_message("user", 40),
+        ]
+        kept, dropped = fit_to_token_budget(messages, 14 * 3, "gpt-4o")
+        self.assertEqual(kept, [messages[0], messages[3]])
+        self.assertEqual(dropped, messages[1:3])
+
+    def test_fit_keeps_last_message_over_budget(self, _):
+        messages = [make_message("user", 40), make_message("user", 400)]
+        kept, dropped = fit_to_token_budget(messages, 10, "gpt-4o")
+        self.assertEqual(kept, messages[1:])
+        self.assertEqual(dropped, messages[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
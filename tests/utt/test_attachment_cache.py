@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from fluctlight.utt.attachment_cache import (
+    CAPTION,
+    TRANSCRIPT,
+    AttachmentCache,
+    attachment_key,
+)
+
+
+class TestAttachmentCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = AttachmentCache(cache_dir=self.tmp_dir.name, max_bytes=10)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_bytes(self):
+        self.assertIsNone(self.cache.get_bytes("a"))
+        sha256 = self.cache.put_bytes("a", b"hello")
+        self.assertEqual(self.cache.get_bytes("a"), b"hello")
+        self.assertEqual(self.cache.content_hash("a"), sha256)
+
+    def test_same_content_stored_once(self):
+        self.cache.put_bytes("a", b"hello")
+        self.cache.put_bytes("b", b"hello")
+        self.assertEqual(self.cache.total_bytes, 5)
+        self.assertEqual(self.cache.get_bytes("b"), b"hello")
+
+    def test_lru_eviction(self):
+        self.cache.put_bytes("a", b"aaaa")
+        self.cache.put_bytes("b", b"bbbb")
+        self.cache.get_bytes("a")
+        self.cache.put_bytes("c", b"cccc")
+        self.assertLessEqual(self.cache.total_bytes, 10)
+        self.assertIsNone(self.cache.get_bytes("b"))
+        self.assertEqual(self.cache.get_bytes("a"), b"aaaa")
+        self.assertEqual(self.cache.get_bytes("c"), b"cccc")
+
+    def test_eviction_drops_keys_and_artifacts(self):
+        self.cache.put_bytes("a", b"aaaa")
+        self.cache.set_artifact("a", CAPTION, "a caption")
+        self.cache.put_bytes("b", b"bbbb")
+        self.cache.put_bytes("c", b"cccc")
+
+        self.assertIsNone(self.cache.content_hash("a"))
+        self.assertIsNone(self.cache.get_artifact("a", CAPTION))
+        (artifacts,) = self.cache._conn.execute(
+            "SELECT COUNT(*) FROM attachment_artifacts"
+        ).fetchone()
+        self.assertEqual(artifacts, 0)
+
+    def test_too_large_not_stored(self):
+        self.cache.put_bytes("a", b"x" * 11)
+        self.assertIsNone(self.cache.get_bytes("a"))
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_artifacts_by_content(self):
+        self.cache.set_artifact("a", TRANSCRIPT, "ignored, no content yet")
+        self.assertIsNone(self.cache.get_artifact("a", TRANSCRIPT))
+
+        self.cache.put_bytes("a", b"audio")
+        self.cache.set_artifact("a", TRANSCRIPT, "hello world")
+        self.assertEqual(self.cache.get_artifact("a", TRANSCRIPT), "hello world")
+        self.assertIsNone(self.cache.get_artifact("a", CAPTION))
+
+        # The same file shared again under another id
+        self.cache.put_bytes("b", b"audio")
+        self.assertEqual(self.cache.get_artifact("b", TRANSCRIPT), "hello world")
+
+    def test_reopen(self):
+        self.cache.put_bytes("a", b"hello")
+        cache = AttachmentCache(cache_dir=self.tmp_dir.name, max_bytes=10)
+        self.assertEqual(cache.total_bytes, 5)
+        self.assertEqual(cache.get_bytes("a"), b"hello")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "index.db")))
+
+    def test_attachment_key(self):
+        self.assertEqual(attachment_key(123), "attachment:123")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import base64
+import io
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from PIL import Image
+
+from fluctlight.utt.attachment_cache import AttachmentCache
+from fluctlight.utt.files import (
+    MediaTooLargeError,
+    base64_encode_image,
+    base64_encode_media,
+    downscale_image,
+    download_media,
+    image_mime_type,
+    preprocess_image,
+)
+from fluctlight.utt.http import HttpPool
+
+
+def make_pool(handler) -> HttpPool:
+    return HttpPool(
+        timeout_sec=60, media_timeout_sec=300, transport=httpx.MockTransport(handler)
+    )
+
+
+@patch("fluctlight.utt.files.get_attachment_cache", return_value=None)
+class TestDownloadMedia(unittest.TestCase):
+    def test_download_media(self, _):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=b"abcdef")
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            self.assertEqual(
+                download_media("http://x/a.jpg", bearer_token="token", max_bytes=10),
+                b"abcdef",
+            )
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(str(requests[0].url), "http://x/a.jpg")
+        self.assertEqual(requests[0].headers["Authorization"], "Bearer token")
+        # Media downloads outlast the default timeout of the pool
+        self.assertEqual(requests[0].extensions["timeout"]["read"], 300)
+
+    def test_reject_by_content_length(self, _):
+        read = []
+
+        def body():
+            read.append(True)
+            yield b"abc"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                200, headers={"Content-Length": "100"}, content=body()
+            )
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            with self.assertRaises(MediaTooLargeError):
+                download_media("http://x/a.jpg", max_bytes=10)
+        self.assertEqual(read, [])
+
+    def test_reject_while_streaming(self, _):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=(b"a" * 8 for _ in range(100)))
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            with self.assertRaises(MediaTooLargeError):
+                download_media("http://x/a.jpg", max_bytes=10)
+
+    def test_abort_slow_download(self, _):
+        sent = []
+
+        def body():
+            for _ in range(100):
+                time.sleep(0.01)
+                sent.append(True)
+                yield b"a"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body())
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            # Each read is fast, the whole download is over the timeout
+            with self.assertRaises(httpx.ReadTimeout):
+                download_media("http://x/a.jpg", timeout=0.1, max_bytes=0)
+        self.assertLess(len(sent), 100)
+
+    def test_http_error(self, _):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(404)
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            with self.assertRaises(httpx.HTTPStatusError):
+                download_media("http://x/a.jpg")
+
+    def test_base64_encode_media(self, _):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=b"hello")
+
+        with patch(
+            "fluctlight.utt.files.get_http_pool", return_value=make_pool(handler)
+        ):
+            self.assertEqual(base64_encode_media("http://x/a.jpg"), "aGVsbG8=")
+
+
+class TestDownloadMediaCache(unittest.TestCase):
+    def test_cache_consulted_first(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=b"hello")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = AttachmentCache(cache_dir=cache_dir, max_bytes=1024)
+            with (
+                patch("fluctlight.utt.files.get_attachment_cache", return_value=cache),
+                patch(
+                    "fluctlight.utt.files.get_http_pool",
+                    return_value=make_pool(handler),
+                ),
+            ):
+                first = download_media("http://x/a.jpg?sig=1", cache_key="attachment:1")
+                second = download_media(
+                    "http://x/a.jpg?sig=2", cache_key="attachment:1"
+                )
+        self.assertEqual(first, b"hello")
+        self.assertEqual(second, b"hello")
+        self.assertEqual(len(requests), 1)
+
+
+def make_image_bytes(
+    size: tuple[int, int], mode: str = "RGB", fmt: str = "PNG"
+) -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size, color="red").save(output, format=fmt)
+    return output.getvalue()
+
+
+class TestImagePreprocess(unittest.TestCase):
+    def test_downscale_image(self):
+        content = make_image_bytes((2000, 1000), mode="RGBA")
+        result = downscale_image(content, max_side=512, image_format="JPEG")
+        with Image.open(io.BytesIO(result)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (512, 256))
+
+    def test_downscale_image_webp_keeps_small_size(self):
+        content = make_image_bytes((100, 50))
+        result = downscale_image(content, max_side=512, image_format="WEBP")
+        with Image.open(io.BytesIO(result)) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (100, 50))
+
+    @patch("fluctlight.utt.files.IMAGE_PROCESS_WORKERS", 0)
+    def test_preprocess_image_not_an_image(self):
+        self.assertIsNone(preprocess_image(b"not an image"))
+
+    @patch("fluctlight.utt.files.IMAGE_PROCESS_WORKERS", 0)
+    @patch("fluctlight.utt.files.download_media")
+    def test_base64_encode_image(self, mock_download_media):
+        mock_download_media.return_value = make_image_bytes((1024, 1024))
+        result, mime_type = base64_encode_image(
+            "http://x/a.png", max_side=256, cache_key="k"
+        )
+        with Image.open(io.BytesIO(base64.b64decode(result))) as image:
+            self.assertEqual(image.size, (256, 256))
+        self.assertEqual(mime_type, image_mime_type())
+        mock_download_media.assert_called_once_with(
+            url="http://x/a.png", bearer_token=None, timeout=None, cache_key="k"
+        )
+
+    @patch("fluctlight.utt.files.download_media")
+    def test_base64_encode_image_as_is(self, mock_download_media):
+        content = make_image_bytes((64, 64), fmt="GIF")
+        mock_download_media.return_value = content
+        # Not downscaled, sent with its own type
+        result, mime_type = base64_encode_image("http://x/a", max_side=0)
+        self.assertEqual(base64.b64decode(result), content)
+        self.assertEqual(mime_type, "image/gif")
+
+        # Not decoded, typed by the url
+        mock_download_media.return_value = b"not an image"
+        with patch("fluctlight.utt.files.preprocess_image", return_value=None):
+            _, mime_type = base64_encode_image("http://x/a.png?v=1", max_side=256)
+        self.assertEqual(mime_type, "image/png")
+
+    def test_preprocess_image_in_process_pool(self):
+        result = preprocess_image(make_image_bytes((1024, 512)), max_side=128)
+        with Image.open(io.BytesIO(result)) as image:
+            self.assertEqual(image.size, (128, 64))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from fluctlight.utt.http import HttpPool
+
+
+class TestHttpPool(unittest.TestCase):
+    def test_client_is_reused(self):
+        pool = HttpPool(transport=httpx.MockTransport(lambda _: httpx.Response(200)))
+        self.assertIs(pool.client, pool.client)
+        self.assertEqual(pool.request("GET", "http://x/a").status_code, 200)
+        self.assertEqual(pool.client.timeout.connect, pool.timeout.connect)
+        self.assertEqual(pool.media_timeout.connect, pool.timeout.connect)
+        pool.close()
+
+    def test_http2_requires_h2(self):
+        with patch("fluctlight.utt.http.http2_available", return_value=False):
+            self.assertFalse(HttpPool(http2=True).http2)
+        self.assertFalse(HttpPool(http2=False).http2)
+
+    def test_stream(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=(b"ab" for _ in range(3)))
+
+        pool = HttpPool(transport=httpx.MockTransport(handler))
+        with pool.stream("GET", "http://x/a") as response:
+            self.assertEqual(b"".join(response.iter_bytes()), b"ababab")
+
+    def test_max_per_host(self):
+        lock = threading.Lock()
+        in_flight = {"x": 0, "y": 0}
+        peak = {"x": 0, "y": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            with lock:
+                in_flight[host] += 1
+                peak[host] = max(peak[host], in_flight[host])
+            time.sleep(0.02)
+            with lock:
+                in_flight[host] -= 1
+            return httpx.Response(200)
+
+        pool = HttpPool(max_per_host=2, transport=httpx.MockTransport(handler))
+        threads = [
+            threading.Thread(target=pool.request, args=("GET", f"http://{host}/a"))
+            for host in ("x", "y")
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(peak, {"x": 2, "y": 2})
+
+
+class TestAsyncHttpPool(unittest.IsolatedAsyncioTestCase):
+    async def test_arequest(self):
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"ok": True})
+
+        pool = HttpPool(max_per_host=3, async_transport=httpx.MockTransport(handler))
+        self.assertIs(pool.aclient, pool.aclient)
+        responses = await asyncio.gather(
+            *(pool.arequest("POST", "http://x/a", json={}) for _ in range(10))
+        )
+
+        self.assertTrue(all(r.json() == {"ok": True} for r in responses))
+        self.assertEqual(peak, 3)
+        await pool.aclose()
+
+    async def test_astream(self):
+        async def body():
+            for _ in range(3):
+                yield b"ab"
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body())
+
+        pool = HttpPool(async_transport=httpx.MockTransport(handler))
+        async with pool.astream("GET", "http://x/a") as response:
+            chunks = [chunk async for chunk in response.aiter_bytes()]
+        self.assertEqual(b"".join(chunks), b"ababab")
+        await pool.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from fluctlight.utt.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch(value: int) -> int:
+            calls.append(value)
+            release.wait(timeout=5)
+            return value * 2
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [
+                pool.submit(single_flight.do, "key", fetch, 21) for _ in range(4)
+            ]
+            # Wait until all followers are parked on the in-flight call
+            while single_flight.coalesced < 3:
+                time.sleep(0.001)
+            release.set()
+            results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual(results, [42, 42, 42, 42])
+        self.assertEqual(calls, [21])
+        self.assertEqual(single_flight.executed, 1)
+        self.assertEqual(single_flight.in_flight, 0)
+
+    def test_sequential_calls_execute_again(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+        self.assertEqual(single_flight.do("key", lambda: 2), 2)
+        self.assertEqual(single_flight.executed, 2)
+
+    def test_error_is_shared(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        error = ValueError("boom")
+        calls = []
+
+        def fail():
+            calls.append(1)
+            release.wait(timeout=5)
+            raise error
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(single_flight.do, "key", fail) for _ in range(4)]
+            # Wait until all followers are parked on the in-flight call
+            while single_flight.coalesced < 3:
+                time.sleep(0.001)
+            release.set()
+            errors = [f.exception(timeout=5) for f in futures]
+
+        self.assertTrue(all(e is error for e in errors))
+        self.assertEqual(calls, [1])
+        self.assertEqual(single_flight.executed, 1)
+        self.assertEqual(single_flight.in_flight, 0)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_task(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", fetch, 21) for _ in range(3)]
+        )
+
+        self.assertEqual(results, [42, 42, 42])
+        self.assertEqual(calls, [21])
+        self.assertEqual(single_flight.coalesced, 2)
+        self.assertEqual(single_flight.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from fluctlight.utt.state_backend import (
+    decode_state,
+    encode_state,
+    SqlAlchemyStateBackend,
+    SqliteStateBackend,
+    ThreadStatePersister,
+)
+from fluctlight.utt.state_store import ConversationStateStore
+from fluctlight.intent.message_intent import create_intent
+
+
+class TestSqliteStateBackend(unittest.TestCase):
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backend = SqliteStateBackend(os.path.join(tmp_dir, "state.db"))
+            (journal_mode,) = backend._conn.execute("PRAGMA journal_mode").fetchone()
+            self.assertEqual(journal_mode, "wal")
+
+            backend.save_many({("chat", "t1"): b"a", ("chat", "t2"): b"b"})
+            backend.save_many({("chat", "t1"): b"c", ("chat", "t2"): None})
+
+            self.assertEqual(backend.load("chat", "t1"), b"c")
+            self.assertIsNone(backend.load("chat", "t2"))
+
+            self.assertEqual(backend.prune(time.time() - 3600), 0)
+            self.assertEqual(backend.prune(time.time() + 1), 1)
+            self.assertIsNone(backend.load("chat", "t1"))
+            self.assertIsNone(backend.load("intent", "t1"))
+            backend.close()
+
+
+class TestSqlAlchemyStateBackend(unittest.TestCase):
+    def test_save_load(self):
+        # pylint: disable=import-outside-toplevel
+        from fluctlight.database import connection
+        from fluctlight.database.base import Base
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            url = f"sqlite:///{tmp_dir}/state.db"
+            connection.create_sessionmaker.cache_clear()
+            with patch.object(connection, "SQLALCHEMY_DATABASE_URL", url):
+                backend = SqlAlchemyStateBackend()
+            connection.create_sessionmaker.cache_clear()
+            Base.metadata.create_all(backend._sessionmaker.kw["bind"])
+
+            backend.save_many({("chat", "t1"): b"a", ("chat", "t2"): b"b"})
+            backend.save_many({("chat", "t1"): b"c", ("chat", "t2"): None})
+
+            self.assertEqual(backend.load("chat", "t1"), b"c")
+            self.assertIsNone(backend.load("chat", "t2"))
+
+
+class TestStateCodec(unittest.TestCase):
+    def test_round_trip_models(self):
+        intent = create_intent("CHAT")
+        intent.metadata["llm_match"] = True
+        value = {"intents": [intent], "turns": [{"role": "user", "content": "hi"}]}
+
+        decoded = decode_state(encode_state(value))
+        self.assertEqual(decoded, value)
+        self.assertIs(type(decoded["intents"][0]), type(intent))
+
+    def test_reject_models_outside_the_allowed_packages(self):
+        data = json.dumps(
+            {"__model__": "os:system", "data": {"command": "echo pwned"}}
+        ).encode("utf-8")
+        with self.assertRaises(ValueError):
+            decode_state(data)
+
+
+class TestThreadStatePersister(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backend = SqliteStateBackend(os.path.join(self.tmp_dir.name, "state.db"))
+        # Flushed by the tests only
+        self.persister = ThreadStatePersister(
+            self.backend, flush_interval_sec=3600, flush_batch=1000
+        )
+
+    def tearDown(self) -> None:
+        self.persister.close()
+        self.tmp_dir.cleanup()
+
+    def test_write_behind(self):
+        history = [{"role": "user", "content": "hi"}]
+        self.persister.save("chat", 1, history)
+        history.append({"role": "assistant", "content": "hello"})
+        self.persister.save("chat", 1, history)
+        self.persister.save("chat", 2, ["bye"])
+        self.persister.delete("chat", 2)
+
+        self.assertIsNone(self.backend.load("chat", "1"))
+        # Pending values are read before they are written
+        self.assertIs(self.persister.load("chat", 1), history)
+        self.assertIsNone(self.persister.load("chat", 2))
+
+        self.persister.flush()
+        self.assertEqual(self.persister.flushed, 2)
+        self.assertEqual(self.persister.load("chat", 1), history)
+        self.assertIsNone(self.backend.load("chat", "2"))
+
+    def test_load_while_writing(self):
+        self.persister.save("chat", 1, ["old"])
+        self.persister.flush()
+        self.persister.save("chat", 1, ["new"])
+
+        loaded = []
+        save_many = self.backend.save_many
+
+        def save_while_loading(rows):
+            # A load while the batch is written sees it, not the old row
+            loaded.append(self.persister.load("chat", 1))
+            save_many(rows)
+
+        with patch.object(self.backend, "save_many", side_effect=save_while_loading):
+            self.persister.flush()
+        self.assertEqual(loaded, [["new"]])
+        self.assertEqual(self.persister.load("chat", 1), ["new"])
+
+    def test_skip_unserializable(self):
+        self.persister.save("chat", 1, lambda: None)
+        self.persister.save("chat", 2, ["ok"])
+        self.persister.flush()
+        self.assertIsNone(self.persister.load("chat", 1))
+        self.assertEqual(self.persister.load("chat", 2), ["ok"])
+
+    def test_requeue_on_backend_error(self):
+        self.persister.save("chat", 1, ["a"])
+        with patch.object(self.backend, "save_many", side_effect=OSError("disk")):
+            self.persister.flush()
+        self.assertEqual(self.persister.errors, 1)
+        self.persister.flush()
+        self.assertIsNotNone(self.backend.load("chat", "1"))
+
+    def test_prune_idle_rows(self):
+        self.persister.save("chat", 1, ["old"])
+        self.persister.flush()
+        self.persister.save("chat", 2, ["new"])
+        with patch("fluctlight.utt.state_backend.time.time", return_value=1e10):
+            self.persister.flush()
+
+        self.persister.idle_ttl_sec = 3600
+        with patch("fluctlight.utt.state_backend.time.time", return_value=1e10 + 60):
+            self.assertEqual(self.persister.prune(), 1)
+        self.assertIsNone(self.backend.load("chat", "1"))
+        self.assertIsNotNone(self.backend.load("chat", "2"))
+
+    def test_batch_wakes_writer(self):
+        persister = ThreadStatePersister(
+            self.backend, flush_interval_sec=3600, flush_batch=2
+        )
+        persister.save("chat", 1, ["a"])
+        persister.save("chat", 2, ["b"])
+        deadline = time.monotonic() + 5
+        while persister.flushed < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(persister.flushed, 2)
+        persister.close()
+
+    def test_store_lazy_load_after_restart(self):
+        with patch(
+            "fluctlight.utt.state_store.get_thread_state_persister",
+            return_value=self.persister,
+        ):
+            store = ConversationStateStore("chat", persist=True)
+            store["t1"] = []
+            store["t1"].append("hi")
+            store.touch("t1")
+            self.persister.flush()
+
+            restarted = ConversationStateStore("chat", persist=True)
+            self.assertEqual(len(restarted), 0)
+            self.assertIn("t1", restarted)
+            self.assertEqual(restarted["t1"], ["hi"])
+
+            restarted.pop("t1")
+            self.persister.flush()
+            self.assertNotIn("t1", ConversationStateStore("chat", persist=True))
+
+    def test_store_deletes_idle_expired(self):
+        with patch(
+            "fluctlight.utt.state_store.get_thread_state_persister",
+            return_value=self.persister,
+        ):
+            store = ConversationStateStore("chat", idle_ttl_sec=0.01, persist=True)
+            store["t1"] = ["hi"]
+            self.persister.flush()
+            time.sleep(0.02)
+            self.assertNotIn("t1", store)
+            self.persister.flush()
+            self.assertIsNone(self.backend.load("chat", "t1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
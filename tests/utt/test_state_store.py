@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import patch
+
+from fluctlight.utt.state_store import (
+    ConversationStateStore,
+    approx_size,
+    get_state_store_gauges,
+)
+
+
+class TestConversationStateStore(unittest.TestCase):
+    def test_approx_size(self):
+        self.assertEqual(approx_size("abc"), 3)
+        self.assertGreater(approx_size([{"content": "a" * 1000}]), 1000)
+
+    def test_lru_by_entries(self):
+        evicted = []
+        store = ConversationStateStore(
+            "test",
+            max_entries=2,
+            max_bytes=0,
+            idle_ttl_sec=0,
+            on_evict=lambda key, value: evicted.append((key, value)),
+        )
+        store["t1"] = [1]
+        store["t2"] = [2]
+        store["t1"]  # t1 is recently used
+        store["t3"] = [3]
+
+        self.assertEqual(list(store), ["t1", "t3"])
+        self.assertEqual(evicted, [("t2", [2])])
+        self.assertEqual(store.gauges["evictions"], 1)
+
+    def test_lru_by_bytes(self):
+        store = ConversationStateStore(
+            "test", max_entries=0, max_bytes=100, idle_ttl_sec=0, sizeof=len
+        )
+        store["t1"] = "a" * 40
+        store["t2"] = "b" * 40
+        self.assertEqual(store.gauges, {"entries": 2, "bytes": 80, "evictions": 0})
+
+        store["t2"] += "b" * 30
+        self.assertNotIn("t1", store)
+        self.assertEqual(store.gauges, {"entries": 1, "bytes": 70, "evictions": 1})
+
+        # The current entry is kept even alone over the bound
+        store["t3"] = "c" * 200
+        self.assertEqual(list(store), ["t3"])
+
+    def test_touch_measures_again(self):
+        store = ConversationStateStore(
+            "test", max_entries=0, max_bytes=0, idle_ttl_sec=0, sizeof=len
+        )
+        store["t1"] = []
+        store["t1"].extend([1, 2, 3])
+        self.assertEqual(store.total_bytes, 0)
+        store.touch("t1")
+        self.assertEqual(store.total_bytes, 3)
+        self.assertEqual(store.pop("t1"), [1, 2, 3])
+        self.assertEqual(store.total_bytes, 0)
+
+    @patch("fluctlight.utt.state_store.time.monotonic")
+    def test_idle_ttl(self, mock_monotonic):
+        evicted = []
+        store = ConversationStateStore(
+            "test",
+            max_entries=0,
+            max_bytes=0,
+            idle_ttl_sec=60,
+            on_evict=lambda key, _: evicted.append(key),
+        )
+        mock_monotonic.return_value = 0
+        store["t1"] = 1
+        store["t2"] = 2
+        mock_monotonic.return_value = 50
+        self.assertEqual(store["t2"], 2)
+        mock_monotonic.return_value = 100
+        self.assertNotIn("t1", store)
+        store["t3"] = 3
+        self.assertEqual(list(store), ["t2", "t3"])
+        self.assertEqual(evicted, ["t1"])
+
+    def test_gauges_by_namespace(self):
+        first = ConversationStateStore("test_gauges", sizeof=len)
+        second = ConversationStateStore("test_gauges", sizeof=len)
+        first["t1"] = "abc"
+        second["t1"] = "de"
+        self.assertEqual(
+            get_state_store_gauges()["test_gauges"],
+            {"entries": 2, "bytes": 5, "evictions": 0},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
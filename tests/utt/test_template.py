@@ -1,7 +1,15 @@
+import os
+import tempfile
 import unittest
 
+from jinja2.exceptions import SecurityError
+
 from fluctlight.agents.expert.data_model import TaskEntity
-from fluctlight.utt.template import collect_placeholders, fstring_format
+from fluctlight.utt.template import (
+    TemplateRegistry,
+    collect_placeholders,
+    fstring_format,
+)
 
 
 class TestFStringFormat(unittest.TestCase):
@@ -40,3 +48,51 @@ class TestFStringFormat(unittest.TestCase):
             ),
             "test, 123",
         )
+
+    def test_escaped_braces(self):
+        self.assertEqual(
+            fstring_format("{{ It is }} an example with {a}{b.c}.", a=1, b={"c": "x"}),
+            "{ It is } an example with 1x.",
+        )
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    def test_compile_once(self):
+        registry = TemplateRegistry()
+        template = registry.get("Hello {{ user.name }}, {{ greeting }}")
+        self.assertIs(registry.get("Hello {{ user.name }}, {{ greeting }}"), template)
+        self.assertEqual(template.variables, frozenset({"user", "greeting"}))
+        self.assertEqual(
+            registry.render(template.source, {"user": {"name": "Bob"}}, greeting="hi"),
+            "Hello Bob, hi",
+        )
+        self.assertEqual(len(registry), 1)
+
+    def test_max_size(self):
+        registry = TemplateRegistry(max_size=2)
+        first = registry.get("{{ a }}")
+        registry.get("{{ b }}")
+        registry.get("{{ c }}")
+        self.assertEqual(len(registry), 2)
+        self.assertIsNot(registry.get("{{ a }}"), first)
+
+    def test_expression(self):
+        registry = TemplateRegistry()
+        expression = registry.expression("order.quantity | int > 0")
+        self.assertIs(registry.expression("order.quantity | int > 0"), expression)
+        self.assertTrue(expression(order={"quantity": "2"}))
+        self.assertFalse(expression(order={"quantity": "zero"}))
+        with self.assertRaises(SecurityError):
+            registry.expression("order.__class__.__subclasses__()")(order={})
+
+    def test_sandboxed(self):
+        registry = TemplateRegistry()
+        with self.assertRaises(SecurityError):
+            registry.render("{{ obj.__class__.__subclasses__() }}", obj=object())
+
+    def test_bytecode_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            TemplateRegistry(bytecode_cache_dir=cache_dir).get("{{ a }}")
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            registry = TemplateRegistry(bytecode_cache_dir=cache_dir)
+            self.assertEqual(registry.render("{{ a }}", a=1), "1")